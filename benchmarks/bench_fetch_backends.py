@@ -0,0 +1,130 @@
+"""
+Benchmark dos backends de leitura: pd.read_sql x COPY -> Arrow (light_comercial/copy_arrow.py).
+
+Cria tabelas temporárias sintéticas (formato parecido com as notas APR) em um
+Postgres local e mede o tempo de cada backend lendo a tabela inteira. Ao final
+compara os dois resultados valor a valor (textos com quebra de linha, "N/A",
+'' x NULL, numeric e timestamptz).
+
+Uso:
+    python benchmarks/bench_fetch_backends.py [--url postgresql+psycopg://...] [--linhas 100000 1000000] [--repeticoes 3]
+
+Sem --url, usa as variáveis DB_* do .env (as mesmas do dashboard).
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote_plus
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from light_comercial import copy_arrow  # noqa: E402
+
+SQL_TABELA = """
+    CREATE TEMP TABLE {tabela} AS
+    SELECT
+        i                                                   AS id,
+        DATE '2024-01-01' + (i % 365)                       AS data_servico,
+        lpad((1600000000 + i / 20)::text, 12, '0')          AS numero_nota,
+        'EQ-' || (ARRAY['BP', 'VR', 'TR'])[1 + i % 3] || lpad((i % 200)::text, 3, '0') AS recurso,
+        i % 15                                              AS card_numero,
+        'Pergunta ' || (i % 15) || CASE WHEN i % 7 = 0 THEN E'\\n(continuação, "entre aspas")' ELSE '' END
+                                                            AS pergunta_texto,
+        i % 4                                               AS item_numero,
+        (ARRAY['Sim', 'Não', 'N/A', NULL, ''])[1 + i % 5]   AS resposta,
+        CASE WHEN i % 11 = 0 THEN NULL ELSE (random() * 1000)::numeric(10, 2) END AS valor,
+        now() - (i || ' seconds')::interval                 AS atualizado_em
+    FROM generate_series(1, :linhas) AS i
+"""
+
+SQL_LEITURA = "SELECT * FROM {tabela} WHERE data_servico >= :desde"
+
+
+def criar_engine(url=None):
+    load_dotenv()
+    url = url or (
+        f"postgresql+psycopg://{os.getenv('DB_USER')}:{quote_plus(os.getenv('DB_PASS', ''))}"
+        f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+    )
+    return create_engine(url)
+
+
+def ler_read_sql(conn, query, params):
+    return pd.read_sql(text(query), conn, params=params)
+
+
+def medir(nome, funcao, conn, query, params, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        df = funcao(conn, query, params)
+        tempos.append(time.perf_counter() - inicio)
+    memoria = df.memory_usage(deep=True).sum() / 1024 ** 2
+    print(
+        f"  {nome:<18} melhor {min(tempos):8.3f}s   média {sum(tempos) / len(tempos):8.3f}s   "
+        f"{len(df):,} linhas   {memoria:8.1f} MB"
+    )
+    return df
+
+
+def diferencas(df_sql, df_copy):
+    """Colunas em que os backends divergem (tipos Python dos valores ou os próprios valores)"""
+    if list(df_sql.columns) != list(df_copy.columns) or len(df_sql) != len(df_copy):
+        return ["<colunas ou número de linhas>"]
+    df_sql = df_sql.sort_values("id", ignore_index=True)
+    df_copy = df_copy.sort_values("id", ignore_index=True)
+    divergentes = []
+    for coluna in df_sql.columns:
+        a, b = df_sql[coluna], df_copy[coluna]
+        if pd.api.types.is_datetime64_any_dtype(a) or pd.api.types.is_datetime64_any_dtype(b):
+            iguais = pd.to_datetime(a, utc=True).equals(pd.to_datetime(b, utc=True))
+        elif pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            # Larguras podem diferir (int32 x int64); a compactação reduz as duas
+            iguais = a.astype("float64").equals(b.astype("float64"))
+        else:
+            iguais = (
+                a.isna().equals(b.isna())
+                and a[a.notna()].map(type).equals(b[b.notna()].map(type))
+                and a[a.notna()].equals(b[b.notna()])
+            )
+        if not iguais:
+            divergentes.append(coluna)
+    return divergentes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL SQLAlchemy do Postgres (padrão: variáveis DB_*)")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engine = criar_engine(args.url)
+    with engine.connect() as conn:
+        for linhas in args.linhas:
+            tabela = f"bench_fetch_{linhas}"
+            conn.execute(text(SQL_TABELA.format(tabela=tabela)), {"linhas": linhas})
+            query = SQL_LEITURA.format(tabela=tabela)
+            params = {"desde": "2024-01-01"}
+
+            print(f"📊 {linhas:,} linhas sintéticas, {args.repeticoes} repetições")
+            df_sql = medir("pd.read_sql", ler_read_sql, conn, query, params, args.repeticoes)
+            df_copy = medir("COPY -> Arrow", copy_arrow.ler_copy_arrow, conn, query, params, args.repeticoes)
+            divergentes = diferencas(df_sql, df_copy)
+            if divergentes:
+                print(f"  ⚠️ resultados diferentes entre os backends: {', '.join(divergentes)}")
+            else:
+                print("  ✅ resultados idênticos nos dois backends")
+            print()
+            conn.execute(text(f"DROP TABLE {tabela}"))
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
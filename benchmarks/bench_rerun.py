@@ -0,0 +1,77 @@
+"""
+Benchmark do custo de rerun do dashboard (script inteiro x navegação multipágina).
+
+Executa o app com streamlit.testing.v1.AppTest: uma execução de aquecimento
+(imports, engine, caches) e depois N reruns cronometrados, que é o que o
+Streamlit faz a cada interação. Com --antes, mede também o script de uma
+revisão anterior (ex: o monolito) em um git worktree temporário.
+
+Uso:
+    python benchmarks/bench_rerun.py [--reruns 20] [--antes <revisão git>]
+
+Requer banco acessível pelas variáveis DB_* do .env (as mesmas do dashboard).
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+RAIZ = Path(__file__).resolve().parent.parent
+SCRIPT = "bd_light_comercial.py"
+
+
+def medir_reruns(raiz, reruns, timeout):
+    """(tempo da primeira execução, lista de tempos dos reruns) do app em `raiz`"""
+    sys.path.insert(0, str(raiz))
+    try:
+        app = AppTest.from_file(str(raiz / SCRIPT), default_timeout=timeout)
+        inicio = time.perf_counter()
+        app.run()
+        primeira = time.perf_counter() - inicio
+        if app.exception:
+            raise RuntimeError(f"erro ao executar {raiz / SCRIPT}: {app.exception[0].value}")
+
+        tempos = []
+        for _ in range(reruns):
+            inicio = time.perf_counter()
+            app.run()
+            tempos.append(time.perf_counter() - inicio)
+        return primeira, tempos
+    finally:
+        sys.path.remove(str(raiz))
+
+
+def imprimir(nome, primeira, tempos):
+    tempos = sorted(tempos)
+    print(
+        f"  {nome:<12} 1ª execução {primeira:7.3f}s   rerun mediana {tempos[len(tempos) // 2] * 1000:8.1f} ms"
+        f"   melhor {tempos[0] * 1000:8.1f} ms   pior {tempos[-1] * 1000:8.1f} ms"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--antes", help="Revisão git a comparar (ex: o commit anterior à divisão em pacote)")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout por execução, em segundos")
+    args = parser.parse_args(argv)
+
+    print(f"📊 {args.reruns} reruns da página padrão")
+    if args.antes:
+        with tempfile.TemporaryDirectory() as tmp:
+            worktree = Path(tmp) / "antes"
+            subprocess.run(["git", "-C", str(RAIZ), "worktree", "add", "--detach", str(worktree), args.antes], check=True)
+            try:
+                imprimir(args.antes[:12], *medir_reruns(worktree, args.reruns, args.timeout))
+            finally:
+                subprocess.run(["git", "-C", str(RAIZ), "worktree", "remove", "--force", str(worktree)], check=True)
+    imprimir("atual", *medir_reruns(RAIZ, args.reruns, args.timeout))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
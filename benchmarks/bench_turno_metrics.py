@@ -0,0 +1,99 @@
+"""
+Benchmark das métricas de Início de Turno (custo por rerun da aba).
+
+Compara o cálculo antigo (pd.to_datetime repetido + .apply linha a linha) com
+turno_metrics em um DataFrame sintético.
+
+Uso:
+    python benchmarks/bench_turno_metrics.py [--linhas 1000000] [--repeticoes 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from light_comercial import turno_metrics  # noqa: E402
+
+
+def gerar_dados(linhas, seed=42):
+    """DataFrame sintético com o mesmo formato de fetch_inicio_turno_data"""
+    rng = np.random.default_rng(seed)
+    inicio = rng.integers(5 * 60, 10 * 60, linhas)
+    fim = inicio + rng.integers(6 * 60, 10 * 60, linhas)
+    fim = np.minimum(fim, 23 * 60 + 59)
+    datas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D")
+
+    def hhmmss(minutos):
+        return pd.Series(minutos // 60).astype(str).str.zfill(2) + ":" + pd.Series(minutos % 60).astype(str).str.zfill(2) + ":00"
+
+    return pd.DataFrame({
+        "data_servico": datas.date,
+        "inicio_servico": hhmmss(inicio),
+        "fim_servico": hhmmss(fim),
+        "minutos_inicio": inicio,
+        "minutos_fim": fim,
+        "recurso": rng.choice([f"EQ-{r}{i:03d}" for r in ("BP", "VR", "TR") for i in range(200)], linhas),
+        "regional": rng.choice(["Barra do Piraí", "Volta Redonda", "Três Rios"], linhas),
+        "composicao": rng.choice(["completa", "incompleta"], linhas, p=[0.8, 0.2]),
+    })
+
+
+def metricas_antigas(df):
+    """Reprodução do cálculo anterior da aba, para comparação"""
+    df = df.drop(columns=["minutos_inicio", "minutos_fim"])
+    df["recurso"].nunique()
+    (df["composicao"] == "completa").sum()
+    df["hora_inicio"] = pd.to_datetime(df["inicio_servico"]).dt.time
+    df["minutos_inicio"] = pd.to_datetime(df["inicio_servico"]).dt.hour * 60 + pd.to_datetime(df["inicio_servico"]).dt.minute
+    df["hora_fim"] = pd.to_datetime(df["fim_servico"]).dt.time
+    df["minutos_fim"] = pd.to_datetime(df["fim_servico"]).dt.hour * 60 + pd.to_datetime(df["fim_servico"]).dt.minute
+    df.groupby("data_servico")["recurso"].nunique().mean()
+    por_data = df.groupby("data_servico").agg({"recurso": "nunique", "minutos_inicio": "mean", "minutos_fim": "mean"}).reset_index()
+    por_data["Hora Média Início"] = por_data["minutos_inicio"].apply(lambda x: f"{int(x//60):02d}:{int(x%60):02d}")
+    por_data["Hora Média Fim"] = por_data["minutos_fim"].apply(lambda x: f"{int(x//60):02d}:{int(x%60):02d}")
+    df.groupby(["regional", "composicao"]).size().unstack(fill_value=0)
+
+
+def metricas_novas(df):
+    turno_metrics.kpis_turno(df)
+    turno_metrics.recursos_por_data(df)
+    turno_metrics.composicao_por_regional(df)
+
+
+def metricas_novas_com_parse(df):
+    """Caminho do snapshot local: horários em texto convertidos uma vez"""
+    df = df.drop(columns=["minutos_inicio", "minutos_fim"])
+    df["minutos_inicio"] = turno_metrics.minutos_desde_meia_noite(df["inicio_servico"])
+    df["minutos_fim"] = turno_metrics.minutos_desde_meia_noite(df["fim_servico"])
+    metricas_novas(df)
+
+
+def medir(nome, funcao, df, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(df)
+        tempos.append(time.perf_counter() - inicio)
+    print(f"{nome:<32} melhor {min(tempos):8.3f}s   média {sum(tempos) / len(tempos):8.3f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = gerar_dados(args.linhas)
+    print(f"📊 {args.linhas:,} linhas sintéticas, {args.repeticoes} repetições\n")
+    medir("antigo (to_datetime + apply)", metricas_antigas, df, args.repeticoes)
+    medir("turno_metrics (minutos do SQL)", metricas_novas, df, args.repeticoes)
+    medir("turno_metrics (parse único)", metricas_novas_com_parse, df, args.repeticoes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
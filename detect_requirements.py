@@ -1,20 +1,23 @@
 import pkgutil
 import importlib
 import re
+from pathlib import Path
 
-file_path = "bd_light_comercial.py"
+# Entrada + pacote de dados + páginas
+file_paths = ["bd_light_comercial.py", *sorted(Path("light_comercial").glob("*.py")), *sorted(Path("paginas").glob("*.py"))]
 
 # Regex para capturar todos os imports
 pattern = r"^(?:import|from)\s+([a-zA-Z0-9_\.]+)"
 
 imports = set()
 
-with open(file_path, "r", encoding="utf-8") as f:
-    for line in f:
-        match = re.match(pattern, line.strip())
-        if match:
-            module = match.group(1).split(".")[0]
-            imports.add(module)
+for file_path in file_paths:
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            match = re.match(pattern, line.strip())
+            if match:
+                module = match.group(1).split(".")[0]
+                imports.add(module)
 
 print("📦 Bibliotecas detectadas no código:\n")
 final_packages = []
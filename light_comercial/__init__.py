@@ -0,0 +1,15 @@
+"""
+Camada de dados do dashboard LIGHT Comercial.
+
+Módulos:
+    config        variáveis de ambiente e URL do banco (lidas uma vez por processo)
+    db            engine compartilhada e telemetria do pool
+    sql           SQL base, tipos e tabelas de origem de cada query
+    consultas     execução, cache por versão dos dados e cache L2
+    loaders       um fetch_* por visão, utilizável fora do Streamlit
+    paginacao     paginação keyset
+    exportacao    exportação CSV/Excel em streaming e jobs em segundo plano
+    ui            componentes Streamlit compartilhados pelas páginas (paginas/)
+
+Os submódulos são importados sob demanda; importar o pacote não abre conexão.
+"""
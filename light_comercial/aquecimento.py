@@ -0,0 +1,219 @@
+"""
+Pré-aquecimento do cache de queries.
+
+Uma thread por processo, iniciada com o app, refaz a cada AQUECIMENTO_INTERVALO
+segundos as chamadas que os usuários mais provavelmente vão fazer:
+    - a combinação padrão do sidebar (últimos 7 dias) de cada página, para cada regional;
+    - as AQUECIMENTO_TOP combinações mais usadas, aprendidas do log de requisições
+      (eventos "fetch" da instrumentação, ou LOG_JSON_ARQUIVO quando configurado,
+      que sobrevive a restarts e junta as réplicas).
+
+Com SNAPSHOT_DIR, cada ciclo começa atualizando o snapshot local (a carga
+inicial dele acontece aqui). Entradas ainda válidas custam só a sonda de
+versão; entradas expiradas ou de uma versão antiga dos dados são recalculadas
+aqui, e não pelo primeiro usuário.
+As chamadas rodam em sequência (uma conexão por vez) e ficam marcadas com
+origem "aquecimento", fora do aprendizado.
+
+Uso avulso (ex: após um deploy, com cache L2 compartilhado):
+    python -m light_comercial.aquecimento
+"""
+import datetime
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+import streamlit as st
+
+from . import instrumentacao
+from .config import REGIONAL_OPCOES
+from .loaders import (
+    MAPA_ZOOM_PADRAO, agregar_drilldown, carregar_mapa, estimar_ofs_apr, fetch_equipes_data,
+    fetch_inicio_turno_data, fetch_ofs_apr_equipes, fetch_ofs_apr_pagina, fetch_ofs_equipamentos_opcoes,
+    fetch_ofs_equipamentos_pagina, fetch_ofs_equipamentos_resumo, fetch_status_data,
+)
+from .paginacao import PAGE_SIZE
+from .snapshot import SNAPSHOT_ATIVO, atualizar_snapshot
+
+AQUECIMENTO_ATIVO = os.getenv("AQUECIMENTO_ATIVO", "1") not in ("", "0")
+AQUECIMENTO_INTERVALO = int(os.getenv("AQUECIMENTO_INTERVALO", "300"))
+AQUECIMENTO_TOP = int(os.getenv("AQUECIMENTO_TOP", "20"))  # Combinações aprendidas por ciclo
+AQUECIMENTO_MIN_CHAMADAS = int(os.getenv("AQUECIMENTO_MIN_CHAMADAS", "2"))
+AQUECIMENTO_JANELA_EVENTOS = int(os.getenv("AQUECIMENTO_JANELA_EVENTOS", "20000"))  # Linhas lidas do log
+
+
+# Chamadas que podem ser aquecidas (nome no log -> função). As buscas completas
+# (fetch_ofs_apr, fetch_ofs_equipamentos) ficam de fora: as páginas só leem
+# páginas e resumos, e trazer o período inteiro para a memória não gera hits.
+AQUECIVEIS = {
+    "fetch_status_data": fetch_status_data,
+    "fetch_equipes_data": fetch_equipes_data,
+    "fetch_inicio_turno_data": fetch_inicio_turno_data,
+    "agregar_drilldown": agregar_drilldown,
+    "carregar_mapa": carregar_mapa,
+    "fetch_ofs_equipamentos_resumo": fetch_ofs_equipamentos_resumo,
+    "fetch_ofs_equipamentos_opcoes": fetch_ofs_equipamentos_opcoes,
+    "fetch_ofs_equipamentos_pagina": fetch_ofs_equipamentos_pagina,
+    "fetch_ofs_apr_equipes": fetch_ofs_apr_equipes,
+    "fetch_ofs_apr_pagina": fetch_ofs_apr_pagina,
+    "estimar_ofs_apr": estimar_ofs_apr,
+}
+
+
+def combinacoes_padrao(hoje=None):
+    """(nome, kwargs) da combinação padrão do sidebar (últimos 7 dias) em todas as páginas"""
+    hoje = hoje or datetime.date.today()
+    periodo = {"data_inicio": hoje - datetime.timedelta(days=7), "data_fim": hoje}
+    combinacoes = [
+        ("fetch_status_data", periodo),
+        ("fetch_equipes_data", periodo),
+        ("carregar_mapa", {**periodo, "zoom": MAPA_ZOOM_PADRAO}),
+        ("fetch_ofs_equipamentos_opcoes", {"coluna": "Base Operacional", **periodo}),
+        ("fetch_ofs_equipamentos_opcoes", {"coluna": "Ação", **periodo}),
+        ("fetch_ofs_equipamentos_resumo", periodo),
+        ("fetch_ofs_equipamentos_pagina", {**periodo, "limite": PAGE_SIZE}),
+        ("fetch_ofs_apr_equipes", periodo),
+        ("estimar_ofs_apr", periodo),
+        ("fetch_ofs_apr_pagina", {**periodo, "limite": PAGE_SIZE}),
+    ]
+    for regional in REGIONAL_OPCOES:
+        combinacoes.append(("fetch_inicio_turno_data", {**periodo, "regional": regional}))
+        combinacoes.append(("agregar_drilldown", {"nivel": "Dia", **periodo, "regional": regional}))
+    return combinacoes
+
+
+# --- Aprendizado a partir do log de requisições ---
+
+def _data(valor):
+    """date a partir do log em memória (date) ou do JSON (texto ISO)"""
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    return datetime.date.fromisoformat(str(valor)[:10])
+
+
+def _normalizar(argumentos, dia):
+    """
+    Chave hashável de uma chamada, ou None se ela não deve ser repetida.
+    Períodos que terminam no dia da chamada ("últimos N dias") são guardados
+    relativos a hoje; os demais ficam com as datas fixas.
+    """
+    if argumentos.get("apos") is not None:
+        return None  # Só a primeira página vale a pena: as demais dependem da navegação
+    relativo = argumentos.get("data_fim") is not None and _data(argumentos["data_fim"]) == dia
+    itens = []
+    for nome, valor in sorted(argumentos.items()):
+        if nome.startswith("data_") and valor is not None:
+            valor = ("dias", (_data(valor) - dia).days) if relativo else ("data", _data(valor).isoformat())
+        elif isinstance(valor, list):
+            valor = tuple(valor)
+        elif not isinstance(valor, (str, int, float, bool, type(None))):
+            return None
+        itens.append((nome, valor))
+    return tuple(itens)
+
+
+def _desnormalizar(itens, hoje):
+    """kwargs de volta a partir da chave (datas relativas resolvidas para `hoje`)"""
+    kwargs = {}
+    for nome, valor in itens:
+        if isinstance(valor, tuple) and len(valor) == 2 and valor[0] in ("dias", "data"):
+            tipo, valor = valor
+            valor = hoje + datetime.timedelta(days=valor) if tipo == "dias" else datetime.date.fromisoformat(valor)
+        elif isinstance(valor, tuple):
+            valor = list(valor)
+        kwargs[nome] = valor
+    return kwargs
+
+
+def _eventos_fetch():
+    """Eventos "fetch" do log JSON (quando configurado) ou da memória do processo"""
+    arquivo = instrumentacao.LOG_JSON_ARQUIVO
+    if not arquivo or not os.path.exists(arquivo):
+        return instrumentacao.eventos("fetch")
+    eventos = []
+    with open(arquivo, encoding="utf-8") as log:
+        for linha in deque(log, maxlen=AQUECIMENTO_JANELA_EVENTOS):
+            try:
+                evento = json.loads(linha)
+            except ValueError:
+                continue
+            if evento.get("tipo") == "fetch":
+                eventos.append(evento)
+    return eventos
+
+
+def combinacoes_populares(hoje=None, top=AQUECIMENTO_TOP):
+    """(nome, kwargs) das chamadas de usuários mais frequentes no log"""
+    hoje = hoje or datetime.date.today()
+    contagem = Counter()
+    for evento in _eventos_fetch():
+        if evento.get("origem", "usuario") != "usuario" or evento.get("erro"):
+            continue
+        if evento["nome"] not in AQUECIVEIS or not evento.get("argumentos"):
+            continue
+        try:
+            chave = _normalizar(evento["argumentos"], datetime.date.fromtimestamp(evento["ts"]))
+        except ValueError:
+            continue
+        if chave is not None:
+            contagem[(evento["nome"], chave)] += 1
+    return [
+        (nome, _desnormalizar(itens, hoje))
+        for (nome, itens), chamadas in contagem.most_common(top)
+        if chamadas >= AQUECIMENTO_MIN_CHAMADAS
+    ]
+
+
+# --- Execução ---
+
+def aquecer(hoje=None):
+    """Um ciclo: combinação padrão + mais usadas, sem repetir. Retorna o número de chamadas"""
+    vistas = set()
+    chamadas = 0
+    with instrumentacao.com_origem("aquecimento"), instrumentacao.medir("aquecimento", "ciclo") as medicao:
+        if SNAPSHOT_ATIVO:
+            # Carga inicial (ou atualização) do snapshot aqui, e não na primeira requisição
+            try:
+                atualizar_snapshot(carga_inicial=True)
+            except Exception as e:
+                print(f"Erro ao atualizar snapshot local: {e}")
+        for nome, kwargs in combinacoes_padrao(hoje) + combinacoes_populares(hoje):
+            chave = (nome, repr(sorted(kwargs.items())))
+            if chave in vistas:
+                continue
+            vistas.add(chave)
+            try:
+                AQUECIVEIS[nome](**kwargs)
+                chamadas += 1
+            except Exception as e:
+                print(f"Erro ao aquecer {nome}({kwargs}): {e}")
+        medicao.campos.update(chamadas=chamadas)
+    print(f"🔥 Cache aquecido: {chamadas} chamadas")
+    return chamadas
+
+
+@st.cache_resource
+def iniciar_aquecedor():
+    """Sobe (uma vez por processo) a thread que reaquece o cache a cada AQUECIMENTO_INTERVALO"""
+    if not AQUECIMENTO_ATIVO:
+        return None
+
+    def laco():
+        while True:
+            try:
+                aquecer()
+            except Exception as e:
+                print(f"❌ Falha no ciclo de aquecimento: {e}")
+            time.sleep(AQUECIMENTO_INTERVALO)
+
+    thread = threading.Thread(target=laco, name="aquecimento", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    aquecer()
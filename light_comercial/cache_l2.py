@@ -0,0 +1,170 @@
+"""
+Segundo nível de cache (L2) dos resultados de query, compartilhado entre réplicas.
+
+Fica abaixo do st.cache_data (L1, por processo): em um miss do L1 o resultado é
+procurado aqui antes de ir ao banco, e gravado aqui depois de lido do banco.
+Os valores são tabelas Arrow serializadas em IPC, carregadas sem cópia
+(memory map no disco, buffer único no Redis) e convertidas de volta com os
+mesmos dtypes (inclusive category).
+
+Backends:
+    CacheDisco  - arquivos .arrow em um diretório + índice sqlite (TTL e limite em MB, LRU)
+    CacheRedis  - qualquer store compatível com Redis (GET/SET com EX); aceita um
+                  cliente pronto, como o ClienteRedisLocal usado em desenvolvimento
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import pyarrow as pa
+
+# Incrementar quando o formato dos valores mudar (invalida todo o L2)
+VERSAO_FORMATO = 1
+
+
+def chave_cache(query_id, params, versao=None):
+    """Chave estável (hex) para (query_id, params, versão dos dados)"""
+    bruto = repr((VERSAO_FORMATO, query_id, params, versao)).encode("utf-8")
+    return f"{query_id.split(':')[0]}-{hashlib.sha256(bruto).hexdigest()[:40]}"
+
+
+def serializar(df):
+    """DataFrame -> bytes Arrow IPC (formato stream)"""
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as writer:
+        writer.write_table(tabela)
+    return sink.getvalue()
+
+
+def desserializar(buffer):
+    """Bytes/buffer Arrow IPC -> DataFrame"""
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+
+class CacheDisco:
+    """Arquivos Arrow IPC em `diretorio`, com índice sqlite de validade, tamanho e último acesso"""
+
+    def __init__(self, diretorio, max_mb=2048):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.max_bytes = int(max_mb * 1024 ** 2)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(diretorio, "indice.sqlite"), check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS entradas (
+                    chave           TEXT PRIMARY KEY,
+                    bytes           INTEGER NOT NULL,
+                    expira_em       REAL NOT NULL,
+                    ultimo_acesso   REAL NOT NULL
+                )
+            """)
+
+    def _arquivo(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.arrow")
+
+    def ler(self, chave):
+        with self._lock:
+            linha = self._db.execute("SELECT expira_em FROM entradas WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return None
+            if linha[0] < time.time() or not os.path.exists(self._arquivo(chave)):
+                self._remover(chave)
+                return None
+            with self._db:
+                self._db.execute("UPDATE entradas SET ultimo_acesso = ? WHERE chave = ?", (time.time(), chave))
+        with pa.memory_map(self._arquivo(chave)) as origem:
+            return desserializar(origem)
+
+    def gravar(self, chave, df, ttl):
+        buffer = serializar(df)
+        destino = self._arquivo(chave)
+        temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(buffer)
+        os.replace(temporario, destino)
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entradas (chave, bytes, expira_em, ultimo_acesso) VALUES (?, ?, ?, ?)",
+                    (chave, buffer.size, time.time() + ttl, time.time()),
+                )
+            self._limpar()
+
+    def _remover(self, chave):
+        with self._db:
+            self._db.execute("DELETE FROM entradas WHERE chave = ?", (chave,))
+        try:
+            os.remove(self._arquivo(chave))
+        except FileNotFoundError:
+            pass
+
+    def _limpar(self):
+        """Remove entradas vencidas e, acima do limite, as menos acessadas"""
+        for (chave,) in self._db.execute("SELECT chave FROM entradas WHERE expira_em < ?", (time.time(),)).fetchall():
+            self._remover(chave)
+        total = self._db.execute("SELECT coalesce(sum(bytes), 0) FROM entradas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for chave, tamanho in self._db.execute("SELECT chave, bytes FROM entradas ORDER BY ultimo_acesso").fetchall():
+            self._remover(chave)
+            total -= tamanho
+            if total <= self.max_bytes:
+                break
+
+
+class ClienteRedisLocal:
+    """Stand-in em memória de um cliente Redis (GET/SET com EX), para desenvolvimento e testes"""
+
+    def __init__(self):
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            valor, expira_em = self._valores.get(chave, (None, None))
+            if expira_em is not None and expira_em < time.time():
+                del self._valores[chave]
+                return None
+            return valor
+
+    def set(self, chave, valor, ex=None):
+        with self._lock:
+            self._valores[chave] = (bytes(valor), time.time() + ex if ex else None)
+        return True
+
+
+class CacheRedis:
+    """Valores Arrow IPC em um store compatível com Redis, com expiração nativa (EX)"""
+
+    def __init__(self, url=None, cliente=None, prefixo="light_comercial:"):
+        if cliente is None:
+            if url == "local://":
+                cliente = ClienteRedisLocal()
+            else:
+                import redis  # dependência opcional, só para este backend
+                cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def ler(self, chave):
+        valor = self.cliente.get(self.prefixo + chave)
+        return desserializar(pa.py_buffer(valor)) if valor is not None else None
+
+    def gravar(self, chave, df, ttl):
+        self.cliente.set(self.prefixo + chave, serializar(df).to_pybytes(), ex=int(ttl))
+
+
+def criar_backend(tipo, diretorio=None, max_mb=2048, url=None):
+    """Backend L2 pelo nome ("disco" ou "redis"); vazio desativa o L2"""
+    if not tipo:
+        return None
+    if tipo == "disco":
+        return CacheDisco(diretorio, max_mb=max_mb)
+    if tipo == "redis":
+        return CacheRedis(url=url)
+    raise ValueError(f"Backend de cache L2 desconhecido: {tipo}")
@@ -0,0 +1,58 @@
+"""
+Execução concorrente de queries.
+
+Abas que precisam de várias consultas disparam todas ao mesmo tempo, cada uma
+em uma conexão do pool, e o tempo total fica próximo ao da query mais lenta.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "4"))  # Não deve passar do pool_size da engine
+
+
+@st.cache_resource
+def _query_executor():
+    """Pool de threads para consultas concorrentes, único por processo"""
+    return ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="query")
+
+
+def fetch_many(consultas):
+    """
+    Executa em paralelo um lote de consultas nomeadas.
+    `consultas` mapeia nome -> função sem argumentos (ex: functools.partial de um fetch_*).
+    Retorna um dicionário nome -> DataFrame, na mesma ordem.
+    """
+    ctx = get_script_run_ctx()
+    inicio_lote = time.perf_counter()
+
+    def executar(nome, consulta):
+        # Propaga o contexto da sessão para que cache e st.error funcionem na thread
+        add_script_run_ctx(threading.current_thread(), ctx)
+        inicio = time.perf_counter()
+        df = consulta()
+        print(f"Query '{nome}': {time.perf_counter() - inicio:.3f}s ({len(df)} linhas)")
+        return df
+
+    futuros = {
+        nome: _query_executor().submit(executar, nome, consulta)
+        for nome, consulta in consultas.items()
+    }
+    resultados = {nome: futuro.result() for nome, futuro in futuros.items()}
+    print(f"Lote {list(consultas)}: {time.perf_counter() - inicio_lote:.3f}s")
+    return resultados
+
+
+def em_segundo_plano(funcao, *args, **kwargs):
+    """Agenda `funcao` no pool de queries sem aguardar o resultado (ex: pré-carregar o cache)"""
+    ctx = get_script_run_ctx()
+
+    def executar():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return funcao(*args, **kwargs)
+
+    return _query_executor().submit(executar)
@@ -0,0 +1,28 @@
+"""
+Configuração de conexão do LIGHT Comercial.
+
+Lida uma única vez, na importação do pacote (e não a cada rerun do Streamlit).
+"""
+import os
+from urllib.parse import quote_plus
+
+from dotenv import load_dotenv
+
+load_dotenv()  # Carrega variáveis do arquivo .env
+
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = os.getenv("DB_PORT")
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASS = os.getenv("DB_PASS")
+
+DB_PASS_ENCODED = quote_plus(DB_PASS)
+
+SCHEMA_NAME = "light"
+TABLE_NAME = '"4600010296_servicos"'
+
+REGIONAL_OPCOES = ["Todas", "Barra do Piraí", "Volta Redonda", "Três Rios"]
+
+# Criar string de conexão SQLAlchemy (driver psycopg 3: parâmetros enviados ao servidor, não interpolados)
+DATABASE_URL = f"postgresql+psycopg://{DB_USER}:{DB_PASS_ENCODED}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+print(f"URL de conexão: postgresql+psycopg://{DB_USER}:{'*' * len(DB_PASS)}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
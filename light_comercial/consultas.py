@@ -0,0 +1,427 @@
+"""
+Execução das queries do dashboard: parâmetros bind, tipos compactos, backend de
+leitura (read_sql / COPY), cache versionado pelos dados de origem (L1 do
+Streamlit + L2 compartilhado) e single-flight.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from functools import partial
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+from . import cache_l2, copy_arrow, instrumentacao, snapshot
+from .config import SCHEMA_NAME, TABLE_NAME
+from .db import get_engine
+from .sql import DIM_REGIONAL, FONTES_QUERY, ROLLUP_TABLE, TIPOS_QUERY
+
+# --- Camada de Queries Parametrizadas ---
+# As queries usam parâmetros nomeados (:nome) enviados via text(), nunca literais
+# interpolados. Assim o texto SQL é estável por query: o cache do Streamlit é
+# chaveado por (id da query, parâmetros) em vez do SQL completo e o servidor
+# reaproveita o plano do prepared statement (bind no servidor, ver db.py).
+
+def _normalizar_param(valor):
+    """Converte um parâmetro em valor hashable e estável para a chave de cache"""
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted(valor))
+    if isinstance(valor, (list, tuple)):
+        return tuple(valor)
+    return valor
+
+
+def build_params(**params):
+    """
+    Monta a tupla ordenada de pares (nome, valor) usada como chave de cache.
+    Parâmetros None são descartados.
+    """
+    return tuple(sorted(
+        (nome, _normalizar_param(valor))
+        for nome, valor in params.items()
+        if valor is not None
+    ))
+
+
+def build_query(base, conditions=None, order_by=None, group_by=None):
+    """Acrescenta condições (AND), agrupamento e ordenação a uma query base"""
+    query = base
+    if conditions:
+        query += " AND " + " AND ".join(conditions)
+    if group_by:
+        query += f" GROUP BY {group_by}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return query
+
+
+def _filtros_periodo(data_inicio=None, data_fim=None, coluna="s.data_servico"):
+    """Condições e parâmetros para o filtro de período"""
+    conditions = []
+    params = {}
+    if data_inicio:
+        conditions.append(f"{coluna} >= :data_inicio")
+        params["data_inicio"] = data_inicio
+    if data_fim:
+        conditions.append(f"{coluna} <= :data_fim")
+        params["data_fim"] = data_fim
+    return conditions, params
+
+
+def _filtros_periodo_regional(data_inicio=None, data_fim=None, regional=None):
+    """Condições e parâmetros para período + regional"""
+    conditions, params = _filtros_periodo(data_inicio, data_fim)
+    if regional and regional != "Todas":
+        # Igualdade na coluna gerada e indexada regional_sigla (migrations/002)
+        conditions.append(
+            f"s.regional_sigla = (SELECT r.sigla FROM {SCHEMA_NAME}.{DIM_REGIONAL} r WHERE r.regional = :regional)"
+        )
+        params["regional"] = regional
+    return conditions, params
+
+
+def _bind_params(params):
+    """Converte a tupla de build_params() no dicionário enviado ao driver"""
+    # Listas viram ARRAY no psycopg (usadas com = ANY(:param))
+    return {nome: list(valor) if isinstance(valor, tuple) else valor for nome, valor in params}
+
+
+# --- Tipos compactos por query ---
+# Cada query pode declarar em TIPOS_QUERY (junto ao SQL) as colunas de baixa
+# cardinalidade (category), de data (datetime64, convertidas uma única vez) e
+# decimais que aceitam float32. Inteiros são sempre reduzidos ao menor tipo.
+# Colunas com muitos valores distintos continuam object: como category elas
+# ocupariam mais memória.
+
+CATEGORIA_MAX_FRACAO = 0.5
+
+
+def _memoria_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def compactar_dataframe(df, tipos=None):
+    """
+    Aplica o schema de tipos de uma query (categorias, datas, decimais) e reduz
+    os inteiros. Retorna (df, MB antes, MB depois).
+    """
+    antes = _memoria_mb(df)
+    tipos = tipos or {}
+    for coluna in tipos.get("datas", []):
+        if coluna in df.columns:
+            df[coluna] = pd.to_datetime(df[coluna], errors="coerce")
+    for coluna in tipos.get("categorias", []):
+        if coluna in df.columns and df[coluna].nunique() <= len(df) * CATEGORIA_MAX_FRACAO:
+            df[coluna] = df[coluna].astype("category")
+    for coluna in tipos.get("decimais", []):
+        if coluna in df.columns and pd.api.types.is_float_dtype(df[coluna]):
+            df[coluna] = pd.to_numeric(df[coluna], downcast="float")
+    for coluna in df.select_dtypes(include="integer").columns:
+        df[coluna] = pd.to_numeric(df[coluna], downcast="integer")
+    return df, antes, _memoria_mb(df)
+
+
+def tipar_resultado(query_id, df):
+    """Compacta o resultado de `query_id` (variantes "id:sufixo" usam o schema de "id")"""
+    if df.empty:
+        return df
+    tipos = TIPOS_QUERY.get(query_id.split(":")[0])
+    df, antes, depois = compactar_dataframe(df, tipos)
+    if antes > 0:
+        print(
+            f"Memória '{query_id}': {antes:.1f} MB -> {depois:.1f} MB "
+            f"({(antes - depois) / antes:.0%} economizado)"
+        )
+    return df
+
+
+# --- Backend de leitura por query ---
+# "read_sql": pd.read_sql (tuplas Python linha a linha, bom para resultados pequenos).
+# "copy": COPY (query) TO STDOUT -> pyarrow (copy_arrow.py), para os resultados grandes.
+# FETCH_COPY_QUERIES lista os query_id lidos por COPY (vazio desativa).
+QUERIES_COPY = {
+    query_id.strip()
+    for query_id in os.getenv("FETCH_COPY_QUERIES", "inicio_turno,ofs_equipamentos,ofs_apr").split(",")
+    if query_id.strip()
+}
+
+
+def backend_query(query_id):
+    """Backend de leitura usado para `query_id`"""
+    return "copy" if query_id in QUERIES_COPY else "read_sql"
+
+
+def ler_query(conn, query_id, query, params):
+    """Lê o resultado de `query` no backend configurado para `query_id`"""
+    if backend_query(query_id) == "copy":
+        return copy_arrow.ler_copy_arrow(conn, query, params)
+    return pd.read_sql(text(query), conn, params=params)
+
+
+# --- Cache por versão dos dados ---
+# Cada entrada do cache leva, além de (query_id, params), a versão dos dados de
+# origem: o resultado das sondas das tabelas da query (FONTES_QUERY) e o contador
+# de geração da query. Enquanto nada muda, a entrada vale até CACHE_TTL; quando a
+# sonda muda ou o botão "Atualizar" incrementa a geração da aba, a chave muda e a
+# próxima leitura vai ao banco. Leituras simultâneas da mesma chave compartilham
+# uma única execução (single-flight).
+
+CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "500"))
+CACHE_SONDA_TTL = int(os.getenv("CACHE_SONDA_TTL", "30"))
+
+# Queries de cada aba (o botão "Atualizar" invalida apenas as da aba atual)
+QUERIES_ABA = {
+    "📊 Dashboard Geral": ("status", "equipes"),
+    "🔄 Início de Turno": ("inicio_turno",),
+    "🗺️ Mapa de Atividades": ("mapa", "mapa_contagem", "mapa_grade"),
+    "🧰 Notas Equipamentos": ("ofs_equipamentos", "ofs_equipamentos_resumo", "ofs_equipamentos_opcoes"),
+    "📝 Notas APR": ("ofs_apr", "ofs_apr_equipes"),
+}
+
+# Sonda das tabelas grandes: versão por dia mantida por triggers (migrations/007).
+# Cada INSERT/UPDATE/DELETE dá um novo número aos dias de data_servico afetados
+# (TRUNCATE, à linha "-infinity", que vale para todos os dias). A lista de cada
+# tabela é lida uma vez a cada CACHE_SONDA_TTL, pela chave primária, e compartilhada
+# por todos os períodos e partições; a versão de um período é o resumo dos seus dias.
+# Escritas em outros dias não mudam a versão do período.
+SQL_SONDA_DIAS = f"""
+    SELECT CASE WHEN data_servico = '-infinity' THEN NULL ELSE data_servico END AS dia, versao
+    FROM {SCHEMA_NAME}.versao_dia
+    WHERE tabela = :tabela
+    ORDER BY data_servico
+    """
+TABELAS_VERSAO_DIA = {TABLE_NAME, "ofs_notas_equipamentos", "ofs_apr"}
+
+# Tabelas pequenas (dimensões, lote_material): linhas e soma dos xmin da tabela inteira.
+# O xmin muda a cada INSERT/UPDATE da linha e um DELETE muda a contagem.
+SQL_SONDA_TABELA = (
+    "SELECT count(*) AS linhas, coalesce(sum(t.xmin::text::bigint), 0) AS xmins FROM {schema}.{tabela} t"
+)
+
+# Sonda do rollup por período: assinaturas dos dias consolidados (migrations/001)
+SQL_SONDA_ROLLUP = f"""
+    SELECT count(*) AS dias, coalesce(sum(assinatura), 0) AS assinatura, max(atualizado_em) AS atualizado_em
+    FROM {SCHEMA_NAME}.servicos_diario_controle
+    WHERE data_servico BETWEEN :data_inicio AND :data_fim
+    """
+
+
+@st.cache_resource
+def _estado_cache():
+    """Gerações por query e execuções em andamento (compartilhados entre sessões)"""
+    return {"geracoes": {}, "em_voo": {}, "lock": threading.Lock()}
+
+
+def _query_base(query_id):
+    """Variantes "id:sufixo" (páginas, opções) compartilham as tags de "id" """
+    return query_id.split(":")[0]
+
+
+def _consultar_sonda(query, **params):
+    engine = get_engine()
+    if engine is None:
+        return None
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text(query), params).fetchall()
+    except Exception as e:
+        print(f"Erro na sonda de alterações: {e}")
+        return None
+
+
+@st.cache_resource(ttl=CACHE_SONDA_TTL)
+def versoes_dias(tabela):
+    """
+    (versão geral, dias, versões) de uma tabela grande, com os dias em ordem,
+    ou None se a sonda falhar. Compartilhado entre sessões: não alterar.
+    """
+    linhas = _consultar_sonda(SQL_SONDA_DIAS, tabela=tabela.strip('"'))
+    if linhas is None:
+        return None
+    geral = linhas[0][1] if linhas and linhas[0][0] is None else None
+    linhas = linhas[1:] if geral is not None else linhas
+    return geral, [dia for dia, _ in linhas], [versao for _, versao in linhas]
+
+
+def sondar_periodo(tabela, data_inicio=None, data_fim=None):
+    """Resumo das versões dos dias do período (sem limites, da tabela inteira)"""
+    versoes = versoes_dias(tabela)
+    if versoes is None:
+        return None
+    geral, dias, valores = versoes
+    inicio = bisect_left(dias, data_inicio) if data_inicio else 0
+    fim = bisect_right(dias, data_fim) if data_fim else len(dias)
+    # Os números vêm de uma sequência, então a lista identifica o estado dos dias
+    resumo = hashlib.sha1(repr(valores[inicio:fim]).encode()).hexdigest()[:16]
+    return str(geral), str(fim - inicio), resumo
+
+
+@st.cache_data(ttl=CACHE_SONDA_TTL)
+def sondar_tabela(tabela):
+    """(linhas, soma dos xmin) de uma tabela pequena inteira"""
+    linhas = _consultar_sonda(SQL_SONDA_TABELA.format(schema=SCHEMA_NAME, tabela=tabela))
+    return tuple(str(valor) for valor in linhas[0]) if linhas else None
+
+
+@st.cache_data(ttl=CACHE_SONDA_TTL)
+def sondar_rollup(data_inicio=None, data_fim=None):
+    """Assinatura do rollup diário no período"""
+    linhas = _consultar_sonda(SQL_SONDA_ROLLUP, data_inicio=data_inicio, data_fim=data_fim)
+    return tuple(str(valor) for valor in linhas[0]) if linhas else None
+
+
+def geracao(query_id):
+    return _estado_cache()["geracoes"].get(_query_base(query_id), 0)
+
+
+def versao_dados(query_id, data_inicio=None, data_fim=None):
+    """
+    Versão dos dados de `query_id` no período: muda quando alguma tabela de
+    origem muda dentro do período (tabelas grandes e rollup) ou em qualquer
+    linha (tabelas pequenas), ou quando a aba é atualizada.
+    """
+    base = _query_base(query_id)
+    sondas = []
+    for tabela in FONTES_QUERY.get(base, ()):
+        if tabela == ROLLUP_TABLE:
+            sondas.append(sondar_rollup(data_inicio, data_fim))
+        elif tabela in TABELAS_VERSAO_DIA:
+            sondas.append(sondar_periodo(tabela, data_inicio, data_fim))
+        else:
+            sondas.append(sondar_tabela(tabela))
+    return geracao(base), tuple(sondas)
+
+
+def invalidar_aba(aba):
+    """Invalida apenas as entradas das queries da aba (demais abas e sessões mantêm o cache)"""
+    estado = _estado_cache()
+    with estado["lock"]:
+        for query_id in QUERIES_ABA.get(aba, ()):
+            estado["geracoes"][query_id] = estado["geracoes"].get(query_id, 0) + 1
+    # O snapshot local (quando configurado) é atualizado na próxima leitura
+    snapshot.snapshot_versao.clear()
+    versoes_dias.clear()
+    sondar_tabela.clear()
+    sondar_rollup.clear()
+
+
+def executar_unico(chave, funcao):
+    """
+    Single-flight: a primeira chamada com `chave` executa `funcao`; chamadas
+    simultâneas com a mesma chave aguardam e recebem o mesmo resultado.
+    """
+    estado = _estado_cache()
+    with estado["lock"]:
+        evento = estado["em_voo"].get(chave)
+        lider = evento is None
+        if lider:
+            evento = estado["em_voo"][chave] = {"pronto": threading.Event()}
+    if not lider:
+        evento["pronto"].wait()
+        if "erro" in evento:
+            raise evento["erro"]
+        return evento["resultado"]
+    try:
+        evento["resultado"] = funcao()
+        return evento["resultado"]
+    except Exception as e:
+        evento["erro"] = e
+        raise
+    finally:
+        with estado["lock"]:
+            estado["em_voo"].pop(chave, None)
+        evento["pronto"].set()
+
+
+def _ler_banco(engine, query_id, query, params):
+    with engine.connect() as conn:
+        df = ler_query(conn, query_id, query, _bind_params(params))
+    # COPY informa os bytes recebidos; no read_sql, o tamanho do DataFrame bruto é a aproximação
+    instrumentacao.anotar(bytes=df.attrs.get("bytes_lidos") or int(df.memory_usage(deep=True).sum()))
+    return tipar_resultado(query_id, df)
+
+
+# --- Cache L2 compartilhado entre réplicas (cache_l2.py) ---
+# L2_CACHE: "" (desativado), "disco" (L2_CACHE_DIR, idealmente um volume comum às
+# réplicas) ou "redis" (L2_REDIS_URL; "local://" usa um stand-in em memória).
+L2_CACHE = os.getenv("L2_CACHE", "")
+L2_CACHE_DIR = os.getenv("L2_CACHE_DIR", os.path.join(tempfile.gettempdir(), "light_comercial_l2"))
+L2_CACHE_MAX_MB = int(os.getenv("L2_CACHE_MAX_MB", "2048"))
+L2_REDIS_URL = os.getenv("L2_REDIS_URL", "redis://localhost:6379/0")
+
+
+@st.cache_resource
+def _cache_l2():
+    try:
+        return cache_l2.criar_backend(L2_CACHE, diretorio=L2_CACHE_DIR, max_mb=L2_CACHE_MAX_MB, url=L2_REDIS_URL)
+    except Exception as e:
+        print(f"❌ Cache L2 desativado: {e}")
+        return None
+
+
+def _ler_com_l2(engine, query_id, query, params, versao):
+    """Procura o resultado no L2 antes do banco; resultados lidos do banco são gravados no L2"""
+    l2 = _cache_l2()
+    if l2 is None:
+        return _ler_banco(engine, query_id, query, params)
+
+    chave = cache_l2.chave_cache(query_id, params, versao)
+    try:
+        df = l2.ler(chave)
+        if df is not None:
+            print(f"L2 HIT: '{query_id}' ({chave})")
+            instrumentacao.anotar(l2_hits=1)
+            return df
+    except Exception as e:
+        print(f"Erro ao ler cache L2: {e}")
+
+    df = _ler_banco(engine, query_id, query, params)
+    try:
+        l2.gravar(chave, df, ttl=CACHE_TTL)
+    except Exception as e:
+        print(f"Erro ao gravar cache L2: {e}")
+    return df
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _fetch_cacheado(query_id, params, versao, _query):
+    """Leitura cacheada; erros são propagados (e, portanto, não entram no cache)"""
+    print(f"CACHE MISS: Executando query '{query_id}' com {dict(params)} (versão {versao})")
+    instrumentacao.anotar(misses=1)
+
+    engine = get_engine()
+    if engine is None:
+        return pd.DataFrame()
+
+    return executar_unico(
+        (query_id, params, versao),
+        partial(_ler_com_l2, engine, query_id, _query, params, versao)
+    )
+
+
+def fetch_data(query_id, params=(), versao=None, _query=None, levantar_erros=False):
+    """
+    Busca dados do banco usando SQLAlchemy.
+    O cache é chaveado por (query_id, params, versao); o texto SQL (_query) não entra na chave.
+    Em caso de erro mostra st.error e devolve um DataFrame vazio (sem cachear),
+    ou propaga a exceção com `levantar_erros=True`.
+    """
+    try:
+        return _fetch_cacheado(query_id, params, versao, _query)
+    except Exception as e:
+        if levantar_erros:
+            raise
+        print(f"Erro ao buscar dados: {e}")
+        st.error(f"Erro ao executar a query: {e}")
+        return pd.DataFrame()
+
+
+def run_query(query_id, query, levantar_erros=False, **params):
+    """Executa uma query registrada com parâmetros bind"""
+    versao = versao_dados(query_id, params.get("data_inicio"), params.get("data_fim"))
+    instrumentacao.anotar(consultas=1)
+    return fetch_data(query_id, build_params(**params), versao, _query=query, levantar_erros=levantar_erros)
@@ -0,0 +1,97 @@
+"""
+Leitura de resultados via COPY ... TO STDOUT direto para Arrow.
+
+Alternativa ao pd.read_sql para resultados grandes: o Postgres serializa o
+resultado em CSV, o psycopg apenas repassa os bytes e o parser CSV do pyarrow
+(C++, multithread) monta a tabela, sem criar uma tupla Python por linha.
+
+Os tipos das colunas vêm da descrição da query no servidor (LIMIT 0), não da
+inferência do CSV: textos numéricos como números de nota mantêm os zeros à
+esquerda e colunas vazias mantêm o tipo. O resultado é o mesmo do pd.read_sql:
+numeric vira float64 (o read_sql converte os Decimal com coerce_float=True),
+textos como "N/A" não viram nulos e quebras de linha dentro de textos (que o
+COPY envia entre aspas) são preservadas.
+"""
+import io
+
+import pandas as pd
+import psycopg
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from sqlalchemy import text
+
+# OIDs de tipos do Postgres -> tipos Arrow; os demais são lidos como texto
+TIPOS_ARROW = {
+    16: pa.bool_(),
+    20: pa.int64(),
+    21: pa.int16(),
+    23: pa.int32(),
+    26: pa.int64(),
+    700: pa.float32(),
+    701: pa.float64(),
+    1700: pa.float64(),  # Como o pd.read_sql (coerce_float), não Decimal
+    1082: pa.date32(),
+}
+# timestamp / timestamptz: lidos como texto e convertidos pelo pandas (offsets "-03")
+TIPOS_TIMESTAMP = {1114: False, 1184: True}
+
+
+def _sql_com_parametros(cursor, conn, query, params):
+    """
+    Interpola os parâmetros (:nome) no cliente (psycopg.ClientCursor): COPY não aceita bind.
+    Listas viram arrays como no caminho do pd.read_sql.
+    """
+    compilado = text(query).compile(dialect=conn.dialect)
+    return cursor.mogrify(compilado.string, compilado.construct_params(params))
+
+
+def ler_copy_tabela(conn, query, params=None):
+    """
+    Executa `query` (SQL com parâmetros :nome) via COPY CSV e retorna uma pyarrow.Table,
+    as colunas timestamp a converter ({nome: tem_fuso}) e os bytes recebidos do servidor.
+    """
+    cursor = psycopg.ClientCursor(conn.connection.driver_connection)
+    try:
+        sql = _sql_com_parametros(cursor, conn, query, params or {})
+
+        cursor.execute(f"SELECT * FROM ({sql}) q LIMIT 0")
+        colunas = [(coluna.name, coluna.type_code) for coluna in cursor.description]
+        tipos = {nome: TIPOS_ARROW.get(oid, pa.string()) for nome, oid in colunas}
+        timestamps = {nome: TIPOS_TIMESTAMP[oid] for nome, oid in colunas if oid in TIPOS_TIMESTAMP}
+
+        buffer = io.BytesIO()
+        with cursor.copy(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)") as copy:
+            for bloco in copy:
+                buffer.write(bloco)
+    finally:
+        cursor.close()
+
+    tamanho = buffer.tell()
+    buffer.seek(0)
+    tabela = pacsv.read_csv(
+        buffer,
+        read_options=pacsv.ReadOptions(column_names=[nome for nome, _ in colunas], skip_rows=1),
+        # Textos livres (perguntas da APR, descrições) podem ter quebras de linha entre aspas
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types=tipos,
+            true_values=["t"],
+            false_values=["f"],
+            # No CSV do COPY, NULL é campo vazio sem aspas e '' é "" (aspas).
+            # Só o vazio é nulo: o padrão do pyarrow também anula "N/A", "NULL", "NaN"...
+            null_values=[""],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    return tabela, timestamps, tamanho
+
+
+def ler_copy_arrow(conn, query, params=None):
+    """Mesmo contrato de pd.read_sql(text(query), conn, params=params), via COPY -> Arrow"""
+    tabela, timestamps, tamanho = ler_copy_tabela(conn, query, params)
+    df = tabela.to_pandas()
+    df.attrs["bytes_lidos"] = tamanho
+    for nome, tem_fuso in timestamps.items():
+        df[nome] = pd.to_datetime(df[nome], utc=tem_fuso)
+    return df
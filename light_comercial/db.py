@@ -0,0 +1,109 @@
+"""
+Engine SQLAlchemy do dashboard: uma por processo, com pool configurável,
+statement_timeout/application_name por conexão e telemetria do pool.
+
+O driver é o psycopg 3: os parâmetros bind vão ao servidor separados do SQL
+(protocolo estendido) e, a partir da DB_PREPARE_THRESHOLD-ésima execução do
+mesmo texto numa conexão, a query vira um prepared statement e o plano é reaproveitado.
+"""
+import atexit
+import os
+import threading
+import time
+
+import streamlit as st
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from .config import DATABASE_URL, DB_NAME
+
+# Pool de conexões: uma única engine por processo, descartada no encerramento
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))          # segundos aguardando conexão livre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))        # segundos até reabrir uma conexão
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "120000"))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "light_comercial_dashboard")
+# Vazio desliga os prepared statements (ex: PgBouncer em modo transaction anterior ao 1.21)
+DB_PREPARE_THRESHOLD = int(os.getenv("DB_PREPARE_THRESHOLD", "5") or 0) or None
+
+
+@st.cache_resource
+def _metricas_pool():
+    """Contadores de checkout do pool (compartilhados entre sessões e reruns)"""
+    return {"checkouts": 0, "espera_total": 0.0, "espera_max": 0.0, "lock": threading.Lock()}
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que mede o tempo de espera de cada checkout"""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera = time.perf_counter() - inicio
+            metricas = _metricas_pool()
+            with metricas["lock"]:
+                metricas["checkouts"] += 1
+                metricas["espera_total"] += espera
+                metricas["espera_max"] = max(metricas["espera_max"], espera)
+
+
+def metricas_pool():
+    """Estado do pool (em uso, overflow, ociosas) e tempos de espera no checkout"""
+    engine = get_engine()
+    if engine is None:
+        return {}
+    pool = engine.pool
+    metricas = _metricas_pool()
+    with metricas["lock"]:
+        checkouts = metricas["checkouts"]
+        espera_total = metricas["espera_total"]
+        espera_max = metricas["espera_max"]
+    return {
+        "tamanho": pool.size(),
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        "espera_media_ms": espera_total / checkouts * 1000 if checkouts else 0.0,
+        "espera_max_ms": espera_max * 1000,
+    }
+
+
+@st.cache_resource
+def get_engine():
+    """
+    Cria a engine SQLAlchemy (uma por processo, sem expiração).
+    Cada conexão abre com statement_timeout e application_name; o pool é
+    descartado no encerramento do processo.
+    """
+    print(f"CACHE MISS: Criando nova engine para o banco {DB_NAME}...")
+    try:
+        engine = create_engine(
+            DATABASE_URL, 
+            poolclass=PoolMedido,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args={
+                "application_name": DB_APPLICATION_NAME,
+                "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+                "prepare_threshold": DB_PREPARE_THRESHOLD,
+            },
+            echo=False  # Desativa logs para melhor performance
+        )
+        atexit.register(engine.dispose)
+        print(
+            f"✅ Engine SQLAlchemy criada com sucesso! (pool {DB_POOL_SIZE}+{DB_MAX_OVERFLOW}, "
+            f"statement_timeout {DB_STATEMENT_TIMEOUT_MS} ms)"
+        )
+        return engine
+    except Exception as e:
+        print(f"❌ Erro ao criar engine: {e}")
+        st.error(f"Erro ao conectar ao banco de dados: {e}")
+        return None
@@ -0,0 +1,305 @@
+"""
+Exportação em streaming (CSV / Excel / Parquet).
+
+Os arquivos são escritos em blocos de linhas, vindos de um DataFrame já em memória
+ou direto do cursor do banco, num workbook write-only do openpyxl (memória
+constante), num CSV incremental ou em row groups Parquet. Cada exportação registra linhas/s
+e o RSS do processo amostrado a cada bloco (memória do processo inteiro, inclusive
+das outras sessões e exportações simultâneas, não só deste arquivo).
+"""
+import hashlib
+import io
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from sqlalchemy import text
+
+from .consultas import _bind_params, build_params, compactar_dataframe, versao_dados
+from .db import get_engine
+from .particoes import iter_particoes
+from .sql import TIPOS_QUERY
+
+EXPORT_CHUNK_ROWS = 5000
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def iter_dataframe_chunks(df, chunksize=EXPORT_CHUNK_ROWS):
+    """Percorre um DataFrame em blocos de linhas (views, sem cópia)"""
+    for inicio in range(0, len(df), chunksize):
+        yield df.iloc[inicio:inicio + chunksize]
+
+
+def iter_query_chunks(query, params=(), chunksize=EXPORT_CHUNK_ROWS, query_id=None):
+    """
+    Lê o resultado de uma query em blocos usando cursor no servidor
+    (stream_results), sem materializar o resultado inteiro.
+    `params` segue o formato de build_params(). Com `query_id`, cada bloco recebe
+    os tipos da query (TIPOS_QUERY), como as partições de iter_particoes_chunks.
+    """
+    engine = get_engine()
+    if engine is None:
+        return
+    tipos = TIPOS_QUERY.get(query_id.split(":")[0]) if query_id else None
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunksize) as conn:
+        for chunk in pd.read_sql(text(query), conn, params=_bind_params(params), chunksize=chunksize):
+            yield compactar_dataframe(chunk, tipos)[0] if tipos else chunk
+
+
+def iter_particoes_chunks(funcao, data_inicio, data_fim, chunksize=EXPORT_CHUNK_ROWS, **filtros):
+    """
+    Lê um período longo partição a partição (particoes.py), em paralelo e na
+    ordem das datas, repassando cada partição em blocos de linhas.
+    """
+    for _, df in iter_particoes(funcao, data_inicio, data_fim, **filtros):
+        yield from iter_dataframe_chunks(df, chunksize)
+
+
+def _valor_excel(valor):
+    """Converte um valor do pandas para um tipo aceito pelo openpyxl"""
+    if valor is None or valor is pd.NaT or valor is pd.NA:
+        return None
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    return valor
+
+
+def _escrever_csv(chunks, destino, progresso):
+    linhas = 0
+    saida = io.TextIOWrapper(destino, encoding="utf-8", newline="")
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(saida, index=False, header=(i == 0))
+        linhas += len(chunk)
+        progresso(linhas)
+    saida.flush()
+    saida.detach()
+    return linhas
+
+
+def _escrever_xlsx(chunks, destino, sheet_name, progresso):
+    from openpyxl import Workbook  # só carregado quando alguém exporta Excel
+
+    linhas = 0
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet(sheet_name)
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            planilha.append(list(chunk.columns))
+        for registro in chunk.itertuples(index=False, name=None):
+            planilha.append([_valor_excel(v) for v in registro])
+        linhas += len(chunk)
+        progresso(linhas)
+    workbook.save(destino)
+    return linhas
+
+
+def _schema_parquet(tabela):
+    """
+    Schema do arquivo a partir do primeiro bloco: categorias viram o tipo dos
+    valores (o dicionário muda entre blocos) e colunas só com nulos viram texto.
+    """
+    campos = []
+    for campo in tabela.schema:
+        tipo = campo.type
+        if pa.types.is_dictionary(tipo):
+            tipo = tipo.value_type
+        elif pa.types.is_null(tipo):
+            tipo = pa.string()
+        campos.append(pa.field(campo.name, tipo))
+    return pa.schema(campos)
+
+
+def _escrever_parquet(chunks, destino, progresso):
+    import pyarrow.parquet as pq
+
+    linhas = 0
+    escritor = None
+    try:
+        for chunk in chunks:
+            tabela = pa.Table.from_pandas(chunk, preserve_index=False)
+            if escritor is None:
+                schema = _schema_parquet(tabela)
+                escritor = pq.ParquetWriter(destino, schema, compression="zstd")
+            escritor.write_table(tabela.cast(schema))
+            linhas += len(chunk)
+            progresso(linhas)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return linhas
+
+
+def _rss_atual():
+    """RSS atual do processo em bytes (/proc/self/statm, Linux), ou None onde não existir"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def exportar_arquivo(chunks, formato, destino, sheet_name="Dados", progresso=None):
+    """
+    Escreve os blocos de `chunks` em `destino` (arquivo binário aberto) no
+    formato "csv", "xlsx" ou "parquet". `progresso` recebe o total de linhas já escritas
+    após cada bloco. Retorna as estatísticas da exportação.
+    """
+    progresso = progresso or (lambda linhas: None)
+    rss_inicio = rss_pico = _rss_atual()
+
+    def amostrar_rss():
+        nonlocal rss_pico
+        rss = _rss_atual()
+        if rss is not None:
+            rss_pico = max(rss_pico, rss)
+
+    def progresso_amostrado(linhas):
+        amostrar_rss()
+        progresso(linhas)
+
+    inicio = time.perf_counter()
+    if formato == "csv":
+        linhas = _escrever_csv(chunks, destino, progresso_amostrado)
+    elif formato == "parquet":
+        linhas = _escrever_parquet(chunks, destino, progresso_amostrado)
+    else:
+        linhas = _escrever_xlsx(chunks, destino, sheet_name, progresso_amostrado)
+    amostrar_rss()  # Inclui o fechamento do arquivo (o xlsx é compactado no final)
+
+    segundos = time.perf_counter() - inicio
+    stats = {
+        "formato": formato,
+        "linhas": linhas,
+        "segundos": segundos,
+        "linhas_por_segundo": linhas / segundos if segundos > 0 else float(linhas),
+        "rss_pico_mb": rss_pico / 1024 ** 2 if rss_pico is not None else None,
+        "rss_acrescimo_mb": (rss_pico - rss_inicio) / 1024 ** 2 if rss_pico is not None else None,
+    }
+    print(
+        f"Exportação {formato}: {linhas} linhas em {segundos:.2f}s "
+        f"({stats['linhas_por_segundo']:.0f} linhas/s, RSS do processo até {stats['rss_pico_mb'] or 0:.1f} MB)"
+    )
+    return stats
+
+
+def descrever_exportacao(stats):
+    """Resumo curto das estatísticas para exibir abaixo do botão de download"""
+    texto = f"{stats['linhas']} linhas · {stats['linhas_por_segundo']:.0f} linhas/s"
+    if stats.get("rss_pico_mb") is not None:
+        texto += f" · RSS do processo até {stats['rss_pico_mb']:.0f} MB (+{stats['rss_acrescimo_mb']:.0f} MB)"
+    return texto
+
+
+# --- Exportações sob demanda (jobs em segundo plano com cache) ---
+# Os arquivos só são gerados quando o usuário pede. A geração roda num pool de
+# threads e o resultado fica em disco, indexado por (aba, hash dos filtros e da
+# versão dos dados), e é compartilhado entre sessões até expirar.
+
+EXPORT_DIR = os.getenv("EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "light_comercial_exports")
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_CACHE_MAX = int(os.getenv("EXPORT_CACHE_MAX", "50"))
+EXPORT_TTL = int(os.getenv("EXPORT_TTL", "300"))  # Mesmo prazo do cache de queries
+
+
+@st.cache_resource
+def _exportacoes():
+    """Executor e registro de jobs de exportação, únicos por processo"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    return {
+        "executor": ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="exportacao"),
+        "jobs": OrderedDict(),
+        "lock": threading.Lock(),
+    }
+
+
+def chave_exportacao(aba, formato, versao=None, **filtros):
+    """
+    Chave do cache de exportações: aba + hash dos filtros e da versão dos dados.
+    Sem `versao`, usa versao_dados da query `aba` no período dos filtros, para que
+    um arquivo gerado antes de uma escrita (ou do "Atualizar") não seja reaproveitado.
+    """
+    if versao is None:
+        versao = versao_dados(aba, filtros.get("data_inicio"), filtros.get("data_fim"))
+    assinatura = repr((formato, build_params(**filtros), versao))
+    return f"{aba}-{hashlib.sha256(assinatura.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _descartar_job(job):
+    for caminho in (job["caminho"], job["caminho"] + ".tmp"):
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+def _buscar_job(chave):
+    """Retorna o job da chave se ainda válido (não expirado e sem falha)"""
+    registro = _exportacoes()
+    with registro["lock"]:
+        job = registro["jobs"].get(chave)
+        if job is None:
+            return None
+        expirado = time.time() - job["criado_em"] > EXPORT_TTL
+        falhou = job["future"].done() and job["future"].exception() is not None
+        if expirado or falhou:
+            registro["jobs"].pop(chave)
+            # Ainda em execução: o arquivo é removido quando o job terminar
+            job["future"].add_done_callback(lambda _: _descartar_job(job))
+            return None
+        registro["jobs"].move_to_end(chave)
+        return job
+
+
+def _executar_job(job, gerar_chunks, formato, sheet_name):
+    def ao_progredir(linhas):
+        job["progresso"] = min(linhas / job["total"], 1.0) if job["total"] else 1.0
+
+    temporario = job["caminho"] + ".tmp"
+    with open(temporario, "w+b") as destino:
+        stats = exportar_arquivo(gerar_chunks(), formato, destino, sheet_name, progresso=ao_progredir)
+    os.replace(temporario, job["caminho"])
+    stats["bytes"] = os.path.getsize(job["caminho"])
+    return stats
+
+
+def iniciar_exportacao(chave, gerar_chunks, total, formato, sheet_name="Dados"):
+    """
+    Agenda a geração do arquivo (se ainda não houver job para a chave).
+    `gerar_chunks` é chamado na thread de exportação e devolve os blocos de linhas.
+    """
+    registro = _exportacoes()
+    with registro["lock"]:
+        job = registro["jobs"].get(chave)
+        if job is not None:
+            return job
+
+        # Libera os arquivos mais antigos já concluídos
+        while len(registro["jobs"]) >= EXPORT_CACHE_MAX:
+            antiga = next((c for c, j in registro["jobs"].items() if j["future"].done()), None)
+            if antiga is None:
+                break
+            _descartar_job(registro["jobs"].pop(antiga))
+
+        job = {
+            # Nome único por job: um job expirado ainda em execução não colide com o que o substitui
+            "caminho": os.path.join(EXPORT_DIR, f"{chave}-{uuid.uuid4().hex[:8]}.{formato}"),
+            "criado_em": time.time(),
+            "total": total,
+            "progresso": 0.0,
+        }
+        job["future"] = registro["executor"].submit(_executar_job, job, gerar_chunks, formato, sheet_name)
+        registro["jobs"][chave] = job
+        return job
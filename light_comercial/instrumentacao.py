@@ -0,0 +1,300 @@
+"""
+Instrumentação de queries e renderização do dashboard.
+
+Registra, por chamada de fetch_* e por renderização de aba: tempo, linhas,
+bytes lidos do banco, memória do DataFrame, hits/misses de cache e os filtros
+usados. Os eventos ficam em memória (últimos MAX_EVENTOS) com agregados por
+(tipo, nome), e podem sair como:
+    - linhas JSON (LOG_JSON=1 no stdout, ou LOG_JSON_ARQUIVO=caminho);
+    - texto Prometheus (prometheus_texto(), ou servidor HTTP em /metrics).
+
+Este módulo não depende do Streamlit: o estado vive no módulo importado e
+sobrevive aos reruns do script.
+"""
+import contextlib
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_EVENTOS = int(os.getenv("INSTRUMENTACAO_MAX_EVENTOS", "2000"))
+LOG_JSON = os.getenv("LOG_JSON", "") not in ("", "0")
+LOG_JSON_ARQUIVO = os.getenv("LOG_JSON_ARQUIVO")
+
+_eventos = deque(maxlen=MAX_EVENTOS)
+_agregados = defaultdict(lambda: defaultdict(float))
+_coletores = {}
+_lock = threading.Lock()
+_local = threading.local()
+_servidor = None
+
+
+# --- Registro ---
+
+def _pilha():
+    if not hasattr(_local, "pilha"):
+        _local.pilha = []
+    return _local.pilha
+
+
+def anotar(**valores):
+    """Soma contadores (ex: consultas=1, misses=1, bytes=...) em todas as medições ativas da thread"""
+    for medicao in _pilha():
+        for nome, valor in valores.items():
+            medicao[nome] = medicao.get(nome, 0) + (valor or 0)
+
+
+def _escrever_json(evento):
+    linha = json.dumps(evento, ensure_ascii=False, default=str)
+    if LOG_JSON_ARQUIVO:
+        with _lock, open(LOG_JSON_ARQUIVO, "a", encoding="utf-8") as arquivo:
+            arquivo.write(linha + "\n")
+    elif LOG_JSON:
+        print(linha, flush=True)
+
+
+def registrar(tipo, nome, segundos, **campos):
+    """Guarda um evento e atualiza os agregados de (tipo, nome)"""
+    evento = {"ts": time.time(), "tipo": tipo, "nome": nome, "segundos": round(segundos, 6), **campos}
+    with _lock:
+        _eventos.append(evento)
+        agregado = _agregados[(tipo, nome)]
+        agregado["chamadas"] += 1
+        agregado["segundos"] += segundos
+        agregado["segundos_max"] = max(agregado["segundos_max"], segundos)
+        for campo in ("linhas", "bytes", "memoria_bytes", "consultas", "misses", "l2_hits"):
+            agregado[campo] += campos.get(campo) or 0
+        if campos.get("erro"):
+            agregado["erros"] += 1
+    if LOG_JSON or LOG_JSON_ARQUIVO:
+        _escrever_json(evento)
+    return evento
+
+
+def _resumir_resultado(resultado):
+    """Linhas e memória de um resultado de fetch (DataFrame, lista ou tupla (df, ...))"""
+    if isinstance(resultado, tuple) and resultado:
+        resultado = resultado[0]
+    if hasattr(resultado, "memory_usage"):
+        return len(resultado), int(resultado.memory_usage(deep=True).sum())
+    if isinstance(resultado, (list, dict)):
+        return len(resultado), None
+    return None, None
+
+
+def _filtros(args, kwargs):
+    partes = [repr(valor) for valor in args] + [
+        f"{nome}={valor!r}" for nome, valor in sorted(kwargs.items()) if not callable(valor)
+    ]
+    return ", ".join(partes)
+
+
+def _argumentos(assinatura, args, kwargs):
+    """
+    Argumentos da chamada por nome (**kwargs achatados); o aquecimento do cache aprende daqui.
+    Callbacks (ex: ao_progredir) ficam de fora: não mudam o resultado.
+    """
+    try:
+        ligados = assinatura.bind(*args, **kwargs).arguments
+    except TypeError:
+        return None
+    argumentos = {}
+    for nome, valor in ligados.items():
+        if assinatura.parameters[nome].kind is inspect.Parameter.VAR_KEYWORD:
+            argumentos.update(valor)
+        else:
+            argumentos[nome] = valor
+    return {nome: valor for nome, valor in argumentos.items() if not callable(valor)}
+
+
+def origem():
+    """Origem das chamadas da thread atual ("usuario", salvo dentro de com_origem)"""
+    return getattr(_local, "origem", "usuario")
+
+
+@contextlib.contextmanager
+def com_origem(nome):
+    """Marca os eventos da thread com outra origem (ex: "aquecimento"), fora das estatísticas de uso"""
+    anterior = origem()
+    _local.origem = nome
+    try:
+        yield
+    finally:
+        _local.origem = anterior
+
+
+class medir:
+    """
+    Context manager que mede um trecho e registra o evento ao sair.
+    Contadores anotados dentro do trecho (anotar) entram no evento.
+    Fora de um `with`, use iniciar()/finalizar(); `raiz=True` descarta medições
+    da thread que ficaram abertas (ex: rerun interrompido por st.rerun()).
+    """
+
+    def __init__(self, tipo, nome, raiz=False, **campos):
+        self.tipo = tipo
+        self.nome = nome
+        self.raiz = raiz
+        self.campos = campos
+        self.contadores = {}
+
+    def __enter__(self):
+        if self.raiz:
+            _pilha().clear()
+        self.inicio = time.perf_counter()
+        _pilha().append(self.contadores)
+        return self
+
+    def __exit__(self, tipo_erro, erro, _tb):
+        pilha = _pilha()
+        if any(item is self.contadores for item in pilha):
+            pilha[:] = [item for item in pilha if item is not self.contadores]
+        campos = {**self.campos, **self.contadores}
+        if erro is not None:
+            campos["erro"] = repr(erro)
+        registrar(self.tipo, self.nome, time.perf_counter() - self.inicio, **campos)
+        return False
+
+    def iniciar(self):
+        return self.__enter__()
+
+    def finalizar(self):
+        self.__exit__(None, None, None)
+
+
+def medir_fetch(funcao):
+    """Decorator dos fetch_*: tempo, linhas, memória, consultas/misses de cache, filtros e argumentos"""
+    assinatura = inspect.signature(funcao)
+
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        campos = {
+            "filtros": _filtros(args, kwargs),
+            "argumentos": _argumentos(assinatura, args, kwargs),
+            "origem": origem(),
+        }
+        with medir("fetch", funcao.__name__, **campos) as medicao:
+            resultado = funcao(*args, **kwargs)
+            linhas, memoria = _resumir_resultado(resultado)
+            medicao.campos.update(linhas=linhas, memoria_bytes=memoria)
+        return resultado
+    return wrapper
+
+
+# --- Consulta ---
+
+def eventos(tipo=None):
+    with _lock:
+        return [evento for evento in _eventos if tipo is None or evento["tipo"] == tipo]
+
+
+def agregados():
+    """Lista de dicionários com os agregados de cada (tipo, nome)"""
+    with _lock:
+        itens = [(chave, dict(valores)) for chave, valores in _agregados.items()]
+    resumo = []
+    for (tipo, nome), valores in sorted(itens):
+        chamadas = valores.get("chamadas", 0)
+        consultas = valores.get("consultas", 0)
+        misses = valores.get("misses", 0)
+        resumo.append({
+            "tipo": tipo,
+            "nome": nome,
+            "chamadas": int(chamadas),
+            "segundos_medio": valores.get("segundos", 0) / chamadas if chamadas else 0.0,
+            "segundos_max": valores.get("segundos_max", 0.0),
+            "linhas_total": int(valores.get("linhas", 0)),
+            "bytes_total": int(valores.get("bytes", 0)),
+            "memoria_media_bytes": valores.get("memoria_bytes", 0) / chamadas if chamadas else 0.0,
+            "consultas": int(consultas),
+            "cache_hits": int(consultas - misses),
+            "cache_misses": int(misses),
+            "l2_hits": int(valores.get("l2_hits", 0)),
+            "erros": int(valores.get("erros", 0)),
+        })
+    return resumo
+
+
+def exportar_json():
+    """Eventos em memória como JSON lines"""
+    return "\n".join(json.dumps(evento, ensure_ascii=False, default=str) for evento in eventos())
+
+
+def registrar_coletor(nome, funcao):
+    """Coletor de gauges extras para o Prometheus (ex: pool de conexões); funcao() -> {métrica: valor}"""
+    _coletores[nome] = funcao
+
+
+def _rotulos(**rotulos):
+    texto = ",".join(f'{nome}="{str(valor)}"'.replace("\n", " ") for nome, valor in rotulos.items())
+    return "{" + texto + "}"
+
+
+def prometheus_texto():
+    """Agregados no formato de exposição texto do Prometheus"""
+    linhas = []
+    metricas = [
+        ("chamadas", "counter", "light_comercial_chamadas_total", "Chamadas medidas"),
+        ("segundos_total", "counter", "light_comercial_segundos_total", "Tempo acumulado (s)"),
+        ("segundos_max", "gauge", "light_comercial_segundos_max", "Maior tempo observado (s)"),
+        ("linhas_total", "counter", "light_comercial_linhas_total", "Linhas retornadas"),
+        ("bytes_total", "counter", "light_comercial_bytes_lidos_total", "Bytes lidos do banco"),
+        ("cache_hits", "counter", "light_comercial_cache_hits_total", "Consultas servidas pelo cache"),
+        ("cache_misses", "counter", "light_comercial_cache_misses_total", "Consultas que não estavam no cache L1"),
+        ("l2_hits", "counter", "light_comercial_cache_l2_hits_total", "Misses do L1 servidos pelo cache L2"),
+        ("erros", "counter", "light_comercial_erros_total", "Chamadas com erro"),
+    ]
+    resumo = agregados()
+    for item in resumo:
+        item["segundos_total"] = item["segundos_medio"] * item["chamadas"]
+    for campo, tipo_metrica, nome, ajuda in metricas:
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} {tipo_metrica}")
+        for item in resumo:
+            linhas.append(f"{nome}{_rotulos(tipo=item['tipo'], nome=item['nome'])} {item[campo]}")
+    for coletor, funcao in list(_coletores.items()):
+        try:
+            valores = funcao() or {}
+        except Exception as e:
+            print(f"Erro no coletor '{coletor}': {e}")
+            continue
+        for metrica, valor in valores.items():
+            if isinstance(valor, (int, float)):
+                nome = f"light_comercial_{coletor}_{metrica}"
+                linhas.append(f"# TYPE {nome} gauge")
+                linhas.append(f"{nome} {valor}")
+    return "\n".join(linhas) + "\n"
+
+
+# --- Endpoint Prometheus ---
+
+class _MetricasHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        corpo = prometheus_texto().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor_prometheus(porta, host="127.0.0.1"):
+    """Sobe (uma vez por processo) um servidor HTTP com GET /metrics em host:porta"""
+    global _servidor
+    with _lock:
+        if _servidor is not None:
+            return _servidor
+        _servidor = ThreadingHTTPServer((host, porta), _MetricasHandler)
+    threading.Thread(target=_servidor.serve_forever, daemon=True, name="metricas-prometheus").start()
+    print(f"📈 Métricas Prometheus em http://{host}:{porta}/metrics")
+    return _servidor
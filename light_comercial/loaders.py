@@ -0,0 +1,434 @@
+"""
+Loaders do dashboard (um fetch_* por visão), utilizáveis fora do Streamlit.
+
+Todos recebem filtros simples (datas, listas, textos) e devolvem DataFrames já
+tipados; o cache e a execução ficam em consultas.py.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import streamlit as st
+
+from . import instrumentacao, turno_metrics
+from .config import SCHEMA_NAME, TABLE_NAME
+from .consultas import (
+    CACHE_MAX_ENTRIES, CACHE_TTL, _filtros_periodo, _filtros_periodo_regional,
+    build_params, build_query, run_query, tipar_resultado, versao_dados,
+)
+from .exportacao import iter_particoes_chunks, iter_query_chunks
+from .paginacao import estimar_total, fetch_pagina
+from .particoes import fetch_particionado, periodo_longo
+from .snapshot import _snapshot_inicio_turno, ler_snapshot, snapshot_pronto, snapshot_versao
+from .sql import (
+    OFS_APR_CHAVES, OFS_EQUIPAMENTOS_CHAVES, SQL_BASE_OPERACIONAL, SQL_DIM_BASE_JOIN,
+    SQL_EQUIPES, SQL_INICIO_TURNO, SQL_LOTE, SQL_MAPA, SQL_MAPA_CONTAGEM, SQL_MAPA_GRADE,
+    SQL_OFS_APR, SQL_OFS_APR_PAGINA, SQL_OFS_EQUIPAMENTOS, SQL_OFS_EQUIPAMENTOS_PAGINA, SQL_OFS_EQUIPAMENTOS_RESUMO,
+    SQL_OFS_EQUIPAMENTOS_RESUMO_NOTAS, SQL_STATUS,
+)
+
+
+def parse_multi_filter(text: str):
+    """
+    Converte um texto em lista de termos, aceitando separadores
+    como vírgula, ponto e vírgula e espaços.
+    Ex: "123, 456;789 0001" -> ["123", "456", "789", "0001"]
+    """
+    if not text:
+        return []
+    # Normaliza separadores para espaço
+    for sep in [",", ";"]:
+        text = text.replace(sep, " ")
+    # Quebra em partes, removendo vazios
+    parts = [p.strip() for p in text.split() if p.strip()]
+    return parts
+
+
+# --- Função específica para dados de início de turno ---
+@instrumentacao.medir_fetch
+def fetch_inicio_turno_data(data_inicio=None, data_fim=None, regional=None, levantar_erros=False):
+    """
+    Busca dados de início de turno com filtros
+    (`levantar_erros=True` propaga erros do banco em vez de devolver vazio)
+    """
+    if snapshot_pronto():
+        df = _snapshot_inicio_turno(data_inicio, data_fim, regional)
+        if df.empty:
+            return df
+        df["minutos_inicio"] = turno_metrics.minutos_desde_meia_noite(df["inicio_servico"])
+        df["minutos_fim"] = turno_metrics.minutos_desde_meia_noite(df["fim_servico"])
+        colunas = [
+            "tipo_atividade", "data_servico", "inicio_servico", "fim_servico",
+            "minutos_inicio", "minutos_fim", "duracao",
+            "id_recurso", "recurso", "label_veiculo", "idmatriculalider",
+            "idmatriculaauxiliares", "idmatriculaguarda", "regional", "composicao",
+        ]
+        df = df.sort_values(["data_servico", "inicio_servico"])[colunas].reset_index(drop=True)
+        return tipar_resultado("inicio_turno", df)
+
+    conditions, params = _filtros_periodo_regional(data_inicio, data_fim, regional)
+    query = build_query(SQL_INICIO_TURNO, conditions, order_by="s.data_servico, s.inicio_servico")
+    return run_query("inicio_turno", query, levantar_erros=levantar_erros, **params)
+
+# --- Drill down derivado do dataset de início de turno ---
+# O drill down (Dia/Mês/Ano) sai do mesmo DataFrame de fetch_inicio_turno_data, sem
+# nova query. Cada nível de agrupamento é memorizado separadamente, então trocar
+# "Agrupar por" não consulta o banco nem reagrupa.
+
+DRILLDOWN_EIXOS = {"Dia": "data_servico", "Mês": "mes_str", "Ano": "ano_str"}
+
+
+def versao_inicio_turno(data_inicio=None, data_fim=None):
+    """
+    Versão dos dados de início de turno, para as chaves de cache derivadas:
+    a do snapshot quando os dados vêm dele, senão a sonda do banco.
+    """
+    if snapshot_pronto():
+        return "snapshot", snapshot_versao()
+    return versao_dados("inicio_turno", data_inicio, data_fim)
+
+
+@instrumentacao.medir_fetch
+def agregar_drilldown(nivel, data_inicio=None, data_fim=None, regional=None):
+    """
+    Contagem de composições (completa/incompleta) por Dia, Mês ou Ano,
+    com coluna Total. O eixo x é DRILLDOWN_EIXOS[nivel].
+    """
+    return _agregar_drilldown(
+        nivel, data_inicio=data_inicio, data_fim=data_fim, regional=regional,
+        versao=versao_inicio_turno(data_inicio, data_fim)
+    )
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _agregar_drilldown(nivel, data_inicio=None, data_fim=None, regional=None, versao=None):
+    """Agrupamento memorizado; `versao` (versao_inicio_turno) o refaz quando os dados mudam"""
+    df = fetch_inicio_turno_data(data_inicio=data_inicio, data_fim=data_fim, regional=regional)
+    if df.empty:
+        return df
+
+    x_axis = DRILLDOWN_EIXOS[nivel]
+    datas = pd.to_datetime(df["data_servico"])
+    if nivel == "Dia":
+        chave = datas.dt.date
+    elif nivel == "Mês":
+        chave = datas.dt.month.astype(str) + "/" + datas.dt.year.astype(str)
+    else:  # Ano
+        chave = datas.dt.year.astype(str)
+
+    df_agrupado = df.groupby([chave.rename(x_axis), "composicao"], observed=True).size().unstack(fill_value=0)
+    # composicao pode ser category: colunas viram texto para aceitar x_axis e Total
+    df_agrupado.columns = df_agrupado.columns.astype(str)
+    df_agrupado = df_agrupado.reset_index()
+    df_agrupado.columns.name = None
+    # Somar apenas colunas numéricas (completa, incompleta)
+    colunas_numericas = [col for col in df_agrupado.columns if col != x_axis]
+    df_agrupado["Total"] = df_agrupado[colunas_numericas].sum(axis=1)
+    return df_agrupado
+
+def _condicoes_ofs_equipamentos(data_inicio=None, data_fim=None, notas=None, lotes=None,
+                                seriais=None, bases=None, acoes=None, regional=None):
+    """
+    Condições e parâmetros da visão de equipamentos.
+    Os filtros de lista são aplicados no banco com = ANY(:lista).
+    """
+    conditions, params = _filtros_periodo_regional(data_inicio, data_fim, regional)
+
+    filtros_lista = [
+        ("notas", "one.numero_nota", notas),
+        ("lotes", SQL_LOTE, lotes),
+        ("seriais", "ltrim(one.numero_serie, '0')", seriais),
+        ("bases", SQL_BASE_OPERACIONAL, bases),
+        ("acoes", "one.secao_nome", acoes),
+    ]
+    for nome, expressao, valores in filtros_lista:
+        if valores:
+            conditions.append(f"{expressao} = ANY(:{nome})")
+            params[nome] = sorted(set(valores))
+    return conditions, params
+
+
+def consulta_ofs_equipamentos(**filtros):
+    """Query completa (com ordenação padrão) e parâmetros da visão de equipamentos"""
+    conditions, params = _condicoes_ofs_equipamentos(**filtros)
+    query = build_query(SQL_OFS_EQUIPAMENTOS, conditions, order_by="s.data_servico, one.numero_nota")
+    return query, params
+
+
+def _fetch_ofs_equipamentos_periodo(levantar_erros=False, **filtros):
+    """Uma consulta única da visão de equipamentos (um período ou uma partição)"""
+    query, params = consulta_ofs_equipamentos(**filtros)
+    return run_query("ofs_equipamentos", query, levantar_erros=levantar_erros, **params)
+
+
+@instrumentacao.medir_fetch
+def fetch_ofs_equipamentos(data_inicio=None, data_fim=None, notas=None, lotes=None,
+                           seriais=None, bases=None, acoes=None, regional=None):
+    """Busca dados da visão de equipamentos/notas (ofs_notas_equipamentos + serviços + lote_material)"""
+    return _fetch_ofs_equipamentos_periodo(
+        data_inicio=data_inicio, data_fim=data_fim, notas=notas, lotes=lotes,
+        seriais=seriais, bases=bases, acoes=acoes, regional=regional
+    )
+
+
+def iter_ofs_equipamentos_chunks(**filtros):
+    """
+    Blocos da visão de equipamentos para exportação: períodos longos vêm
+    partição a partição (e do cache, quando já buscadas), os demais por cursor no servidor.
+    """
+    if periodo_longo(filtros.get("data_inicio"), filtros.get("data_fim")):
+        return iter_particoes_chunks(_fetch_ofs_equipamentos_periodo, **filtros)
+    query, params = consulta_ofs_equipamentos(**filtros)
+    return iter_query_chunks(query, build_params(**params), query_id="ofs_equipamentos")
+
+
+@instrumentacao.medir_fetch
+def fetch_ofs_equipamentos_pagina(apos=None, limite=None, **filtros):
+    """Uma página (keyset) da visão de equipamentos"""
+    conditions, params = _condicoes_ofs_equipamentos(**filtros)
+    query = build_query(SQL_OFS_EQUIPAMENTOS_PAGINA, conditions)
+    return fetch_pagina("ofs_equipamentos", query, params, OFS_EQUIPAMENTOS_CHAVES, apos, limite)
+
+
+def _fetch_ofs_equipamentos_notas_periodo(levantar_erros=False, **filtros):
+    """Registros por nota de uma partição (resumo de períodos longos)"""
+    conditions, params = _condicoes_ofs_equipamentos(**filtros)
+    query = build_query(SQL_OFS_EQUIPAMENTOS_RESUMO_NOTAS, conditions, group_by="one.numero_nota")
+    return run_query("ofs_equipamentos_resumo:notas", query, levantar_erros=levantar_erros, **params)
+
+
+@instrumentacao.medir_fetch
+def fetch_ofs_equipamentos_resumo(ao_progredir=None, **filtros):
+    """
+    Total de registros e de notas distintas da visão de equipamentos.
+    Em períodos longos soma as partições (uma nota com serviços em várias
+    partições conta uma vez); `ao_progredir(concluidas, total)` acompanha a busca.
+    """
+    if periodo_longo(filtros.get("data_inicio"), filtros.get("data_fim")):
+        df = fetch_particionado(
+            "ofs_equipamentos_resumo:notas", _fetch_ofs_equipamentos_notas_periodo,
+            filtros.pop("data_inicio"), filtros.pop("data_fim"), ao_progredir, **filtros
+        )
+        if df.empty:
+            return {"registros": 0, "notas": 0}
+        return {"registros": int(df["registros"].sum()), "notas": int(df["nota"].nunique())}
+
+    conditions, params = _condicoes_ofs_equipamentos(**filtros)
+    df = run_query("ofs_equipamentos_resumo", build_query(SQL_OFS_EQUIPAMENTOS_RESUMO, conditions), **params)
+    if df.empty:
+        return {"registros": 0, "notas": 0}
+    return {"registros": int(df["registros"].iloc[0]), "notas": int(df["notas"].iloc[0])}
+
+
+@instrumentacao.medir_fetch
+def fetch_ofs_equipamentos_opcoes(coluna, data_inicio=None, data_fim=None):
+    """
+    Lista os valores distintos de "Base Operacional" ou "Ação" no período,
+    para popular os multiselects sem trazer as linhas da visão.
+    """
+    expressoes = {
+        "Base Operacional": SQL_BASE_OPERACIONAL,
+        "Ação": "one.secao_nome",
+    }
+    conditions, params = _filtros_periodo(data_inicio, data_fim)
+    query = build_query(
+        f"""
+    SELECT DISTINCT {expressoes[coluna]} AS valor
+    FROM {SCHEMA_NAME}.ofs_notas_equipamentos one
+    JOIN {SCHEMA_NAME}.{TABLE_NAME} s 
+        ON one.numero_nota = s.nota_key
+    {SQL_DIM_BASE_JOIN if coluna == "Base Operacional" else ""}
+    WHERE {expressoes[coluna]} IS NOT NULL
+    """,
+        conditions,
+        order_by="valor",
+    )
+    df = run_query(f"ofs_equipamentos_opcoes:{coluna}", query, **params)
+    return df["valor"].tolist() if not df.empty else []
+
+
+def _condicoes_ofs_apr(data_inicio=None, data_fim=None, equipe=None, nota=None, regional=None):
+    """Condições e parâmetros das Notas APR"""
+    conditions, params = _filtros_periodo_regional(data_inicio, data_fim, regional)
+    if equipe:
+        conditions.append("s.recurso = :equipe")
+        params["equipe"] = equipe
+    if nota:
+        conditions.append("oa.numero_nota = :nota")
+        params["nota"] = nota
+    return conditions, params
+
+
+def consulta_ofs_apr(**filtros):
+    """Query completa (com ordenação padrão) e parâmetros das Notas APR"""
+    conditions, params = _condicoes_ofs_apr(**filtros)
+    query = build_query(
+        SQL_OFS_APR, conditions,
+        order_by="s.data_servico, oa.numero_nota, oa.card_numero, oa.item_numero"
+    )
+    return query, params
+
+
+def _fetch_ofs_apr_periodo(levantar_erros=False, **filtros):
+    """Uma consulta única das Notas APR (um período ou uma partição)"""
+    query, params = consulta_ofs_apr(**filtros)
+    return run_query("ofs_apr", query, levantar_erros=levantar_erros, **params)
+
+
+@instrumentacao.medir_fetch
+def fetch_ofs_apr(data_inicio=None, data_fim=None, equipe=None, nota=None, regional=None):
+    """Busca dados das Notas APR (ofs_apr + serviços)"""
+    return _fetch_ofs_apr_periodo(data_inicio=data_inicio, data_fim=data_fim, equipe=equipe, nota=nota, regional=regional)
+
+
+def iter_ofs_apr_chunks(**filtros):
+    """Blocos das Notas APR para exportação (partições em períodos longos, cursor nos demais)"""
+    if periodo_longo(filtros.get("data_inicio"), filtros.get("data_fim")):
+        return iter_particoes_chunks(_fetch_ofs_apr_periodo, **filtros)
+    query, params = consulta_ofs_apr(**filtros)
+    return iter_query_chunks(query, build_params(**params), query_id="ofs_apr")
+
+
+@instrumentacao.medir_fetch
+def fetch_ofs_apr_pagina(apos=None, limite=None, **filtros):
+    """Uma página (keyset) das Notas APR"""
+    conditions, params = _condicoes_ofs_apr(**filtros)
+    query = build_query(SQL_OFS_APR_PAGINA, conditions)
+    return fetch_pagina("ofs_apr", query, params, OFS_APR_CHAVES, apos, limite)
+
+
+def estimar_ofs_apr(**filtros):
+    """
+    Total estimado (EXPLAIN) de linhas das Notas APR. Não executa a query,
+    então não é particionado mesmo em períodos longos.
+    """
+    conditions, params = _condicoes_ofs_apr(**filtros)
+    versao = versao_dados("ofs_apr", params.get("data_inicio"), params.get("data_fim"))
+    return estimar_total("ofs_apr", build_params(**params), versao, _query=build_query(SQL_OFS_APR, conditions))
+
+
+@instrumentacao.medir_fetch
+def fetch_ofs_apr_equipes(data_inicio=None, data_fim=None):
+    """Equipes distintas com APR no período (opções do filtro)"""
+    conditions, params = _filtros_periodo(data_inicio, data_fim)
+    query = build_query(
+        f"""
+    SELECT DISTINCT s.recurso AS valor
+    FROM {SCHEMA_NAME}.ofs_apr oa
+    JOIN {SCHEMA_NAME}.{TABLE_NAME} s 
+        ON oa.numero_nota = s.nota_key
+    WHERE s.recurso IS NOT NULL
+    """,
+        conditions,
+        order_by="valor",
+    )
+    df = run_query("ofs_apr_equipes", query, **params)
+    return df["valor"].tolist() if not df.empty else []
+
+
+@instrumentacao.medir_fetch
+def fetch_status_data(data_inicio, data_fim):
+    """Contagem total por Status no período"""
+    if snapshot_pronto():
+        df = ler_snapshot(data_inicio, data_fim, colunas=["status_atividade", "id_atividade"])
+        if df.empty:
+            return df
+        return (
+            df.groupby("status_atividade", observed=True)["id_atividade"].count()
+            .rename("total").sort_values(ascending=False).reset_index()
+        )
+    return run_query("status", SQL_STATUS, data_inicio=data_inicio, data_fim=data_fim)
+
+
+@instrumentacao.medir_fetch
+def fetch_equipes_data(data_inicio, data_fim):
+    """Contagem por Equipe (Recurso) e Status no período"""
+    if snapshot_pronto():
+        df = ler_snapshot(
+            data_inicio, data_fim,
+            filtro=ds.field("recurso").is_valid(),
+            colunas=["recurso", "status_atividade", "id_atividade"],
+        )
+        if df.empty:
+            return df
+        return (
+            df.groupby(["recurso", "status_atividade"], observed=True)["id_atividade"].count()
+            .rename("total").reset_index()
+        )
+    return run_query("equipes", SQL_EQUIPES, data_inicio=data_inicio, data_fim=data_fim)
+
+
+@instrumentacao.medir_fetch
+def fetch_mapa_data(data_inicio, data_fim):
+    """Atividades pendentes com coordenadas no período"""
+    if snapshot_pronto():
+        filtro = (
+            ds.field("coordenada_x").is_valid()
+            & ds.field("coordenada_y").is_valid()
+            & (ds.field("status_atividade") == "pendente")
+        )
+        df = ler_snapshot(
+            data_inicio, data_fim, filtro=filtro,
+            colunas=["id_atividade", "recurso", "status_atividade", "coordenada_x", "coordenada_y"],
+        )
+        return tipar_resultado("mapa", df)
+    return run_query("mapa", SQL_MAPA, data_inicio=data_inicio, data_fim=data_fim)
+
+
+# --- Mapa: agregação no servidor com nível de detalhe ---
+# Acima de MAPA_LIMITE_PONTOS atividades, o mapa recebe apenas as células de uma
+# grade cujo tamanho depende do zoom escolhido, com a contagem por célula e recurso.
+
+MAPA_LIMITE_PONTOS = int(os.getenv("MAPA_LIMITE_PONTOS", "5000"))
+MAPA_ZOOM_PADRAO = 11
+
+
+def tamanho_celula(zoom):
+    """Lado da célula da grade, em graus, para um nível de zoom (metade a cada nível)"""
+    return 90 / 2 ** zoom
+
+
+def _agregar_grade(df, celula):
+    """Mesma agregação de SQL_MAPA_GRADE, para o snapshot local"""
+    return (
+        df.assign(
+            lat=(np.floor(df["coordenada_y"] / celula) + 0.5) * celula,
+            lon=(np.floor(df["coordenada_x"] / celula) + 0.5) * celula,
+        )
+        .groupby(["recurso", "lat", "lon"], dropna=False, observed=True)
+        .size()
+        .rename("total")
+        .reset_index()
+    )
+
+
+@instrumentacao.medir_fetch
+def carregar_mapa(data_inicio, data_fim, zoom):
+    """
+    Retorna (df, agregado). Com poucas atividades, `df` traz os pontos brutos
+    (lat, lon, recurso, total=1); senão, as células da grade do zoom com `total`.
+    """
+    celula = tamanho_celula(zoom)
+
+    if snapshot_pronto():
+        df_bruto = fetch_mapa_data(data_inicio, data_fim)
+        if len(df_bruto) > MAPA_LIMITE_PONTOS:
+            return _agregar_grade(df_bruto, celula), True
+    else:
+        contagem = run_query("mapa_contagem", SQL_MAPA_CONTAGEM, data_inicio=data_inicio, data_fim=data_fim)
+        total = int(contagem["total"].iloc[0]) if not contagem.empty else 0
+        if total > MAPA_LIMITE_PONTOS:
+            grade = run_query(
+                "mapa_grade", SQL_MAPA_GRADE,
+                data_inicio=data_inicio, data_fim=data_fim, celula=celula
+            )
+            return grade, True
+        df_bruto = fetch_mapa_data(data_inicio, data_fim)
+
+    if df_bruto.empty:
+        # Sem atividades ou erro na busca (fetch_mapa_data devolve um DataFrame sem colunas)
+        return pd.DataFrame(columns=["recurso", "lat", "lon", "total"]), False
+
+    df_pontos = df_bruto.rename(columns={'coordenada_y': 'lat', 'coordenada_x': 'lon'})
+    return df_pontos[["recurso", "lat", "lon"]].assign(total=1), False
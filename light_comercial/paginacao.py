@@ -0,0 +1,131 @@
+"""
+Paginação keyset das tabelas de detalhe.
+
+As tabelas de detalhe buscam apenas a página visível: WHERE (chaves) > (última linha
+da página anterior) ORDER BY chaves LIMIT n. A próxima página é pré-carregada em
+segundo plano e o total exibido é a estimativa do planejador (EXPLAIN).
+As chaves devem ser não nulas e, em conjunto, identificar cada linha (as visões
+com LEFT JOIN incluem os ids de cada tabela do join, ver sql.py).
+
+O keyset limita o que trafega e é montado no pandas, não o trabalho do banco: a
+query da página é a visão inteira como subquery, então cada página ainda calcula
+o join e a ordenação de todas as linhas do período antes do WHERE (chaves) > ...
+LIMIT n. O custo por página é o da visão no período (por isso períodos longos
+são paginados por partição, abaixo), e não proporcional ao tamanho da página.
+
+Em períodos longos (particoes.py) cada página é buscada partição a partição:
+cada consulta cobre só uma semana/dia e é cacheada como as demais, e o cursor
+passa a ser (partição, chaves da última linha).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+from .consultas import CACHE_MAX_ENTRIES, CACHE_TTL, _bind_params, run_query
+from .db import get_engine
+from .particoes import particoes_periodo, periodo_longo
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "200"))
+
+
+def _valor_python(valor):
+    """Converte escalares numpy/pandas (não adaptáveis pelo psycopg) em tipos Python"""
+    if isinstance(valor, pd.Timestamp):
+        # Colunas de data são lidas como datetime64 (TIPOS_QUERY)
+        return valor.date() if valor == valor.normalize() else valor.to_pydatetime()
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def fetch_pagina(query_id, query, params, chaves, apos=None, limite=None):
+    """
+    Busca uma página de `query` (sem ORDER BY) ordenada pelas colunas `chaves`,
+    a partir da tupla `apos` (valores das chaves da última linha já exibida).
+    Retorna até limite + 1 linhas; a linha extra indica que há próxima página.
+    """
+    limite = limite or PAGE_SIZE
+    colunas = ", ".join(f'q."{coluna}"' for coluna in chaves)
+    params = dict(params)
+    pagina = f"SELECT * FROM ({query}) q"
+    if apos is not None:
+        marcadores = ", ".join(f":apos_{i}" for i in range(len(chaves)))
+        pagina += f" WHERE ({colunas}) > ({marcadores})"
+        params.update({f"apos_{i}": _valor_python(valor) for i, valor in enumerate(apos)})
+    pagina += f" ORDER BY {colunas} LIMIT :limite"
+    return run_query(f"{query_id}:pagina", pagina, limite=limite + 1, **params)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def estimar_total(query_id, params=(), versao=None, _query=None):
+    """Número de linhas estimado pelo planejador, sem executar a query"""
+    engine = get_engine()
+    if engine is None:
+        return None
+    try:
+        with engine.connect() as conn:
+            plano = conn.execute(text(f"EXPLAIN (FORMAT JSON) {_query}"), _bind_params(params)).scalar()
+        return int(plano[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        print(f"Erro ao estimar total de '{query_id}': {e}")
+        return None
+
+
+def paginas_sql(buscar_pagina, chaves, **filtros):
+    """
+    Fonte de páginas keyset a partir de um fetch_*_pagina; o cursor é a tupla das chaves.
+    Períodos longos são paginados partição a partição (as chaves começam pela data).
+    """
+    if periodo_longo(filtros.get("data_inicio"), filtros.get("data_fim")):
+        return _paginas_particionadas(buscar_pagina, chaves, **filtros)
+
+    def buscar(apos, limite):
+        df = buscar_pagina(apos=apos, limite=limite, **filtros)
+        proximo = tuple(df.iloc[limite - 1][chaves]) if len(df) > limite else None
+        return df.iloc[:limite], proximo
+    return buscar
+
+
+def _paginas_particionadas(buscar_pagina, chaves, data_inicio, data_fim, **filtros):
+    """
+    Páginas de um período longo: completa a página com as partições seguintes
+    até ter `limite` linhas. O cursor é (índice da partição, chaves da última linha
+    ou None para o início dela).
+    """
+    particoes = particoes_periodo(data_inicio, data_fim)
+
+    def buscar(cursor, limite):
+        indice, apos = cursor or (0, None)
+        partes, faltam = [], limite
+        df = pd.DataFrame()
+        while indice < len(particoes):
+            inicio, fim = particoes[indice]
+            # Página já completa: só confirma (1 linha) se alguma partição seguinte tem dados
+            df = buscar_pagina(apos=apos, limite=max(faltam, 1), data_inicio=inicio, data_fim=fim, **filtros)
+            if faltam == 0:
+                if not df.empty:
+                    return _juntar(partes), (indice, None)
+            elif len(df) > faltam:
+                partes.append(df.iloc[:faltam])
+                return _juntar(partes), (indice, tuple(df.iloc[faltam - 1][chaves]))
+            else:
+                partes.append(df)
+                faltam -= len(df)
+            indice, apos = indice + 1, None
+        return _juntar(partes) if partes else df.iloc[:0], None
+    return buscar
+
+
+def _juntar(partes):
+    partes = [parte for parte in partes if not parte.empty] or partes[:1]
+    return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+
+def paginas_dataframe(df):
+    """Fonte de páginas sobre um DataFrame já em memória; o cursor é a posição"""
+    def buscar(inicio, limite):
+        inicio = inicio or 0
+        proximo = inicio + limite if inicio + limite < len(df) else None
+        return df.iloc[inicio:inicio + limite], proximo
+    return buscar
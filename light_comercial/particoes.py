@@ -0,0 +1,131 @@
+"""
+Busca particionada de períodos longos.
+
+[data_inicio, data_fim] é dividido em semanas completas (segunda a domingo) e,
+nas pontas, em dias avulsos. Como as partições são alinhadas ao calendário, a
+mesma semana/dia gera sempre a mesma chave de cache: períodos que se sobrepõem
+reaproveitam as partições já buscadas, e uma partição que falha não derruba as
+demais (só ela é refeita no próximo rerun).
+
+Usam as partições, em períodos longos: as páginas das tabelas de detalhe
+(paginacao.paginas_sql), o resumo de equipamentos e as exportações/relatórios
+(exportacao.iter_particoes_chunks).
+"""
+import datetime
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from .consultas import tipar_resultado
+
+PARTICAO_LIMIAR_DIAS = int(os.getenv("PARTICAO_LIMIAR_DIAS", "31"))  # Acima disso o período é particionado
+PARTICAO_WORKERS = int(os.getenv("PARTICAO_WORKERS", "4"))  # Partições em voo (conexões simultâneas)
+
+
+@st.cache_resource
+def _executor_particoes():
+    """
+    Pool próprio das partições, único por processo. Separado do pool de
+    fetch_many para que uma busca particionada disparada de dentro dele não
+    espere por threads ocupadas por ela mesma.
+    """
+    return ThreadPoolExecutor(max_workers=PARTICAO_WORKERS, thread_name_prefix="particao")
+
+
+def periodo_longo(data_inicio, data_fim):
+    """True quando o período deve ser buscado em partições"""
+    return bool(data_inicio and data_fim) and (data_fim - data_inicio).days + 1 > PARTICAO_LIMIAR_DIAS
+
+
+def particoes_periodo(data_inicio, data_fim):
+    """
+    Lista de (inicio, fim) cobrindo [data_inicio, data_fim] em ordem:
+    dias avulsos até a primeira segunda-feira, semanas completas e dias avulsos no fim.
+    """
+    particoes = []
+    dia = data_inicio
+    while dia <= data_fim:
+        fim_semana = dia + datetime.timedelta(days=6)
+        if dia.weekday() == 0 and fim_semana <= data_fim:
+            particoes.append((dia, fim_semana))
+            dia = fim_semana + datetime.timedelta(days=1)
+        else:
+            particoes.append((dia, dia))
+            dia += datetime.timedelta(days=1)
+    return particoes
+
+
+def _em_ordem(funcao, particoes, **filtros):
+    """
+    Dispara as partições no pool (até PARTICAO_WORKERS em voo) e devolve
+    (particao, futuro) na ordem das datas; a próxima é disparada quando uma é consumida.
+    """
+    ctx = get_script_run_ctx()
+
+    def buscar(inicio, fim):
+        # Propaga o contexto da sessão para que cache e st.error funcionem na thread
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return funcao(data_inicio=inicio, data_fim=fim, levantar_erros=True, **filtros)
+
+    pendentes = deque(particoes)
+    em_voo = deque()
+    try:
+        while pendentes or em_voo:
+            while pendentes and len(em_voo) < PARTICAO_WORKERS:
+                particao = pendentes.popleft()
+                em_voo.append((particao, _executor_particoes().submit(buscar, *particao)))
+            yield em_voo.popleft()
+    finally:
+        # Consumidor interrompido (ou erro): não dispara as partições restantes
+        for _, futuro in em_voo:
+            futuro.cancel()
+
+
+def iter_particoes(funcao, data_inicio, data_fim, **filtros):
+    """
+    Busca as partições em paralelo e devolve (particao, DataFrame) na ordem
+    das datas, à medida que ficam prontas. `funcao(data_inicio=..., data_fim=...,
+    levantar_erros=True, **filtros)` busca uma partição; um erro interrompe a iteração.
+    """
+    for particao, futuro in _em_ordem(funcao, particoes_periodo(data_inicio, data_fim), **filtros):
+        yield particao, futuro.result()
+
+
+def fetch_particionado(query_id, funcao, data_inicio, data_fim, ao_progredir=None, **filtros):
+    """
+    Busca o período inteiro em partições e concatena em ordem de data
+    (recompactado com os tipos de `query_id`).
+    `ao_progredir(concluidas, total)` é chamado após cada partição (ex: barra de progresso).
+    Partições com erro ficam de fora do resultado e são listadas em
+    df.attrs["particoes_com_erro"]; como erros não entram no cache, elas são
+    refeitas na próxima chamada enquanto as demais vêm do cache.
+    """
+    particoes = particoes_periodo(data_inicio, data_fim)
+    partes, falhas = [], []
+    for concluidas, (particao, futuro) in enumerate(_em_ordem(funcao, particoes, **filtros), start=1):
+        try:
+            df = futuro.result()
+            if not df.empty:
+                partes.append(df)
+        except Exception as e:
+            print(f"Erro na partição {particao[0]} a {particao[1]}: {e}")
+            falhas.append(particao)
+        if ao_progredir:
+            ao_progredir(concluidas, len(particoes))
+
+    print(f"Período {data_inicio} a {data_fim}: {len(particoes)} partições, {len(falhas)} com erro")
+    if falhas:
+        st.warning(
+            f"⚠️ {len(falhas)} de {len(particoes)} partições do período falharam e ficaram de fora; "
+            f"atualize a página para tentar novamente só essas partições."
+        )
+
+    # Categorias diferentes entre partições viram object no concat; recompacta
+    df = tipar_resultado(query_id, pd.concat(partes, ignore_index=True)) if partes else pd.DataFrame()
+    df.attrs["particoes_com_erro"] = falhas
+    return df
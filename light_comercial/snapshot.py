@@ -0,0 +1,232 @@
+"""
+Snapshot local (Parquet) da tabela de serviços.
+
+Quando SNAPSHOT_DIR está definido, as abas que leem apenas
+a tabela de serviços consultam partições Parquet locais, uma por data_servico.
+A carga inicial (SNAPSHOT_DIAS_INICIAIS dias) nunca roda dentro de uma requisição:
+é feita pelo aquecedor do cache (aquecimento.py) ou avulsa, e até lá as abas
+continuam consultando o banco. O snapshot só é usado depois que ela termina
+(marcador _carga_inicial); uma carga interrompida é retomada do watermark.
+Depois o snapshot é atualizado a partir do watermark (o dia mais recente gravado):
+só as partições do watermark em diante são rebuscadas. Dentro de uma requisição
+a atualização só roda se o watermark tiver no máximo SNAPSHOT_DIAS_REQUISICAO
+dias; atrasos maiores ficam para o aquecedor.
+As abas com join nas tabelas OFS continuam consultando o banco.
+
+Carga inicial avulsa (ex: no deploy, antes de abrir o app):
+    python -m light_comercial.snapshot
+"""
+import datetime
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import streamlit as st
+from sqlalchemy import text
+
+from .config import SCHEMA_NAME, TABLE_NAME
+from .db import get_engine
+from .sql import SQL_DIM_REGIONAL_JOIN, SQL_REGIONAL
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
+SNAPSHOT_DIAS_INICIAIS = int(os.getenv("SNAPSHOT_DIAS_INICIAIS", "365"))
+SNAPSHOT_DIAS_REQUISICAO = int(os.getenv("SNAPSHOT_DIAS_REQUISICAO", "3"))  # Atraso máximo atualizado numa requisição
+SNAPSHOT_JANELA_DIAS = 31  # Tamanho de cada lote na carga inicial
+SNAPSHOT_MARCADOR = "_carga_inicial"  # Prefixo "_": ignorado pela descoberta de arquivos do pyarrow
+SNAPSHOT_ATIVO = bool(SNAPSHOT_DIR)
+
+SQL_SNAPSHOT = f"""
+    SELECT 
+        s.data_servico,
+        s.id_atividade::text                                    AS id_atividade,
+        s.tipo_atividade_1,
+        s.status_atividade,
+        TO_CHAR(s.inicio_servico, 'HH24:MI:SS')                 AS inicio_servico,
+        TO_CHAR(s.fim_servico, 'HH24:MI:SS')                    AS fim_servico,
+        s.duracao::text                                         AS duracao,
+        s.id_recurso::text                                      AS id_recurso,
+        s.recurso,
+        s.label_veiculo,
+        split_part(s.idmatriculalider,'.',1)                    AS idmatriculalider,
+        split_part(s.idmatriculaauxiliares,'.',1)               AS idmatriculaauxiliares,
+        split_part(s.idmatriculaguarda,'.',1)                   AS idmatriculaguarda,
+        {SQL_REGIONAL}                                          AS regional,
+        CASE
+            WHEN s.idmatriculalider IS NOT NULL AND s.idmatriculaauxiliares IS NULL THEN 'incompleta'
+            ELSE 'completa'
+        END                                                     AS composicao,
+        s.coordenada_x::float8                                  AS coordenada_x,
+        s.coordenada_y::float8                                  AS coordenada_y
+    FROM {SCHEMA_NAME}.{TABLE_NAME} s
+    {SQL_DIM_REGIONAL_JOIN}
+    WHERE s.data_servico >= :desde
+    AND s.data_servico < :ate
+    """
+
+# Esquema fixo das partições (sem data_servico, que vem do nome da pasta), para que
+# dias com colunas inteiramente nulas não gerem tipos divergentes entre arquivos
+SNAPSHOT_SCHEMA = pa.schema(
+    [("coordenada_x", pa.float64()), ("coordenada_y", pa.float64())]
+    + [(coluna, pa.string()) for coluna in [
+        "id_atividade", "tipo_atividade_1", "status_atividade", "inicio_servico",
+        "fim_servico", "duracao", "id_recurso", "recurso", "label_veiculo",
+        "idmatriculalider", "idmatriculaauxiliares", "idmatriculaguarda",
+        "regional", "composicao",
+    ]]
+)
+
+
+def _snapshot_watermark():
+    """Retorna o dia mais recente presente no snapshot (ou None se vazio)"""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return None
+    dias = [
+        datetime.date.fromisoformat(nome.split("=", 1)[1])
+        for nome in os.listdir(SNAPSHOT_DIR)
+        if nome.startswith("data_servico=")
+    ]
+    return max(dias) if dias else None
+
+
+def _gravar_particao(dia, df):
+    """Grava (substituindo) a partição Parquet de um dia"""
+    pasta = os.path.join(SNAPSHOT_DIR, f"data_servico={dia.isoformat()}")
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, "part-0.parquet")
+    # Temporário por processo/thread (réplicas que compartilham SNAPSHOT_DIR podem gravar o mesmo dia),
+    # com prefixo "." para que a leitura (ds.dataset) nunca o inclua
+    temporario = os.path.join(pasta, f".part-0.parquet.{os.getpid()}.{threading.get_ident()}.tmp")
+    tabela = pa.Table.from_pandas(
+        df[SNAPSHOT_SCHEMA.names], schema=SNAPSHOT_SCHEMA, preserve_index=False
+    )
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, destino)
+
+
+def _marcar_carga_inicial():
+    """Grava o marcador de carga inicial concluída (só depois da última janela)"""
+    marcador = os.path.join(SNAPSHOT_DIR, SNAPSHOT_MARCADOR)
+    temporario = f"{marcador}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        arquivo.write(datetime.datetime.now().isoformat())
+    os.replace(temporario, marcador)
+
+
+def snapshot_pronto():
+    """True quando o snapshot está configurado e a carga inicial terminou"""
+    return SNAPSHOT_ATIVO and os.path.exists(os.path.join(SNAPSHOT_DIR, SNAPSHOT_MARCADOR))
+
+
+def atualizar_snapshot(carga_inicial=False):
+    """
+    Atualiza o snapshot a partir do watermark (normalmente o dia de hoje).
+    Sem `carga_inicial` (dentro de requisições) não faz nada antes da carga
+    inicial concluída nem quando o watermark tem mais de SNAPSHOT_DIAS_REQUISICAO
+    dias. Com `carga_inicial` (aquecedor, CLI) carrega ou retoma os
+    SNAPSHOT_DIAS_INICIAIS dias em janelas e recupera qualquer atraso.
+    """
+    engine = get_engine()
+    watermark = _snapshot_watermark()
+    pronto = snapshot_pronto()
+    if engine is None:
+        return watermark
+
+    hoje = datetime.date.today()
+    amanha = hoje + datetime.timedelta(days=1)
+    if not carga_inicial:
+        if not pronto or watermark is None:
+            return watermark
+        if watermark < hoje - datetime.timedelta(days=SNAPSHOT_DIAS_REQUISICAO):
+            print(f"Snapshot local desatualizado desde {watermark}; aguardando o aquecedor.")
+            return watermark
+
+    inicio_carga = amanha - datetime.timedelta(days=SNAPSHOT_DIAS_INICIAIS)
+    desde = max(watermark, inicio_carga) if watermark else inicio_carga
+    print(f"Atualizando snapshot local a partir de {desde}...")
+
+    while desde < amanha:
+        ate = min(desde + datetime.timedelta(days=SNAPSHOT_JANELA_DIAS), amanha)
+        with engine.connect() as conn:
+            df = pd.read_sql(text(SQL_SNAPSHOT), conn, params={"desde": desde, "ate": ate})
+        for dia, parte in df.groupby("data_servico"):
+            _gravar_particao(pd.Timestamp(dia).date(), parte)
+        desde = ate
+
+    if not pronto:
+        _marcar_carga_inicial()
+    return _snapshot_watermark()
+
+
+@st.cache_data(ttl=300)
+def snapshot_versao():
+    """
+    Garante o snapshot atualizado no máximo a cada 5 minutos (o botão
+    "Atualizar" limpa este cache). Retorna a versão dos dados locais.
+    """
+    try:
+        atualizar_snapshot()
+    except Exception as e:
+        print(f"Erro ao atualizar snapshot local: {e}")
+    return versao_local()
+
+
+def versao_local():
+    """
+    Versão do que está gravado: watermark e horário de gravação da partição
+    dele. Cada atualização regrava o dia do watermark, então a versão muda
+    a cada atualização (os dias anteriores não são regravados).
+    """
+    watermark = _snapshot_watermark()
+    if watermark is None:
+        return None
+    arquivo = os.path.join(SNAPSHOT_DIR, f"data_servico={watermark.isoformat()}", "part-0.parquet")
+    try:
+        return watermark.isoformat(), os.stat(arquivo).st_mtime_ns
+    except FileNotFoundError:
+        return watermark.isoformat(), None
+
+
+def ler_snapshot(data_inicio=None, data_fim=None, filtro=None, colunas=None):
+    """
+    Lê as partições do período com predicate pushdown (pyarrow.dataset).
+    `filtro` é uma expressão pyarrow adicional aplicada na leitura.
+    Os loaders só chamam com snapshot_pronto().
+    """
+    snapshot_versao()
+    if not snapshot_pronto():
+        return pd.DataFrame()
+
+    dataset = ds.dataset(
+        SNAPSHOT_DIR,
+        format="parquet",
+        exclude_invalid_files=True,
+        partitioning=ds.partitioning(pa.schema([("data_servico", pa.date32())]), flavor="hive"),
+    )
+    expressao = ds.field("data_servico").is_valid()
+    if data_inicio:
+        expressao &= ds.field("data_servico") >= data_inicio
+    if data_fim:
+        expressao &= ds.field("data_servico") <= data_fim
+    if filtro is not None:
+        expressao &= filtro
+    return dataset.to_table(columns=colunas, filter=expressao).to_pandas()
+
+
+def _snapshot_inicio_turno(data_inicio, data_fim, regional):
+    """Linhas de início de turno a partir do snapshot"""
+    filtro = ds.field("tipo_atividade_1") == "Início de turno"
+    if regional and regional != "Todas":
+        filtro &= ds.field("regional") == regional
+    df = ler_snapshot(data_inicio, data_fim, filtro=filtro)
+    if df.empty:
+        return df
+    return df.rename(columns={"tipo_atividade_1": "tipo_atividade"})
+
+
+if __name__ == "__main__":
+    if not SNAPSHOT_ATIVO:
+        raise SystemExit("SNAPSHOT_DIR não definido")
+    print(f"✅ Snapshot em {SNAPSHOT_DIR} até {atualizar_snapshot(carga_inicial=True)}")
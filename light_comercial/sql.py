@@ -0,0 +1,262 @@
+"""
+SQL das consultas do dashboard e metadados de cada query (tipos das colunas e
+tabelas de origem).
+"""
+from .config import SCHEMA_NAME, TABLE_NAME
+
+# --- SQL base das consultas ---
+
+# Dimensões Regional / Base Operacional (migrations/002_dimensao_regional.sql):
+# a tabela de serviços tem as colunas geradas e indexadas regional_sigla e area_codigo.
+# Os joins com as tabelas OFS usam a coluna indexada s.nota_key (migrations/003_nota_key.sql)
+# e o lote de cada nota de equipamento já vem resolvido em one.lote_resolvido (migrations/004).
+DIM_REGIONAL = "dim_regional"
+DIM_BASE_OPERACIONAL = "dim_base_operacional"
+
+SQL_DIM_REGIONAL_JOIN = f"LEFT JOIN {SCHEMA_NAME}.{DIM_REGIONAL} r ON r.sigla = s.regional_sigla"
+SQL_DIM_BASE_JOIN = f"LEFT JOIN {SCHEMA_NAME}.{DIM_BASE_OPERACIONAL} b ON b.area_codigo = s.area_codigo"
+SQL_REGIONAL = "COALESCE(r.regional, 'Outra')"
+
+SQL_INICIO_TURNO = f"""
+    SELECT 
+        s.tipo_atividade_1                                                                                      AS tipo_atividade,
+        s.data_servico,
+        TO_CHAR(s.inicio_servico, 'HH24:MI:SS')                                                                 AS inicio_servico,
+        TO_CHAR(s.fim_servico, 'HH24:MI:SS')                                                                    AS fim_servico,        
+        (EXTRACT(HOUR FROM s.inicio_servico) * 60 + EXTRACT(MINUTE FROM s.inicio_servico))::int                 AS minutos_inicio,
+        (EXTRACT(HOUR FROM s.fim_servico) * 60 + EXTRACT(MINUTE FROM s.fim_servico))::int                       AS minutos_fim,
+        s.duracao,
+        s.id_recurso,
+        s.recurso,
+        s.label_veiculo,
+        split_part(s.idmatriculalider,'.',1)                                                                    AS idmatriculalider,
+        split_part(s.idmatriculaauxiliares,'.',1)                                                               AS idmatriculaauxiliares,
+        split_part(s.idmatriculaguarda,'.',1)                                                                   AS idmatriculaguarda,
+        {SQL_REGIONAL}                                                                                          AS regional,
+        CASE
+            WHEN s.idmatriculalider IS NOT NULL AND s.idmatriculaauxiliares IS NULL THEN 'incompleta'
+            ELSE 'completa'
+        END                                                                                                     AS composicao
+        
+    FROM {SCHEMA_NAME}.{TABLE_NAME} s
+    {SQL_DIM_REGIONAL_JOIN}
+    WHERE 1=1 
+    AND s.tipo_atividade_1 = 'Início de turno'
+    """
+
+# Expressões reutilizadas no SELECT e nos filtros (WHERE) de Notas Equipamentos
+SQL_LOTE = """CASE 
+        WHEN one.material IS NULL THEN l."lote" 
+        ELSE ltrim(one.material, '0') 
+    END"""
+
+SQL_BASE_OPERACIONAL = "COALESCE(b.base_operacional, '')"
+
+SQL_OFS_EQUIPAMENTOS_FROM = f"""
+    FROM {SCHEMA_NAME}.ofs_notas_equipamentos one
+    LEFT JOIN {SCHEMA_NAME}.{TABLE_NAME} s 
+        ON one.numero_nota = s.nota_key
+    {SQL_DIM_BASE_JOIN}
+    LEFT JOIN {SCHEMA_NAME}.lote_material l 
+        ON l."lote" = one.lote_resolvido
+    """
+
+# Colunas da visão, compartilhadas pela consulta completa e pela paginada
+SQL_OFS_EQUIPAMENTOS_COLUNAS = f"""
+        s.data_servico                                                              AS "Data",
+        one.numero_nota                                                             AS "Nota",
+        trim(substring(s.tipo_atividade_1 FROM ' - (.+)$'))                         AS "Texto Breve",
+        one.secao_nome                                                              AS "Ação",
+        CASE 
+            WHEN s.status_atividade = 'concluído' THEN 'EXEC' 
+            ELSE s.status_atividade 
+        END                                                                         AS "Status Usuário",
+        s.tipo_nota_servico                                                         AS "Tipo de Nota",
+        trim(trailing '.0' from s.numero_instalacao)                                AS "Instalação",
+        ''                                                                          AS "Zona",
+        {SQL_LOTE}                                                                  AS "Lote",
+        --CASE 
+        --    WHEN l.descricao IS NOT NULL THEN l.descricao
+        --    WHEN one.descricao IS NOT NULL THEN one.descricao
+        --   ELSE one.tipo_equipamento
+        --END                                                                         as "Descricao",        
+        COALESCE(l.descricao, one.descricao, one.tipo_equipamento) 					as "Descricao",
+        TRIM(BOTH ' u' FROM one.quantidade)                                         AS "Quantidade",
+        ltrim(one.numero_serie, '0')                                                AS "Serial",
+        one.projeto                                                                 AS "Projeto",
+        {SQL_BASE_OPERACIONAL}                                                      AS "Base Operacional\""""
+
+SQL_OFS_EQUIPAMENTOS = f"""
+    SELECT
+{SQL_OFS_EQUIPAMENTOS_COLUNAS}
+    {SQL_OFS_EQUIPAMENTOS_FROM}
+    WHERE 1=1
+    """
+
+# Variantes paginadas: acrescentam os ids das tabelas do join (migrations/006) como
+# desempate da chave keyset. Uma linha da visão é (nota, serviço, lote), então a chave
+# só é única com os três ids; as colunas "_*" ficam ocultas na tabela.
+SQL_CHAVES_SERVICO = "COALESCE(s.id_atividade::text, '')"
+
+SQL_OFS_EQUIPAMENTOS_PAGINA = f"""
+    SELECT
+{SQL_OFS_EQUIPAMENTOS_COLUNAS},
+        one.linha_id                                                                AS "_linha",
+        {SQL_CHAVES_SERVICO}                                                        AS "_servico",
+        COALESCE(l.linha_id, 0)                                                     AS "_lote"
+    {SQL_OFS_EQUIPAMENTOS_FROM}
+    WHERE 1=1
+    """
+OFS_EQUIPAMENTOS_CHAVES = ["Data", "Nota", "_linha", "_servico", "_lote"]
+
+SQL_OFS_EQUIPAMENTOS_RESUMO = f"""
+    SELECT
+        COUNT(*)                        AS registros,
+        COUNT(DISTINCT one.numero_nota) AS notas
+    {SQL_OFS_EQUIPAMENTOS_FROM}
+    WHERE 1=1
+    """
+
+# Resumo por partição de períodos longos: COUNT(DISTINCT) não soma entre partições
+# (uma nota pode ter serviços em vários dias), então cada partição devolve suas notas
+SQL_OFS_EQUIPAMENTOS_RESUMO_NOTAS = f"""
+    SELECT
+        one.numero_nota AS nota,
+        COUNT(*)        AS registros
+    {SQL_OFS_EQUIPAMENTOS_FROM}
+    WHERE 1=1
+    """
+
+# Colunas e FROM compartilhados pela consulta completa e pela paginada
+SQL_OFS_APR_COLUNAS = """
+        s.data_servico                                     AS "Data",
+        s.recurso                                          AS "Equipe",
+        oa.numero_nota                                     AS "Nota",
+        oa.card_numero                                     AS "Nº Pergunta",
+        oa.pergunta_texto                                  AS "Pergunta",
+        oa.item_numero                                     AS "Nº Item",
+        oa.item_texto                                      AS "Item",
+        oa.resposta                                        AS "Resposta\""""
+
+SQL_OFS_APR_FROM = f"""
+    FROM {SCHEMA_NAME}.ofs_apr oa
+    LEFT JOIN {SCHEMA_NAME}.{TABLE_NAME} s 
+        ON oa.numero_nota = s.nota_key"""
+
+SQL_OFS_APR = f"""
+    SELECT 
+{SQL_OFS_APR_COLUNAS}
+    {SQL_OFS_APR_FROM}
+    WHERE 1=1
+    """
+SQL_OFS_APR_PAGINA = f"""
+    SELECT 
+{SQL_OFS_APR_COLUNAS},
+        oa.linha_id                                        AS "_linha",
+        {SQL_CHAVES_SERVICO}                               AS "_servico"
+    {SQL_OFS_APR_FROM}
+    WHERE 1=1
+    """
+OFS_APR_CHAVES = ["Data", "Nota", "Nº Pergunta", "Nº Item", "_linha", "_servico"]
+COLUNAS_DESEMPATE = ["_linha", "_servico", "_lote"]  # Ocultas nas tabelas paginadas
+
+# Tipos compactos de cada query (ver compactar_dataframe)
+TIPOS_QUERY = {
+    "inicio_turno": {
+        "categorias": ["tipo_atividade", "recurso", "label_veiculo", "regional", "composicao"],
+        "datas": ["data_servico"],
+        "decimais": ["minutos_inicio", "minutos_fim"],
+    },
+    "ofs_equipamentos": {
+        "categorias": [
+            "Texto Breve", "Ação", "Status Usuário", "Tipo de Nota", "Zona",
+            "Lote", "Descricao", "Projeto", "Base Operacional",
+        ],
+        "datas": ["Data"],
+    },
+    "ofs_apr": {
+        "categorias": ["Equipe", "Pergunta", "Item", "Resposta"],
+        "datas": ["Data"],
+    },
+    "status": {"categorias": ["status_atividade"]},
+    "equipes": {"categorias": ["recurso", "status_atividade"]},
+    "mapa": {"categorias": ["recurso", "status_atividade"]},
+    "mapa_grade": {"categorias": ["recurso"]},
+}
+
+# KPIs do Dashboard Geral: leem o rollup diário (migrations/001_servicos_diario.sql),
+# atualizado por `python manutencao_db.py atualizar-rollup`
+ROLLUP_TABLE = "servicos_diario"
+
+SQL_STATUS = f"""
+        SELECT 
+            status_atividade, 
+            SUM(total)::bigint as total
+        FROM {SCHEMA_NAME}.{ROLLUP_TABLE}
+        WHERE data_servico BETWEEN :data_inicio AND :data_fim
+        GROUP BY status_atividade
+        ORDER BY total DESC
+    """
+
+SQL_EQUIPES = f"""
+        SELECT 
+            recurso,
+            status_atividade,
+            SUM(total)::bigint as total
+        FROM {SCHEMA_NAME}.{ROLLUP_TABLE}
+        WHERE recurso IS NOT NULL
+        AND data_servico BETWEEN :data_inicio AND :data_fim
+        GROUP BY recurso, status_atividade
+    """
+
+SQL_MAPA_WHERE = """
+            coordenada_x IS NOT NULL 
+            AND coordenada_y IS NOT NULL
+            AND data_servico BETWEEN :data_inicio AND :data_fim
+            AND status_atividade = 'pendente'"""
+
+SQL_MAPA = f"""
+        SELECT 
+            id_atividade,
+            recurso,
+            status_atividade,
+            coordenada_x,
+            coordenada_y
+        FROM {SCHEMA_NAME}.{TABLE_NAME}
+        WHERE {SQL_MAPA_WHERE}
+    """
+
+SQL_MAPA_CONTAGEM = f"""
+        SELECT COUNT(*) AS total
+        FROM {SCHEMA_NAME}.{TABLE_NAME}
+        WHERE {SQL_MAPA_WHERE}
+    """
+
+# Agregação em grade: cada ponto cai na célula de lado :celula (graus), representada
+# pelo seu centro, com contagem por célula e recurso
+SQL_MAPA_GRADE = f"""
+        SELECT 
+            recurso,
+            (floor(coordenada_y::float8 / :celula) + 0.5) * :celula    AS lat,
+            (floor(coordenada_x::float8 / :celula) + 0.5) * :celula    AS lon,
+            COUNT(*)                                                    AS total
+        FROM {SCHEMA_NAME}.{TABLE_NAME}
+        WHERE {SQL_MAPA_WHERE}
+        GROUP BY 1, 2, 3
+    """
+
+# Tabelas de origem de cada query: a entrada em cache só é refeita quando a
+# sonda de alguma dessas tabelas (ver versao_dados) indica dados novos
+FONTES_QUERY = {
+    "inicio_turno": (TABLE_NAME, DIM_REGIONAL),
+    "ofs_equipamentos": (TABLE_NAME, DIM_BASE_OPERACIONAL, "ofs_notas_equipamentos", "lote_material"),
+    "ofs_equipamentos_resumo": (TABLE_NAME, DIM_BASE_OPERACIONAL, "ofs_notas_equipamentos", "lote_material"),
+    "ofs_equipamentos_opcoes": (TABLE_NAME, DIM_BASE_OPERACIONAL, "ofs_notas_equipamentos"),
+    "ofs_apr": (TABLE_NAME, "ofs_apr"),
+    "ofs_apr_equipes": (TABLE_NAME, "ofs_apr"),
+    "status": (ROLLUP_TABLE,),
+    "equipes": (ROLLUP_TABLE,),
+    "mapa": (TABLE_NAME,),
+    "mapa_contagem": (TABLE_NAME,),
+    "mapa_grade": (TABLE_NAME,),
+}
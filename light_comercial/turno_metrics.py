@@ -0,0 +1,78 @@
+"""
+Métricas de Início de Turno.
+
+Funções puras (pandas/numpy, sem Streamlit) usadas pela aba "🔄 Início de Turno".
+Os horários chegam como minutos desde a meia-noite (inteiros calculados no SQL)
+ou são convertidos uma única vez por minutos_desde_meia_noite(); todas as
+agregações e formatações são vetorizadas.
+"""
+import numpy as np
+import pandas as pd
+
+
+def minutos_desde_meia_noite(horarios):
+    """
+    Converte horários "HH:MM[:SS]" em minutos desde a meia-noite (segundos ignorados).
+    Valores nulos ou inválidos viram NaN.
+    """
+    texto = horarios.astype("string")
+    horas = pd.to_numeric(texto.str.slice(0, 2), errors="coerce")
+    minutos = pd.to_numeric(texto.str.slice(3, 5), errors="coerce")
+    return (horas * 60 + minutos).astype("float64")
+
+
+def formatar_hhmm(minutos):
+    """Formata uma Series de minutos em "HH:MM"; NaN vira "N/A" """
+    minutos = pd.Series(minutos, dtype="float64")
+    validos = minutos.notna()
+    inteiros = np.floor(minutos.where(validos, 0)).astype("int64")
+    texto = (
+        (inteiros // 60).astype(str).str.zfill(2)
+        + ":"
+        + (inteiros % 60).astype(str).str.zfill(2)
+    )
+    return texto.where(validos, "N/A")
+
+
+def formatar_hhmm_valor(minutos):
+    """Formata um único valor de minutos em "HH:MM" """
+    return formatar_hhmm([minutos]).iloc[0]
+
+
+def kpis_turno(df):
+    """
+    KPIs principais do período: total de recursos, composições completas,
+    hora média de início/fim (HH:MM) e média de recursos por dia.
+    """
+    return {
+        "total_recursos": df["recurso"].nunique(),
+        "composicoes_completas": int((df["composicao"] == "completa").sum()),
+        "hora_media_inicio": formatar_hhmm_valor(df["minutos_inicio"].mean()),
+        "hora_media_fim": formatar_hhmm_valor(df["minutos_fim"].mean()),
+        "media_recursos_dia": df.groupby("data_servico", observed=True)["recurso"].nunique().mean(),
+    }
+
+
+def recursos_por_data(df):
+    """Quantidade de recursos e horas médias de início/fim por data"""
+    agrupado = df.groupby("data_servico", observed=True).agg(
+        recurso=("recurso", "nunique"),
+        minutos_inicio=("minutos_inicio", "mean"),
+        minutos_fim=("minutos_fim", "mean"),
+    ).reset_index()
+    return pd.DataFrame({
+        "Data": agrupado["data_servico"],
+        "Qtd Recursos": agrupado["recurso"],
+        "Hora Média Início": formatar_hhmm(agrupado["minutos_inicio"]).to_numpy(),
+        "Hora Média Fim": formatar_hhmm(agrupado["minutos_fim"]).to_numpy(),
+    })
+
+
+def composicao_por_regional(df):
+    """Contagem de composições (completa/incompleta) por regional, com Total"""
+    composicao = df.groupby(["regional", "composicao"], observed=True).size().unstack(fill_value=0)
+    # Com composicao categórica as colunas seriam um CategoricalIndex, que não aceita "Total"
+    composicao.columns = composicao.columns.astype(str)
+    # Adicionar coluna de total
+    composicao["Total"] = composicao.sum(axis=1)
+    return composicao
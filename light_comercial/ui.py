@@ -0,0 +1,216 @@
+"""
+Componentes Streamlit compartilhados pelas páginas: filtros globais do sidebar,
+tabela paginada, botão de exportação sob demanda e telemetria.
+
+As páginas importam daqui; os módulos de dados (loaders, consultas, ...) não
+dependem deste módulo.
+"""
+import datetime
+import math
+import os
+import time
+
+import streamlit as st
+
+from . import instrumentacao
+from .concorrencia import em_segundo_plano
+from .config import REGIONAL_OPCOES
+from .db import metricas_pool
+from .exportacao import (
+    MIME_TYPES, _buscar_job, chave_exportacao, descrever_exportacao, iniciar_exportacao,
+)
+from .paginacao import PAGE_SIZE
+
+# --- Filtros globais (sidebar) ---
+# Os widgets ficam no script principal; as páginas leem os valores pelo session_state.
+
+
+def sidebar_filtros():
+    """Desenha os filtros de período e regional no sidebar"""
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Filtros de Período")
+
+    # Data padrão: últimos 7 dias
+    data_hoje = datetime.date.today()
+    data_7_dias_atras = data_hoje - datetime.timedelta(days=7)
+
+    st.sidebar.date_input(
+        "Data inicial:",
+        value=data_7_dias_atras,
+        max_value=data_hoje,
+        key="data_inicio"
+    )
+
+    st.sidebar.date_input(
+        "Data final:",
+        value=data_hoje,
+        max_value=data_hoje,
+        key="data_fim"
+    )
+
+    # Filtro de regional
+    st.sidebar.selectbox(
+        "Regional:",
+        options=REGIONAL_OPCOES,
+        key="regional"
+    )
+
+
+def filtros_globais():
+    """(data_inicio, data_fim, regional) escolhidos no sidebar"""
+    return st.session_state["data_inicio"], st.session_state["data_fim"], st.session_state["regional"]
+
+
+def sidebar_conexoes():
+    """Telemetria do pool de conexões"""
+    with st.sidebar.expander("🔌 Conexões", expanded=False):
+        pool_info = metricas_pool()
+        if pool_info:
+            st.caption(
+                f"Em uso: {pool_info['em_uso']} · ociosas: {pool_info['ociosas']} · "
+                f"overflow: {pool_info['overflow']}/{pool_info['max_overflow']}"
+            )
+            st.caption(
+                f"Espera no checkout: média {pool_info['espera_media_ms']:.1f} ms · "
+                f"máx {pool_info['espera_max_ms']:.1f} ms ({pool_info['checkouts']} checkouts)"
+            )
+
+
+# --- Instrumentação (instrumentacao.py) ---
+# A página "⚙️ Diagnóstico" fica desativada até DIAGNOSTICO_TOKEN ser definido (um
+# segredo) e só aparece com ?diagnostico=<DIAGNOSTICO_TOKEN> na URL.
+# METRICS_PORT sobe o endpoint Prometheus (/metrics) no processo, em METRICS_HOST
+# (padrão só local; use 0.0.0.0 para expor ao coletor em outra máquina).
+DIAGNOSTICO_TOKEN = os.getenv("DIAGNOSTICO_TOKEN", "")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+ABA_DIAGNOSTICO = "⚙️ Diagnóstico"
+
+instrumentacao.registrar_coletor("pool", metricas_pool)
+if METRICS_PORT:
+    try:
+        instrumentacao.iniciar_servidor_prometheus(METRICS_PORT, METRICS_HOST)
+    except OSError as e:
+        print(f"❌ Endpoint de métricas indisponível em {METRICS_HOST}:{METRICS_PORT}: {e}")
+
+
+def diagnostico_habilitado():
+    return bool(DIAGNOSTICO_TOKEN) and st.query_params.get("diagnostico") == DIAGNOSTICO_TOKEN
+
+
+# --- Progresso de buscas particionadas ---
+
+def progresso_particoes(texto):
+    """
+    Callback `ao_progredir(concluidas, total)` para fetch_particionado: uma barra
+    de progresso que some quando a última partição termina. Com tudo no cache
+    as partições voltam imediatamente e a barra mal aparece.
+    """
+    barra = st.empty()
+
+    def ao_progredir(concluidas, total):
+        if concluidas >= total:
+            barra.empty()
+        else:
+            barra.progress(concluidas / total, text=f"{texto} ({concluidas}/{total} partições)")
+    return ao_progredir
+
+
+# --- Tabela paginada ---
+
+def tabela_paginada(chave, buscar_pagina, total=None, estimado=False, assinatura=None,
+                    colunas_ocultas=(), pre_carregar=True, mensagem_vazia=None, escopo="app"):
+    """
+    Exibe uma página por vez com navegação Anterior/Próxima.
+    `assinatura` identifica os filtros: quando muda, a navegação volta à primeira página.
+    Dentro de um st.fragment, `escopo="fragment"` faz a navegação reexecutar só o fragmento.
+    Retorna a página exibida.
+    """
+    estado = st.session_state.setdefault(f"paginacao_{chave}", {})
+    if estado.get("assinatura") != assinatura:
+        estado.clear()
+        estado.update(assinatura=assinatura, cursores=[None], pagina=0)
+
+    pagina = estado["pagina"]
+    df_pagina, proximo = buscar_pagina(estado["cursores"][pagina], PAGE_SIZE)
+
+    if df_pagina.empty and pagina == 0:
+        if mensagem_vazia:
+            st.warning(mensagem_vazia)
+        return df_pagina
+
+    if proximo is not None and pre_carregar:
+        em_segundo_plano(buscar_pagina, proximo, PAGE_SIZE)
+
+    st.dataframe(
+        df_pagina.drop(columns=[c for c in colunas_ocultas if c in df_pagina.columns]),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            coluna: st.column_config.DateColumn(coluna, format="YYYY-MM-DD")
+            for coluna in df_pagina.select_dtypes(include="datetime").columns
+        }
+    )
+
+    col_anterior, col_info, col_proxima = st.columns([1, 4, 1])
+    with col_anterior:
+        if st.button("◀ Anterior", key=f"{chave}_anterior", disabled=pagina == 0):
+            estado["pagina"] -= 1
+            st.rerun(scope=escopo)
+    with col_proxima:
+        if st.button("Próxima ▶", key=f"{chave}_proxima", disabled=proximo is None):
+            if len(estado["cursores"]) == pagina + 1:
+                estado["cursores"].append(proximo)
+            estado["pagina"] += 1
+            st.rerun(scope=escopo)
+    with col_info:
+        texto = f"Página {pagina + 1}"
+        if total is not None:
+            prefixo = "~" if estimado else ""
+            texto += f" de {prefixo}{max(1, math.ceil(total / PAGE_SIZE))} · {prefixo}{total} registros"
+        st.caption(texto)
+
+    return df_pagina
+
+
+# --- Exportação sob demanda ---
+
+def botao_exportacao(aba, formato, gerar_chunks, total, file_name, sheet_name="Dados", versao=None, **filtros):
+    """
+    Botão "Gerar arquivo" + download. O arquivo é montado em segundo plano só
+    quando solicitado e reaproveitado para a mesma aba, filtros e versão dos dados.
+    `gerar_chunks` devolve os blocos de linhas (DataFrame ou cursor do banco);
+    `total` (exato ou estimado) alimenta a barra de progresso.
+    `versao` substitui versao_dados(aba, ...) quando os dados não vêm da query `aba`.
+    """
+    chave = chave_exportacao(aba, formato, versao=versao, **filtros)
+    job = _buscar_job(chave)
+
+    if job is None:
+        if not st.button(f"⚙️ Gerar arquivo {formato.upper()}", key=f"gerar_{aba}_{formato}"):
+            return
+        job = iniciar_exportacao(chave, gerar_chunks, total, formato, sheet_name)
+
+    if not job["future"].done():
+        barra = st.progress(0.0, text="Gerando arquivo...")
+        while not job["future"].done():
+            barra.progress(min(job["progresso"], 1.0), text=f"Gerando arquivo... {job['progresso']:.0%}")
+            time.sleep(0.2)
+        barra.empty()
+
+    try:
+        stats = job["future"].result()
+    except Exception as e:
+        print(f"Erro ao gerar exportação {chave}: {e}")
+        st.error(f"Erro ao gerar o arquivo: {e}")
+        return
+
+    with open(job["caminho"], "rb") as arquivo:
+        st.download_button(
+            label=f"📥 Download {'CSV' if formato == 'csv' else 'Excel (.xlsx)'}",
+            data=arquivo,
+            file_name=file_name,
+            mime=MIME_TYPES[formato],
+            key=f"download_{aba}_{formato}"
+        )
+    st.caption(descrever_exportacao(stats))
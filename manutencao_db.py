@@ -0,0 +1,179 @@
+"""
+Tarefas de manutenção do banco usadas pelo dashboard.
+
+Uso:
+    python manutencao_db.py migrar
+    python manutencao_db.py atualizar-rollup [--dias 7 | --inicio AAAA-MM-DD --fim AAAA-MM-DD]
+    python manutencao_db.py atualizar-lotes [--dias 7]
+    python manutencao_db.py verificar-indices
+
+O `atualizar-rollup` e o `atualizar-lotes` devem ser agendados (ex: cron a cada
+5 minutos); eles só recalculam o que mudou na janela informada. Alterações em
+dias mais antigos que --dias (correções retroativas, cargas atrasadas) NÃO são
+vistas por essas execuções: agende também uma passada larga fora do horário de uso,
+ex: `atualizar-rollup --dias 400` uma vez por noite (a migração 001 já faz a carga
+inicial de todo o histórico).
+"""
+import argparse
+import datetime
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+from light_comercial.config import DATABASE_URL, SCHEMA_NAME, TABLE_NAME
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+def criar_engine():
+    """Engine própria (sem o pool do dashboard), com a mesma configuração de conexão"""
+    return create_engine(DATABASE_URL, pool_pre_ping=True, connect_args={"application_name": "light_comercial_manutencao"})
+
+
+def migrar(engine):
+    """Aplica, em ordem, os arquivos de migrations/ ainda não registrados"""
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.schema_migrations (
+                versao      text        PRIMARY KEY,
+                aplicada_em timestamptz NOT NULL DEFAULT now()
+            )
+        """))
+        aplicadas = set(conn.execute(text(f"SELECT versao FROM {SCHEMA_NAME}.schema_migrations")).scalars())
+
+    for arquivo in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        if arquivo.stem in aplicadas:
+            continue
+        print(f"Aplicando migração {arquivo.name}...")
+        with engine.begin() as conn:
+            # no_parameters: sem parâmetros o arquivo vai como está (vários comandos, '%' de LIKE '%BP%')
+            conn.execution_options(no_parameters=True).exec_driver_sql(arquivo.read_text(encoding="utf-8"))
+            conn.execute(
+                text(f"INSERT INTO {SCHEMA_NAME}.schema_migrations (versao) VALUES (:versao)"),
+                {"versao": arquivo.stem},
+            )
+    print("✅ Migrações em dia.")
+
+
+def atualizar_rollup(engine, inicio, fim):
+    """Recalcula o rollup diário apenas para os dias alterados em [inicio, fim]"""
+    with engine.begin() as conn:
+        dias = conn.execute(
+            text(f"SELECT {SCHEMA_NAME}.refresh_servicos_diario(:inicio, :fim)"),
+            {"inicio": inicio, "fim": fim},
+        ).scalar()
+    print(f"✅ Rollup atualizado: {dias} dia(s) recalculado(s) entre {inicio} e {fim}.")
+
+
+def atualizar_lotes(engine, desde):
+    """Recalcula lote_resolvido das notas com serviço a partir de `desde`"""
+    with engine.begin() as conn:
+        linhas = conn.execute(
+            text(f"SELECT {SCHEMA_NAME}.refresh_lote_resolvido(:desde)"),
+            {"desde": desde},
+        ).scalar()
+    print(f"✅ Lotes resolvidos: {linhas} nota(s) atualizada(s) desde {desde}.")
+
+
+# Joins dos loaders que devem usar índice: (descrição, query, índices esperados no plano)
+VERIFICACOES_INDICES = [
+    (
+        "ofs_notas_equipamentos -> serviços por nota_key",
+        f"""
+        SELECT s.data_servico
+        FROM {SCHEMA_NAME}.ofs_notas_equipamentos one
+        JOIN {SCHEMA_NAME}.{TABLE_NAME} s ON one.numero_nota = s.nota_key
+        WHERE one.numero_nota = :nota
+        """,
+        {"ofs_notas_equipamentos_numero_nota_idx", "servicos_nota_key_idx"},
+    ),
+    (
+        "ofs_apr -> serviços por nota_key",
+        f"""
+        SELECT s.data_servico
+        FROM {SCHEMA_NAME}.ofs_apr oa
+        JOIN {SCHEMA_NAME}.{TABLE_NAME} s ON oa.numero_nota = s.nota_key
+        WHERE oa.numero_nota = :nota
+        """,
+        {"ofs_apr_numero_nota_idx", "servicos_nota_key_idx"},
+    ),
+]
+
+
+def _indices_do_plano(no):
+    """Coleta recursivamente os nomes de índice usados em um plano EXPLAIN (FORMAT JSON)"""
+    indices = {no["Index Name"]} if "Index Name" in no else set()
+    for filho in no.get("Plans", []):
+        indices |= _indices_do_plano(filho)
+    return indices
+
+
+def planos_indices(conn):
+    """
+    (descricao, esperados, usados) de cada VERIFICACOES_INDICES, via EXPLAIN.
+    Usado pelo comando verificar-indices e por tests/test_indices.py.
+    """
+    nota = conn.execute(text(f"SELECT numero_nota FROM {SCHEMA_NAME}.ofs_apr LIMIT 1")).scalar() or "0"
+    for descricao, query, esperados in VERIFICACOES_INDICES:
+        plano = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), {"nota": nota}).scalar()
+        yield descricao, esperados, _indices_do_plano(plano[0]["Plan"])
+
+
+def verificar_indices(engine):
+    """Roda EXPLAIN nos joins por nota e confere se os índices esperados aparecem no plano"""
+    falhas = 0
+    with engine.connect() as conn:
+        for descricao, esperados, usados in planos_indices(conn):
+            faltando = esperados - usados
+            if faltando:
+                falhas += 1
+                print(f"❌ {descricao}: plano não usa {sorted(faltando)} (usa {sorted(usados)})")
+            else:
+                print(f"✅ {descricao}: {sorted(usados)}")
+    return 1 if falhas else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do banco do dashboard LIGHT Comercial")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    sub.add_parser("migrar", help="Aplica as migrações pendentes")
+
+    rollup = sub.add_parser("atualizar-rollup", help="Atualiza o rollup diário do Dashboard Geral")
+    rollup.add_argument(
+        "--dias", type=int, default=7,
+        help="Janela retroativa verificada (padrão: 7); dias mais antigos não são verificados"
+    )
+    rollup.add_argument("--inicio", type=datetime.date.fromisoformat)
+    rollup.add_argument("--fim", type=datetime.date.fromisoformat)
+
+    lotes = sub.add_parser("atualizar-lotes", help="Atualiza o lote resolvido das notas de equipamentos")
+    lotes.add_argument(
+        "--dias", type=int, default=7,
+        help="Janela retroativa verificada (padrão: 7); notas com serviço mais antigo não são verificadas"
+    )
+
+    sub.add_parser("verificar-indices", help="Confere via EXPLAIN se os joins por nota usam índice")
+
+    args = parser.parse_args(argv)
+    engine = criar_engine()
+    codigo = 0
+
+    if args.comando == "migrar":
+        migrar(engine)
+    elif args.comando == "atualizar-rollup":
+        fim = args.fim or datetime.date.today()
+        inicio = args.inicio or fim - datetime.timedelta(days=args.dias)
+        atualizar_rollup(engine, inicio, fim)
+    elif args.comando == "atualizar-lotes":
+        atualizar_lotes(engine, datetime.date.today() - datetime.timedelta(days=args.dias))
+    elif args.comando == "verificar-indices":
+        codigo = verificar_indices(engine)
+
+    engine.dispose()
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+-- Rollup diário dos KPIs do "📊 Dashboard Geral".
+-- Chave lógica: (data_servico, recurso, status_atividade, regional).
+-- Atualizado por light.refresh_servicos_diario(), que só recalcula os dias alterados.
+
+CREATE TABLE IF NOT EXISTS light.servicos_diario (
+    data_servico        date        NOT NULL,
+    recurso             text,
+    status_atividade    text,
+    regional            text        NOT NULL,
+    total               bigint      NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS servicos_diario_data_idx
+    ON light.servicos_diario (data_servico);
+
+-- Assinatura de cada dia já consolidado, usada para detectar dias alterados
+CREATE TABLE IF NOT EXISTS light.servicos_diario_controle (
+    data_servico        date        PRIMARY KEY,
+    linhas              bigint      NOT NULL,
+    assinatura          bigint      NOT NULL,
+    atualizado_em       timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION light.refresh_servicos_diario(p_inicio date, p_fim date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_dias date[];
+BEGIN
+    -- Dias cuja assinatura (linhas + hash de id/recurso/status) mudou, surgiu ou sumiu
+    SELECT coalesce(array_agg(coalesce(a.data_servico, c.data_servico)), '{}')
+    INTO v_dias
+    FROM (
+        SELECT
+            s.data_servico,
+            count(*)                                                                    AS linhas,
+            coalesce(sum(hashtext(concat_ws('|', s.id_atividade, s.recurso, s.status_atividade))), 0) AS assinatura
+        FROM light."4600010296_servicos" s
+        WHERE s.data_servico BETWEEN p_inicio AND p_fim
+        GROUP BY s.data_servico
+    ) a
+    FULL JOIN (
+        SELECT data_servico, linhas, assinatura
+        FROM light.servicos_diario_controle
+        WHERE data_servico BETWEEN p_inicio AND p_fim
+    ) c ON c.data_servico = a.data_servico
+    WHERE a.linhas IS DISTINCT FROM c.linhas
+       OR a.assinatura IS DISTINCT FROM c.assinatura;
+
+    IF cardinality(v_dias) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    DELETE FROM light.servicos_diario WHERE data_servico = ANY(v_dias);
+    DELETE FROM light.servicos_diario_controle WHERE data_servico = ANY(v_dias);
+
+    INSERT INTO light.servicos_diario (data_servico, recurso, status_atividade, regional, total)
+    SELECT
+        s.data_servico,
+        s.recurso,
+        s.status_atividade,
+        CASE 
+            WHEN s.recurso LIKE '%BP%' THEN 'Barra do Piraí'
+            WHEN s.recurso LIKE '%VR%' THEN 'Volta Redonda' 
+            WHEN s.recurso LIKE '%TR%' THEN 'Três Rios'
+            ELSE 'Outra'
+        END,
+        count(s.id_atividade)
+    FROM light."4600010296_servicos" s
+    WHERE s.data_servico = ANY(v_dias)
+    GROUP BY 1, 2, 3, 4;
+
+    INSERT INTO light.servicos_diario_controle (data_servico, linhas, assinatura)
+    SELECT
+        s.data_servico,
+        count(*),
+        coalesce(sum(hashtext(concat_ws('|', s.id_atividade, s.recurso, s.status_atividade))), 0)
+    FROM light."4600010296_servicos" s
+    WHERE s.data_servico = ANY(v_dias)
+    GROUP BY s.data_servico;
+
+    RETURN cardinality(v_dias);
+END;
+$$;
+
+-- Carga inicial de todo o histórico: o refresh agendado (manutencao_db.py
+-- atualizar-rollup) só verifica os últimos --dias. Com a tabela vazia, min/max são
+-- NULL e a função não faz nada.
+SELECT light.refresh_servicos_diario(min(data_servico), max(data_servico))
+FROM light."4600010296_servicos";
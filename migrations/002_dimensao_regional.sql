@@ -0,0 +1,118 @@
+-- Dimensão Regional / Base Operacional.
+-- Substitui os CASE com LIKE '%BP%' e as listas IN (...) de area_trabalho por tabelas
+-- de lookup e colunas geradas indexadas na tabela de serviços, filtradas por igualdade.
+-- Atenção: ADD COLUMN ... STORED reescreve a tabela de serviços (rodar fora do horário de uso).
+
+CREATE TABLE IF NOT EXISTS light.dim_regional (
+    sigla               text        PRIMARY KEY,
+    regional            text        NOT NULL UNIQUE
+);
+
+INSERT INTO light.dim_regional (sigla, regional) VALUES
+    ('BP', 'Barra do Piraí'),
+    ('VR', 'Volta Redonda'),
+    ('TR', 'Três Rios')
+ON CONFLICT (sigla) DO UPDATE SET regional = EXCLUDED.regional;
+
+CREATE TABLE IF NOT EXISTS light.dim_base_operacional (
+    area_codigo         text        PRIMARY KEY,
+    base_operacional    text        NOT NULL
+);
+
+INSERT INTO light.dim_base_operacional (area_codigo, base_operacional)
+SELECT area_codigo, 'Barra do Piraí'
+FROM unnest(ARRAY[
+    'L700','L705','L715','L716','L717','L722','L723','L731','L742','L745',
+    'L747','L749','L754','L762','L763','L770','L830','L840'
+]) AS area_codigo
+UNION ALL
+SELECT area_codigo, 'Três Rios'
+FROM unnest(ARRAY[
+    'L646','L707','L710','L711','L713','L720','L721','L740','L741','L753',
+    'L758','L760','L761','L786','L788','L793','L810','L825','L835','L850'
+]) AS area_codigo
+UNION ALL
+SELECT area_codigo, 'Volta Redonda'
+FROM unnest(ARRAY[
+    'L735','L750','L752','L772','L776','L777','L778','L779','L782','L598'
+]) AS area_codigo
+ON CONFLICT (area_codigo) DO UPDATE SET base_operacional = EXCLUDED.base_operacional;
+
+-- Sigla da regional (mesma precedência do CASE original: BP, VR, TR) e código da área
+ALTER TABLE light."4600010296_servicos"
+    ADD COLUMN IF NOT EXISTS regional_sigla text GENERATED ALWAYS AS (
+        CASE 
+            WHEN recurso LIKE '%BP%' THEN 'BP'
+            WHEN recurso LIKE '%VR%' THEN 'VR'
+            WHEN recurso LIKE '%TR%' THEN 'TR'
+        END
+    ) STORED,
+    ADD COLUMN IF NOT EXISTS area_codigo text GENERATED ALWAYS AS (
+        'L' || split_part(area_trabalho, ' - ', 2)
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS servicos_regional_data_idx
+    ON light."4600010296_servicos" (regional_sigla, data_servico);
+
+CREATE INDEX IF NOT EXISTS servicos_area_codigo_idx
+    ON light."4600010296_servicos" (area_codigo);
+
+-- O rollup diário passa a usar a dimensão em vez do CASE
+CREATE OR REPLACE FUNCTION light.refresh_servicos_diario(p_inicio date, p_fim date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_dias date[];
+BEGIN
+    -- Dias cuja assinatura (linhas + hash de id/recurso/status) mudou, surgiu ou sumiu
+    SELECT coalesce(array_agg(coalesce(a.data_servico, c.data_servico)), '{}')
+    INTO v_dias
+    FROM (
+        SELECT
+            s.data_servico,
+            count(*)                                                                    AS linhas,
+            coalesce(sum(hashtext(concat_ws('|', s.id_atividade, s.recurso, s.status_atividade))), 0) AS assinatura
+        FROM light."4600010296_servicos" s
+        WHERE s.data_servico BETWEEN p_inicio AND p_fim
+        GROUP BY s.data_servico
+    ) a
+    FULL JOIN (
+        SELECT data_servico, linhas, assinatura
+        FROM light.servicos_diario_controle
+        WHERE data_servico BETWEEN p_inicio AND p_fim
+    ) c ON c.data_servico = a.data_servico
+    WHERE a.linhas IS DISTINCT FROM c.linhas
+       OR a.assinatura IS DISTINCT FROM c.assinatura;
+
+    IF cardinality(v_dias) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    DELETE FROM light.servicos_diario WHERE data_servico = ANY(v_dias);
+    DELETE FROM light.servicos_diario_controle WHERE data_servico = ANY(v_dias);
+
+    INSERT INTO light.servicos_diario (data_servico, recurso, status_atividade, regional, total)
+    SELECT
+        s.data_servico,
+        s.recurso,
+        s.status_atividade,
+        coalesce(r.regional, 'Outra'),
+        count(s.id_atividade)
+    FROM light."4600010296_servicos" s
+    LEFT JOIN light.dim_regional r ON r.sigla = s.regional_sigla
+    WHERE s.data_servico = ANY(v_dias)
+    GROUP BY 1, 2, 3, 4;
+
+    INSERT INTO light.servicos_diario_controle (data_servico, linhas, assinatura)
+    SELECT
+        s.data_servico,
+        count(*),
+        coalesce(sum(hashtext(concat_ws('|', s.id_atividade, s.recurso, s.status_atividade))), 0)
+    FROM light."4600010296_servicos" s
+    WHERE s.data_servico = ANY(v_dias)
+    GROUP BY s.data_servico;
+
+    RETURN cardinality(v_dias);
+END;
+$$;
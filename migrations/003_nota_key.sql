@@ -0,0 +1,16 @@
+-- Chave de junção normalizada entre as tabelas OFS e a tabela de serviços.
+-- Os joins usavam ltrim(s.ordem_servico, '0'), que impede o uso de índice;
+-- nota_key guarda esse valor numa coluna gerada indexada.
+-- Atenção: ADD COLUMN ... STORED reescreve a tabela de serviços (rodar fora do horário de uso).
+
+ALTER TABLE light."4600010296_servicos"
+    ADD COLUMN IF NOT EXISTS nota_key text GENERATED ALWAYS AS (ltrim(ordem_servico, '0')) STORED;
+
+CREATE INDEX IF NOT EXISTS servicos_nota_key_idx
+    ON light."4600010296_servicos" (nota_key);
+
+CREATE INDEX IF NOT EXISTS ofs_notas_equipamentos_numero_nota_idx
+    ON light.ofs_notas_equipamentos (numero_nota);
+
+CREATE INDEX IF NOT EXISTS ofs_apr_numero_nota_idx
+    ON light.ofs_apr (numero_nota);
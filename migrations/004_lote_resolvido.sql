@@ -0,0 +1,114 @@
+-- Resolução lacre -> lote materializada em ofs_notas_equipamentos.lote_resolvido.
+-- O join com lote_material avaliava um CASE com extração de JSON por par de linhas
+-- (só possível como nested loop); agora é um equi-join indexado em lote_material."lote".
+-- Notas novas são resolvidas pelo trigger; light.refresh_lote_resolvido() corrige as
+-- notas cujo serviço chegou depois (agendado via `manutencao_db.py atualizar-lotes`).
+
+ALTER TABLE light.ofs_notas_equipamentos
+    ADD COLUMN IF NOT EXISTS lote_resolvido text;
+
+CREATE INDEX IF NOT EXISTS lote_material_lote_idx
+    ON light.lote_material ("lote");
+
+-- Mesma regra do CASE original do loader (inclusive o tratamento de NULL em NOT IN)
+CREATE OR REPLACE FUNCTION light.resolver_lote(
+    p_tipo_equipamento text,
+    p_tipo_lacre text,
+    p_tipo_nota_servico text,
+    p_material text
+)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE
+        WHEN p_tipo_equipamento = 'Lacre' 
+             AND p_tipo_lacre = 'SELO' 
+             AND p_tipo_nota_servico IN ('BB','BD')      THEN '391087'
+        WHEN p_tipo_equipamento = 'Lacre' 
+             AND p_tipo_lacre = 'SELO' 
+             AND p_tipo_nota_servico NOT IN ('BB','BD') THEN '399127'
+        WHEN p_tipo_equipamento = 'Lacre' 
+             AND p_tipo_lacre = 'TRAVA' THEN '399108'
+        ELSE ltrim(p_material, '0') 
+    END
+$$;
+
+-- Uma nota pode ter vários serviços: vale o tipo de nota do serviço mais recente
+-- (desempate por id_atividade). Trigger, carga inicial e refresh usam a mesma regra.
+CREATE OR REPLACE FUNCTION light.tipo_nota_servico_recente(p_nota text)
+RETURNS text
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT s.tipo_nota_servico
+    FROM light."4600010296_servicos" s
+    WHERE s.nota_key = p_nota
+    ORDER BY s.data_servico DESC, s.id_atividade DESC
+    LIMIT 1
+$$;
+
+CREATE OR REPLACE FUNCTION light.trg_resolver_lote()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.lote_resolvido := light.resolver_lote(
+        NEW.tipo_equipamento,
+        NEW.dados_json->>'Tipo de Lacre',
+        light.tipo_nota_servico_recente(NEW.numero_nota),
+        NEW.material
+    );
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS resolver_lote ON light.ofs_notas_equipamentos;
+CREATE TRIGGER resolver_lote
+    BEFORE INSERT OR UPDATE OF numero_nota, tipo_equipamento, dados_json, material
+    ON light.ofs_notas_equipamentos
+    FOR EACH ROW
+    EXECUTE FUNCTION light.trg_resolver_lote();
+
+-- Recalcula as notas com serviço a partir de p_desde cujo lote resolvido mudou.
+-- O serviço mais recente da nota é sempre >= p_desde quando ela tem algum, então
+-- o DISTINCT ON escolhe o mesmo serviço de tipo_nota_servico_recente()
+CREATE OR REPLACE FUNCTION light.refresh_lote_resolvido(p_desde date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_linhas integer;
+BEGIN
+    UPDATE light.ofs_notas_equipamentos one
+    SET lote_resolvido = novo.lote
+    FROM (
+        SELECT DISTINCT ON (one.ctid)
+            one.ctid AS linha,
+            light.resolver_lote(
+                one.tipo_equipamento,
+                one.dados_json->>'Tipo de Lacre',
+                s.tipo_nota_servico,
+                one.material
+            ) AS lote
+        FROM light.ofs_notas_equipamentos one
+        JOIN light."4600010296_servicos" s ON s.nota_key = one.numero_nota
+        WHERE s.data_servico >= p_desde
+        ORDER BY one.ctid, s.data_servico DESC, s.id_atividade DESC
+    ) novo
+    WHERE one.ctid = novo.linha
+      AND one.lote_resolvido IS DISTINCT FROM novo.lote;
+
+    GET DIAGNOSTICS v_linhas = ROW_COUNT;
+    RETURN v_linhas;
+END;
+$$;
+
+-- Carga inicial
+UPDATE light.ofs_notas_equipamentos one
+SET lote_resolvido = light.resolver_lote(
+    one.tipo_equipamento,
+    one.dados_json->>'Tipo de Lacre',
+    light.tipo_nota_servico_recente(one.numero_nota),
+    one.material
+);
@@ -0,0 +1,5 @@
+-- Índice por data da tabela de serviços.
+-- Usado pelos filtros de período sem regional.
+
+CREATE INDEX IF NOT EXISTS servicos_data_servico_idx
+    ON light."4600010296_servicos" (data_servico);
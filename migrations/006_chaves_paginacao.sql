@@ -0,0 +1,23 @@
+-- Chaves estáveis para a paginação keyset (light_comercial/paginacao.py).
+-- O desempate usava one.ctid, que muda a cada UPDATE (refresh_lote_resolvido) e se
+-- repete quando os LEFT JOIN multiplicam a linha (vários serviços por nota, vários
+-- registros por lote). As páginas passam a desempatar pelos ids de cada tabela do join.
+-- Atenção: ADD COLUMN ... IDENTITY reescreve as tabelas (rodar fora do horário de uso).
+
+ALTER TABLE light.ofs_notas_equipamentos
+    ADD COLUMN IF NOT EXISTS linha_id bigint GENERATED ALWAYS AS IDENTITY;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ofs_notas_equipamentos_linha_id_idx
+    ON light.ofs_notas_equipamentos (linha_id);
+
+ALTER TABLE light.ofs_apr
+    ADD COLUMN IF NOT EXISTS linha_id bigint GENERATED ALWAYS AS IDENTITY;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ofs_apr_linha_id_idx
+    ON light.ofs_apr (linha_id);
+
+ALTER TABLE light.lote_material
+    ADD COLUMN IF NOT EXISTS linha_id bigint GENERATED ALWAYS AS IDENTITY;
+
+CREATE UNIQUE INDEX IF NOT EXISTS lote_material_linha_id_idx
+    ON light.lote_material (linha_id);
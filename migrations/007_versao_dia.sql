@@ -0,0 +1,116 @@
+-- Versão por dia das tabelas grandes, usada como sonda de alterações pelo cache do dashboard
+-- (consultas.versoes_dias). Triggers por comando marcam, a cada INSERT/UPDATE/DELETE, os dias
+-- de data_servico afetados com um novo número de light.versao_dia_seq; a sonda lê só esta
+-- tabela (uma linha por tabela e dia) em vez de contar as linhas do período.
+-- Notas (ofs_notas_equipamentos, ofs_apr) marcam os dias dos serviços da nota.
+-- TRUNCATE marca a linha "-infinity" da tabela, que entra na versão de todos os períodos.
+
+CREATE SEQUENCE IF NOT EXISTS light.versao_dia_seq;
+
+CREATE TABLE IF NOT EXISTS light.versao_dia (
+    tabela              text        NOT NULL,
+    data_servico        date        NOT NULL,
+    versao              bigint      NOT NULL,
+    PRIMARY KEY (tabela, data_servico)
+);
+
+-- Dias em ordem: comandos simultâneos travam as mesmas linhas na mesma ordem (sem deadlock)
+CREATE OR REPLACE FUNCTION light.marcar_versao_dia(p_tabela text, p_dias date[])
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO light.versao_dia (tabela, data_servico, versao)
+    SELECT p_tabela, d.dia, nextval('light.versao_dia_seq')
+    FROM (SELECT DISTINCT dia FROM unnest(p_dias) AS dia WHERE dia IS NOT NULL) d
+    ORDER BY d.dia
+    ON CONFLICT (tabela, data_servico) DO UPDATE SET versao = EXCLUDED.versao
+$$;
+
+CREATE OR REPLACE FUNCTION light.trg_versao_dia_servicos()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM light.marcar_versao_dia(TG_TABLE_NAME, ARRAY(SELECT n.data_servico FROM novas n));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM light.marcar_versao_dia(TG_TABLE_NAME, ARRAY(SELECT a.data_servico FROM antigas a));
+    ELSE
+        PERFORM light.marcar_versao_dia(TG_TABLE_NAME, ARRAY(
+            SELECT n.data_servico FROM novas n
+            UNION
+            SELECT a.data_servico FROM antigas a
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION light.trg_versao_dia_notas()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_notas text[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        v_notas := ARRAY(SELECT n.numero_nota FROM novas n);
+    ELSIF TG_OP = 'DELETE' THEN
+        v_notas := ARRAY(SELECT a.numero_nota FROM antigas a);
+    ELSE
+        v_notas := ARRAY(SELECT n.numero_nota FROM novas n UNION SELECT a.numero_nota FROM antigas a);
+    END IF;
+    PERFORM light.marcar_versao_dia(TG_TABLE_NAME, ARRAY(
+        SELECT DISTINCT s.data_servico
+        FROM light."4600010296_servicos" s
+        WHERE s.nota_key = ANY(v_notas)
+    ));
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION light.trg_versao_dia_truncate()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM light.marcar_versao_dia(TG_TABLE_NAME, ARRAY['-infinity'::date]);
+    RETURN NULL;
+END;
+$$;
+
+-- Tabelas de transição só podem ser usadas em triggers de um único evento: um por evento
+DO $$
+DECLARE
+    v_tabela text;
+    v_funcao text;
+    v_evento text;
+BEGIN
+    FOR v_tabela, v_funcao IN VALUES
+        ('4600010296_servicos', 'trg_versao_dia_servicos'),
+        ('ofs_notas_equipamentos', 'trg_versao_dia_notas'),
+        ('ofs_apr', 'trg_versao_dia_notas')
+    LOOP
+        FOREACH v_evento IN ARRAY ARRAY['insert', 'update', 'delete'] LOOP
+            EXECUTE format('DROP TRIGGER IF EXISTS versao_dia_%s ON light.%I', v_evento, v_tabela);
+            EXECUTE format(
+                'CREATE TRIGGER versao_dia_%s AFTER %s ON light.%I REFERENCING %s '
+                'FOR EACH STATEMENT EXECUTE FUNCTION light.%I()',
+                v_evento, upper(v_evento), v_tabela,
+                CASE v_evento
+                    WHEN 'insert' THEN 'NEW TABLE AS novas'
+                    WHEN 'delete' THEN 'OLD TABLE AS antigas'
+                    ELSE 'NEW TABLE AS novas OLD TABLE AS antigas'
+                END,
+                v_funcao
+            );
+        END LOOP;
+        EXECUTE format('DROP TRIGGER IF EXISTS versao_dia_truncate ON light.%I', v_tabela);
+        EXECUTE format(
+            'CREATE TRIGGER versao_dia_truncate AFTER TRUNCATE ON light.%I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION light.trg_versao_dia_truncate()',
+            v_tabela
+        );
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,60 @@
+"""📊 Dashboard Geral: KPIs de status e contagem por equipe (rollup diário)"""
+from functools import partial
+
+import streamlit as st
+
+from light_comercial import instrumentacao
+from light_comercial.concorrencia import fetch_many
+from light_comercial.loaders import fetch_equipes_data, fetch_status_data
+from light_comercial.ui import filtros_globais
+
+
+# --- Seções isoladas (st.fragment) ---
+
+@st.fragment
+def grafico_equipes(df_equipes):
+    """Seletor de equipe + gráfico de status (trocar a equipe reexecuta só esta seção)"""
+    with instrumentacao.medir("fragmento", "dashboard_equipes"):
+        equipes_lista = ["Todas"] + sorted(df_equipes['recurso'].unique())
+        equipe_selecionada = st.selectbox("Selecione uma Equipe (Recurso):", equipes_lista, key="dashboard_equipe")
+
+        if equipe_selecionada == "Todas":
+            df_equipes_filtrado = df_equipes.groupby('status_atividade', observed=True)['total'].sum().reset_index()
+        else:
+            df_equipes_filtrado = df_equipes[df_equipes['recurso'] == equipe_selecionada]
+
+        if not df_equipes_filtrado.empty:
+            st.bar_chart(df_equipes_filtrado, x='status_atividade', y='total')
+        else:
+            st.info(f"Sem dados de status para a equipe '{equipe_selecionada}'.")
+
+
+data_inicio, data_fim, _ = filtros_globais()
+
+# Query 1: Contagem total por Status / Query 2: Contagem total por Equipe (Recurso)
+resultados = fetch_many({
+    "status": partial(fetch_status_data, data_inicio, data_fim),
+    "equipes": partial(fetch_equipes_data, data_inicio, data_fim),
+})
+df_status = resultados["status"]
+df_equipes = resultados["equipes"]
+
+# Layout do Dashboard Geral
+st.header("📊 Visão Geral dos Status")
+
+if not df_status.empty:
+    kpi_cols = st.columns(len(df_status))
+    for i, row in df_status.iterrows():
+        with kpi_cols[i]:
+            st.metric(label=row['status_atividade'], value=row['total'])
+else:
+    st.warning("Não foi possível carregar os KPIs de status.")
+
+st.divider()
+
+# Gráfico de Barras e Filtro por Equipe
+st.header("📈 Produtividade por Equipe")
+if not df_equipes.empty:
+    grafico_equipes(df_equipes)
+else:
+    st.warning("Não foi possível carregar os dados das equipes.")
@@ -0,0 +1,45 @@
+"""⚙️ Diagnóstico: agregados por aba/fetch, chamadas mais lentas, pool e exportação JSON/Prometheus"""
+import pandas as pd
+import streamlit as st
+
+from light_comercial import instrumentacao
+from light_comercial.db import metricas_pool
+from light_comercial.ui import ABA_DIAGNOSTICO, METRICS_HOST, METRICS_PORT
+
+st.header(ABA_DIAGNOSTICO)
+
+resumo = pd.DataFrame(instrumentacao.agregados())
+if resumo.empty:
+    st.info("Nenhum evento registrado ainda neste processo.")
+else:
+    st.subheader("⏱️ Por aba e fetch")
+    resumo["memoria_media_mb"] = resumo.pop("memoria_media_bytes") / 1024 ** 2
+    resumo["mb_lidos"] = resumo.pop("bytes_total") / 1024 ** 2
+    st.dataframe(
+        resumo.sort_values("segundos_medio", ascending=False),
+        use_container_width=True, hide_index=True
+    )
+
+    st.subheader("🐢 Chamadas mais lentas (filtros)")
+    lentas = pd.DataFrame(instrumentacao.eventos())
+    lentas = lentas.sort_values("segundos", ascending=False).head(50)
+    colunas = [c for c in ["tipo", "nome", "origem", "segundos", "linhas", "consultas", "misses", "filtros", "erro"]
+               if c in lentas.columns]
+    st.dataframe(lentas[colunas], use_container_width=True, hide_index=True)
+
+st.subheader("🔌 Pool de conexões")
+st.json(metricas_pool())
+
+col_json, col_prom = st.columns(2)
+with col_json:
+    st.download_button(
+        "⬇️ Eventos (JSON lines)", instrumentacao.exportar_json(),
+        file_name="diagnostico_eventos.jsonl", mime="application/x-ndjson"
+    )
+with col_prom:
+    st.download_button(
+        "⬇️ Métricas (Prometheus)", instrumentacao.prometheus_texto(),
+        file_name="metrics.prom", mime="text/plain"
+    )
+if METRICS_PORT:
+    st.caption(f"Endpoint Prometheus: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
@@ -0,0 +1,162 @@
+"""🔄 Início de Turno: KPIs, drill-down e detalhamento por recurso"""
+import pandas as pd
+import streamlit as st
+
+from light_comercial import instrumentacao, turno_metrics
+from light_comercial.exportacao import iter_dataframe_chunks
+from light_comercial.loaders import (
+    DRILLDOWN_EIXOS, agregar_drilldown, fetch_inicio_turno_data, versao_inicio_turno,
+)
+from light_comercial.paginacao import paginas_dataframe
+from light_comercial.ui import botao_exportacao, filtros_globais, tabela_paginada
+
+
+# --- Seções isoladas (st.fragment) ---
+
+@st.fragment
+def secao_drilldown(data_inicio, data_fim, regional):
+    """Gráfico de evolução das equipes (Dia/Mês/Ano)"""
+    with instrumentacao.medir("fragmento", "turno_drilldown"):
+        st.subheader("📊 Evolução de Equipes por Período")
+
+        # Selecionar nível de agrupamento
+        nivel_agrupamento = st.selectbox(
+            "Agrupar por:",
+            ["Dia", "Mês", "Ano"],
+            key="drilldown_level"
+        )
+        df_agrupado = agregar_drilldown(
+            nivel_agrupamento,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            regional=regional
+        )
+        x_axis = DRILLDOWN_EIXOS[nivel_agrupamento]
+
+        if not df_agrupado.empty:
+            # Criar gráfico de barras empilhadas
+            colunas_grafico = [col for col in ['completa', 'incompleta'] if col in df_agrupado.columns]
+
+            if len(colunas_grafico) >= 1:
+                chart_data = df_agrupado.set_index(x_axis)[colunas_grafico]
+                st.bar_chart(chart_data, use_container_width=True)
+
+                # Mostrar tabela de dados também
+                with st.expander("📋 Ver dados detalhados"):
+                    st.dataframe(df_agrupado, use_container_width=True, hide_index=True)
+            else:
+                st.info("Dados insuficientes para gerar o gráfico de drill down.")
+
+
+@st.fragment
+def secao_detalhes(df_turno, data_inicio, data_fim, regional):
+    """Tabela detalhada com filtros de composição/recurso e exportação CSV"""
+    with instrumentacao.medir("fragmento", "turno_detalhes"):
+        st.subheader("📋 Dados Detalhados de Início de Turno")
+
+        # Filtros na tabela
+        col_filtro1, col_filtro2 = st.columns(2)
+
+        with col_filtro1:
+            composicao_filtro = st.selectbox(
+                "Filtrar por Composição:",
+                ["Todas", "completa", "incompleta"],
+                key="turno_composicao"
+            )
+
+        with col_filtro2:
+            recursos_disponiveis = ["Todos"] + sorted(df_turno['recurso'].unique())
+            recurso_filtro = st.selectbox("Filtrar por Recurso:", recursos_disponiveis, key="turno_recurso")
+
+        # Aplica filtros na tabela (máscara única, sem copiar df_turno)
+        filtro = pd.Series(True, index=df_turno.index)
+        if composicao_filtro != "Todas":
+            filtro &= df_turno['composicao'] == composicao_filtro
+        if recurso_filtro != "Todos":
+            filtro &= df_turno['recurso'] == recurso_filtro
+        df_turno_filtrado = df_turno[filtro]
+
+        # Mostra tabela (paginada; os dados da aba já estão em memória)
+        assinatura_turno = (data_inicio, data_fim, regional, composicao_filtro, recurso_filtro)
+        tabela_paginada(
+            "inicio_turno", paginas_dataframe(df_turno_filtrado),
+            total=len(df_turno_filtrado), assinatura=assinatura_turno,
+            colunas_ocultas=["minutos_inicio", "minutos_fim"], pre_carregar=False, escopo="fragment"
+        )
+
+        # Botão de download (arquivo gerado sob demanda)
+        botao_exportacao(
+            "inicio_turno", "csv", lambda: iter_dataframe_chunks(df_turno_filtrado), len(df_turno_filtrado),
+            file_name=f"inicio_turno_{data_inicio}_a_{data_fim}.csv",
+            versao=versao_inicio_turno(data_inicio, data_fim),
+            data_inicio=data_inicio, data_fim=data_fim, regional=regional,
+            composicao=composicao_filtro, recurso=recurso_filtro
+        )
+
+
+data_inicio, data_fim, regional_selecionada = filtros_globais()
+
+st.header("🔄 Análise de Início de Turno")
+
+# Busca dados com filtros
+df_turno = fetch_inicio_turno_data(
+    data_inicio=data_inicio, 
+    data_fim=data_fim, 
+    regional=regional_selecionada
+)
+
+if not df_turno.empty:
+    # --- KPIs e Métricas ---
+    st.subheader("📈 Métricas Principais")
+
+    kpis = turno_metrics.kpis_turno(df_turno)
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        st.metric("Total de Recursos", kpis["total_recursos"])
+
+    with col2:
+        st.metric("Composições Completas", kpis["composicoes_completas"])
+
+    with col3:
+        # Média de hora de início em formato HH:MM
+        st.metric("Hora Média Início", kpis["hora_media_inicio"])
+
+    with col4:
+        # Média de hora de fim em formato HH:MM
+        st.metric("Hora Média Fim", kpis["hora_media_fim"])
+
+    with col5:
+        # Média de recursos por dia no período
+        st.metric("Média Recursos/Dia", f"{kpis['media_recursos_dia']:.1f}")
+
+    st.divider()
+
+    # --- Análises Detalhadas ---
+    st.subheader("📊 Análises por Data e Regional")
+
+    col_analise1, col_analise2 = st.columns(2)
+
+    with col_analise1:
+        st.markdown("**Recursos por Data**")
+        st.dataframe(
+            turno_metrics.recursos_por_data(df_turno), use_container_width=True, hide_index=True,
+            column_config={"Data": st.column_config.DateColumn("Data", format="YYYY-MM-DD")}
+        )
+
+    with col_analise2:
+        st.markdown("**Composição por Regional**")
+        st.dataframe(turno_metrics.composicao_por_regional(df_turno), use_container_width=True)
+
+    st.divider()
+
+    # Seções com widgets próprios rodam como fragmentos: mudar "Agrupar por" ou
+    # os filtros da tabela reexecuta só a seção, sem recalcular os KPIs acima
+    secao_drilldown(data_inicio, data_fim, regional_selecionada)
+
+    st.divider()
+
+    secao_detalhes(df_turno, data_inicio, data_fim, regional_selecionada)
+
+else:
+    st.warning("⚠️ Nenhum dado encontrado para os filtros selecionados.")
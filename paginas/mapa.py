@@ -0,0 +1,72 @@
+"""🗺️ Mapa: pontos (ou grade agregada) das atividades no período"""
+import numpy as np
+import pydeck as pdk
+import streamlit as st
+
+from light_comercial import instrumentacao
+from light_comercial.loaders import MAPA_ZOOM_PADRAO, carregar_mapa, tamanho_celula
+from light_comercial.ui import filtros_globais
+
+
+def deck_mapa(df, agregado, zoom):
+    """Camada pydeck: um círculo por ponto ou por célula (raio proporcional à contagem)"""
+    if agregado:
+        raio_maximo = tamanho_celula(zoom) * 111_000 / 2  # metros (meia célula)
+        df = df.assign(raio=raio_maximo * np.sqrt(df["total"] / df["total"].max()))
+        tooltip = {"text": "{total} atividades"}
+    else:
+        df = df.assign(raio=30)
+        tooltip = {"text": "{recurso}"}
+
+    camada = pdk.Layer(
+        "ScatterplotLayer",
+        data=df,
+        get_position=["lon", "lat"],
+        get_radius="raio",
+        radius_min_pixels=2,
+        get_fill_color=[255, 75, 75, 160],
+        pickable=True,
+    )
+    visao = pdk.ViewState(latitude=float(df["lat"].mean()), longitude=float(df["lon"].mean()), zoom=zoom)
+    return pdk.Deck(layers=[camada], initial_view_state=visao, tooltip=tooltip)
+
+
+# --- Seções isoladas (st.fragment) ---
+
+@st.fragment
+def mapa_equipes(df_mapa, agregado, nivel_zoom):
+    """Seletor de equipe + mapa (trocar a equipe reexecuta só esta seção)"""
+    with instrumentacao.medir("fragmento", "mapa_equipes"):
+        equipes_mapa_lista = ["Todas"] + sorted(df_mapa['recurso'].dropna().unique())
+        equipe_mapa_selecionada = st.selectbox("Filtrar mapa por Equipe:", equipes_mapa_lista, key="mapa_equipe")
+
+        if equipe_mapa_selecionada != "Todas":
+            df_mapa = df_mapa[df_mapa['recurso'] == equipe_mapa_selecionada]
+
+        if not df_mapa.empty:
+            if agregado:
+                df_mapa = df_mapa.groupby(['lat', 'lon'], as_index=False)['total'].sum()
+                st.caption(
+                    f"{int(df_mapa['total'].sum())} atividades agregadas em {len(df_mapa)} células "
+                    f"— aumente o zoom para mais detalhe."
+                )
+            st.pydeck_chart(deck_mapa(df_mapa, agregado, nivel_zoom))
+        else:
+            st.info(f"Sem atividades no mapa para a equipe '{equipe_mapa_selecionada}'.")
+
+
+data_inicio, data_fim, _ = filtros_globais()
+
+st.header("🗺️ Mapa de Atividades")
+
+nivel_zoom = st.select_slider(
+    "Nível de detalhe (zoom):",
+    options=list(range(8, 17)),
+    value=MAPA_ZOOM_PADRAO
+)
+df_mapa, agregado = carregar_mapa(data_inicio, data_fim, nivel_zoom)
+
+if not df_mapa.empty:
+    mapa_equipes(df_mapa, agregado, nivel_zoom)
+else:
+    st.warning("Não foi possível carregar dados de geolocalização para o mapa.")
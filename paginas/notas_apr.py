@@ -0,0 +1,50 @@
+"""📝 Notas APR: filtros no SQL, total estimado, tabela paginada e exportação em streaming"""
+import streamlit as st
+
+from light_comercial.consultas import build_params
+from light_comercial.loaders import (
+    estimar_ofs_apr, fetch_ofs_apr_equipes, fetch_ofs_apr_pagina, iter_ofs_apr_chunks,
+)
+from light_comercial.paginacao import paginas_sql
+from light_comercial.sql import COLUNAS_DESEMPATE, OFS_APR_CHAVES
+from light_comercial.ui import botao_exportacao, filtros_globais, tabela_paginada
+
+data_inicio, data_fim, _ = filtros_globais()
+
+st.header("📝 Notas APR")
+
+# Filtros aplicados no banco; a tabela busca só a página visível
+with st.expander("🎛️ Filtros adicionais", expanded=False):
+    col1, col2 = st.columns(2)
+    with col1:
+        equipes = ["Todas"] + fetch_ofs_apr_equipes(data_inicio, data_fim)
+        equipe_sel = st.selectbox("Filtrar por Equipe:", equipes)
+    with col2:
+        nota_sel = st.text_input("Filtrar por Nota específica (ex: 1625861939)")
+
+filtros_apr = dict(
+    data_inicio=data_inicio,
+    data_fim=data_fim,
+    equipe=equipe_sel if equipe_sel != "Todas" else None,
+    nota=nota_sel.strip() or None
+)
+
+st.subheader("📋 Detalhamento das Notas APR")
+total_apr = estimar_ofs_apr(**filtros_apr)
+df_pagina_apr = tabela_paginada(
+    "ofs_apr",
+    paginas_sql(fetch_ofs_apr_pagina, OFS_APR_CHAVES, **filtros_apr),
+    total=total_apr, estimado=True, assinatura=build_params(**filtros_apr),
+    colunas_ocultas=COLUNAS_DESEMPATE,
+    mensagem_vazia="⚠️ Nenhum registro de APR encontrado para os filtros selecionados."
+)
+
+if not df_pagina_apr.empty:
+    # Períodos longos são exportados partição a partição (em paralelo, com cache por partição)
+    botao_exportacao(
+        "ofs_apr", "xlsx",
+        lambda: iter_ofs_apr_chunks(**filtros_apr), total_apr,
+        file_name=f"ofs_apr_{data_inicio}_a_{data_fim}.xlsx",
+        sheet_name="Notas APR",
+        data_inicio=data_inicio, data_fim=data_fim, equipe=equipe_sel, nota=nota_sel.strip()
+    )
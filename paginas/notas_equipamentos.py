@@ -0,0 +1,118 @@
+"""🧰 Notas Equipamentos: filtros no SQL, tabela paginada e exportação em streaming"""
+import streamlit as st
+
+from light_comercial.consultas import build_params
+from light_comercial.loaders import (
+    fetch_ofs_equipamentos_opcoes, fetch_ofs_equipamentos_pagina, fetch_ofs_equipamentos_resumo,
+    iter_ofs_equipamentos_chunks, parse_multi_filter,
+)
+from light_comercial.paginacao import paginas_sql
+from light_comercial.sql import COLUNAS_DESEMPATE, OFS_EQUIPAMENTOS_CHAVES
+from light_comercial.ui import botao_exportacao, filtros_globais, progresso_particoes, tabela_paginada
+
+data_inicio, data_fim, _ = filtros_globais()
+
+st.header("🧰 Visão de Notas Equipamentos")
+
+# ----------------------------
+# FILTROS ESPECÍFICOS DA ABA
+# ----------------------------
+with st.expander("🎛️ Filtros adicionais", expanded=True):
+    # Linha 1: datas + nota
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        data_ini_local = st.date_input(
+            "Data inicial",
+            value=data_inicio,
+            key="equip_data_ini"
+        )
+    with col2:
+        data_fim_local = st.date_input(
+            "Data final",
+            value=data_fim,
+            key="equip_data_fim"
+        )
+    with col3:
+        filtro_nota = st.text_input(
+            "Nota (+ Lista)",
+            key="filtro_nota"
+        )
+
+    # Linha 2: lote + serial
+    col4, col5 = st.columns(2)
+    with col4:
+        filtro_lote = st.text_input(
+            "Lote (+ Lista)",
+            key="filtro_lote"
+        )
+    with col5:
+        filtro_serial = st.text_input(
+            "Serial (+ Lista)",
+            key="filtro_serial"
+        )
+
+    # Linha 3: Base Operacional + Ação (multiselect, opções via SELECT DISTINCT)
+    col6, col7 = st.columns(2)
+    with col6:
+        bases_sel = st.multiselect(
+            "Base Operacional (multiseleção)",
+            options=fetch_ofs_equipamentos_opcoes("Base Operacional", data_ini_local, data_fim_local),
+            default=[]
+        )
+    with col7:
+        acoes_sel = st.multiselect(
+            "Ação (multiseleção)",
+            options=fetch_ofs_equipamentos_opcoes("Ação", data_ini_local, data_fim_local),
+            default=[]
+        )
+
+# ----------------------------
+# BUSCA COM OS FILTROS APLICADOS NO BANCO
+# ----------------------------
+filtros_equip = dict(
+    data_inicio=data_ini_local,
+    data_fim=data_fim_local,
+    notas=parse_multi_filter(filtro_nota),
+    lotes=parse_multi_filter(filtro_lote),
+    seriais=parse_multi_filter(filtro_serial),
+    bases=bases_sel,
+    acoes=acoes_sel
+)
+# Períodos longos: resumo e páginas são buscados por partição (semanas), com progresso
+resumo_equip = fetch_ofs_equipamentos_resumo(
+    ao_progredir=progresso_particoes("Buscando o período"), **filtros_equip
+)
+
+if resumo_equip["registros"] == 0:
+    st.warning("⚠️ Nenhum dado encontrado para os filtros selecionados.")
+else:
+    # ----------------------------
+    # KPIs SIMPLES
+    # ----------------------------
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Total de Registros", resumo_equip["registros"])
+    with col2:
+        st.metric("Notas", resumo_equip["notas"])
+
+    st.divider()
+
+    # ----------------------------
+    # TABELA (PAGINADA NO BANCO) + DOWNLOAD
+    # ----------------------------
+    st.subheader("📋 Detalhamento de Notas Equipamentos")
+    tabela_paginada(
+        "ofs_equipamentos",
+        paginas_sql(fetch_ofs_equipamentos_pagina, OFS_EQUIPAMENTOS_CHAVES, **filtros_equip),
+        total=resumo_equip["registros"], assinatura=build_params(**filtros_equip),
+        colunas_ocultas=COLUNAS_DESEMPATE
+    )
+
+    # Períodos longos são exportados partição a partição (em paralelo, com cache por partição)
+    botao_exportacao(
+        "ofs_equipamentos", "xlsx",
+        lambda: iter_ofs_equipamentos_chunks(**filtros_equip), resumo_equip["registros"],
+        file_name=f"ofs_equipamentos_{data_ini_local}_a_{data_fim_local}.xlsx",
+        sheet_name="Dados",
+        **filtros_equip
+    )
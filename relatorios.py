@@ -0,0 +1,126 @@
+"""
+Geração de relatórios do dashboard sem o Streamlit (para agendar fora do horário de pico).
+
+Usa os mesmos loaders e a mesma exportação em streaming das páginas e grava
+os arquivos em um diretório; cada relatório roda em um processo próprio.
+
+Uso:
+    python relatorios.py [--dias 1 | --inicio AAAA-MM-DD --fim AAAA-MM-DD]
+                         [--regional "Volta Redonda"]
+                         [--relatorios inicio_turno ofs_equipamentos ofs_apr]
+                         [--formatos xlsx csv parquet] [--saida relatorios/] [--processos 3]
+
+Exemplo (cron, todo dia às 5h, relatórios do dia anterior):
+    0 5 * * * cd /srv/light_comercial && python relatorios.py --dias 1 --saida /srv/relatorios
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from light_comercial import instrumentacao
+from light_comercial.config import REGIONAL_OPCOES
+from light_comercial.exportacao import descrever_exportacao, exportar_arquivo, iter_dataframe_chunks
+from light_comercial.loaders import fetch_inicio_turno_data, iter_ofs_apr_chunks, iter_ofs_equipamentos_chunks
+
+
+def _chunks_inicio_turno(data_inicio, data_fim, regional):
+    df = fetch_inicio_turno_data(data_inicio=data_inicio, data_fim=data_fim, regional=regional, levantar_erros=True)
+    return iter_dataframe_chunks(df)
+
+
+def _chunks_ofs_equipamentos(data_inicio, data_fim, regional):
+    return iter_ofs_equipamentos_chunks(data_inicio=data_inicio, data_fim=data_fim, regional=regional)
+
+
+def _chunks_ofs_apr(data_inicio, data_fim, regional):
+    return iter_ofs_apr_chunks(data_inicio=data_inicio, data_fim=data_fim, regional=regional)
+
+
+# Relatório -> (nome da planilha, blocos de linhas para (data_inicio, data_fim, regional))
+RELATORIOS = {
+    "inicio_turno": ("Início de Turno", _chunks_inicio_turno),
+    "ofs_equipamentos": ("Dados", _chunks_ofs_equipamentos),
+    "ofs_apr": ("Notas APR", _chunks_ofs_apr),
+}
+
+FORMATOS = ("xlsx", "csv", "parquet")
+
+
+def nome_arquivo(relatorio, data_inicio, data_fim, regional, formato):
+    """Mesmo padrão de nome dos downloads das páginas, com a regional quando filtrada"""
+    sufixo = f"_{regional.lower().replace(' ', '_')}" if regional and regional != "Todas" else ""
+    return f"{relatorio}_{data_inicio}_a_{data_fim}{sufixo}.{formato}"
+
+
+def gerar_relatorio(relatorio, data_inicio, data_fim, regional, formatos, saida):
+    """
+    Gera um relatório em cada formato pedido (roda no processo filho).
+    Cada arquivo é escrito em um temporário e renomeado ao final, para que
+    quem serve o diretório nunca veja um arquivo pela metade.
+    Retorna [(caminho, stats)]; relatórios sem linhas não geram arquivo (caminho None).
+    As buscas ficam com origem "relatorio" (fora do aprendizado do aquecimento).
+    """
+    sheet_name, gerar_chunks = RELATORIOS[relatorio]
+    gerados = []
+    with instrumentacao.com_origem("relatorio"):
+        for formato in formatos:
+            caminho = os.path.join(saida, nome_arquivo(relatorio, data_inicio, data_fim, regional, formato))
+            temporario = f"{caminho}.parcial"
+            with open(temporario, "wb") as destino:
+                stats = exportar_arquivo(gerar_chunks(data_inicio, data_fim, regional), formato, destino, sheet_name)
+            if stats["linhas"] == 0:
+                os.remove(temporario)
+                gerados.append((None, stats))
+                break  # Sem dados no período: os demais formatos também sairiam vazios
+            os.replace(temporario, caminho)
+            gerados.append((caminho, stats))
+    return gerados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, default=1, help="Dias anteriores a hoje incluídos (padrão: 1, ontem)")
+    parser.add_argument("--inicio", type=datetime.date.fromisoformat)
+    parser.add_argument("--fim", type=datetime.date.fromisoformat)
+    parser.add_argument("--regional", choices=REGIONAL_OPCOES, default="Todas")
+    parser.add_argument("--relatorios", nargs="+", choices=list(RELATORIOS), default=list(RELATORIOS))
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=["xlsx"])
+    parser.add_argument("--saida", default="relatorios", help="Diretório de saída (padrão: relatorios/)")
+    parser.add_argument("--processos", type=int, default=len(RELATORIOS), help="Relatórios gerados em paralelo")
+    args = parser.parse_args(argv)
+
+    fim = args.fim or datetime.date.today() - datetime.timedelta(days=1)
+    inicio = args.inicio or fim - datetime.timedelta(days=args.dias - 1)
+    os.makedirs(args.saida, exist_ok=True)
+    print(f"📊 Relatórios de {inicio} a {fim} (regional: {args.regional}) em {args.saida}")
+
+    inicio_lote = time.perf_counter()
+    falhas = 0
+    # spawn: cada processo cria a própria engine e caches (nada herdado do pai)
+    with ProcessPoolExecutor(max_workers=args.processos, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futuros = {
+            executor.submit(gerar_relatorio, relatorio, inicio, fim, args.regional, args.formatos, args.saida): relatorio
+            for relatorio in args.relatorios
+        }
+        for futuro in as_completed(futuros):
+            relatorio = futuros[futuro]
+            try:
+                for caminho, stats in futuro.result():
+                    if caminho is None:
+                        print(f"⚠️ {relatorio}: nenhum registro no período, arquivo não gerado.")
+                    else:
+                        print(f"✅ {relatorio}: {caminho} ({descrever_exportacao(stats)}, {stats['segundos']:.1f}s)")
+            except Exception as e:
+                falhas += 1
+                print(f"❌ {relatorio}: {e}")
+
+    print(f"Concluído em {time.perf_counter() - inicio_lote:.1f}s ({falhas} falha(s)).")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
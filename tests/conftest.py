@@ -0,0 +1,44 @@
+"""
+Configuração comum dos testes.
+
+light_comercial.config monta a URL do banco ao ser importado, então os testes
+definem variáveis DB_* fictícias (nenhum teste abre conexão).
+"""
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+for _nome, _valor in {
+    "DB_USER": "teste", "DB_PASS": "teste", "DB_HOST": "localhost", "DB_PORT": "5432", "DB_NAME": "teste",
+}.items():
+    os.environ.setdefault(_nome, _valor)
+
+
+def gerar_turnos(linhas, seed=42, nulos=0.0):
+    """DataFrame sintético no formato de fetch_inicio_turno_data (`nulos`: fração sem horário)"""
+    rng = np.random.default_rng(seed)
+    inicio = rng.integers(5 * 60, 10 * 60, linhas).astype("float64")
+    fim = np.minimum(inicio + rng.integers(6 * 60, 10 * 60, linhas), 23 * 60 + 59)
+    if nulos:
+        inicio[rng.random(linhas) < nulos] = np.nan
+        fim[rng.random(linhas) < nulos] = np.nan
+    datas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D")
+    return pd.DataFrame({
+        "data_servico": datas,
+        "minutos_inicio": inicio,
+        "minutos_fim": fim,
+        "recurso": rng.choice([f"EQ-{r}{i:03d}" for r in ("BP", "VR", "TR") for i in range(200)], linhas),
+        "regional": rng.choice(["Barra do Piraí", "Volta Redonda", "Três Rios"], linhas),
+        "composicao": rng.choice(["completa", "incompleta"], linhas, p=[0.8, 0.2]),
+    })
+
+
+@pytest.fixture(scope="session")
+def turnos_1m():
+    return gerar_turnos(1_000_000)
@@ -0,0 +1,91 @@
+"""Ida e volta nos backends do cache L2 (tipos, TTL e remoção LRU)"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from light_comercial import cache_l2
+from light_comercial.cache_l2 import CacheDisco, CacheRedis, ClienteRedisLocal
+
+
+class Relogio:
+    """Substitui o módulo time de cache_l2 (time.time controlado pelo teste)"""
+
+    def __init__(self):
+        self.agora = 1_000_000.0
+
+    def time(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_l2, "time", relogio)
+    return relogio
+
+
+@pytest.fixture(params=["disco", "redis"])
+def backend(request, tmp_path):
+    if request.param == "disco":
+        return CacheDisco(str(tmp_path / "l2"))
+    return CacheRedis(cliente=ClienteRedisLocal())
+
+
+def resultado_tipado(linhas=100):
+    return pd.DataFrame({
+        "Data": pd.to_datetime("2024-01-01") + pd.to_timedelta(np.arange(linhas) % 7, unit="D"),
+        "data_servico": [datetime.date(2024, 1, 1 + i % 7) for i in range(linhas)],
+        "recurso": pd.Categorical([f"EQ-VR{i % 3:03d}" for i in range(linhas)]),
+        "minutos_inicio": np.arange(linhas, dtype="int16"),
+        "minutos_fim": np.linspace(0, 1, linhas, dtype="float32"),
+        "Nota": [f"{i:012d}" for i in range(linhas)],
+    })
+
+
+def test_ida_e_volta_mantem_tipos(backend):
+    df = resultado_tipado()
+    backend.gravar("chave", df, ttl=60)
+    lido = backend.ler("chave")
+    pd.testing.assert_frame_equal(lido, df)
+    assert isinstance(lido["recurso"].dtype, pd.CategoricalDtype)
+    assert lido["Nota"].iloc[0] == "000000000000"
+
+
+def test_chave_ausente(backend):
+    assert backend.ler("nao-existe") is None
+
+
+def test_ttl_expira(backend, relogio):
+    backend.gravar("chave", resultado_tipado(), ttl=60)
+    relogio.agora += 59
+    assert backend.ler("chave") is not None
+    relogio.agora += 2
+    assert backend.ler("chave") is None
+
+
+def test_disco_remove_menos_acessadas_acima_do_limite(tmp_path, relogio):
+    df = resultado_tipado(20_000)
+    tamanho_mb = cache_l2.serializar(df).size / 1024 ** 2
+    cache = CacheDisco(str(tmp_path / "l2"), max_mb=tamanho_mb * 2.5)
+
+    for chave in ("a", "b"):
+        cache.gravar(chave, df, ttl=3600)
+        relogio.agora += 1
+    assert cache.ler("a") is not None  # "a" passa a ser a mais recente
+    relogio.agora += 1
+    cache.gravar("c", df, ttl=3600)  # Três entradas não cabem: sai a menos acessada ("b")
+
+    assert cache.ler("b") is None
+    assert not (tmp_path / "l2" / "b.arrow").exists()
+    assert cache.ler("a") is not None
+    assert cache.ler("c") is not None
+
+
+def test_chave_cache_depende_da_versao():
+    params = (("data_inicio", datetime.date(2024, 1, 1)),)
+    chave = cache_l2.chave_cache("ofs_apr:pagina", params, versao=(0, ("1",)))
+    assert chave.startswith("ofs_apr-")
+    assert chave == cache_l2.chave_cache("ofs_apr:pagina", params, versao=(0, ("1",)))
+    assert chave != cache_l2.chave_cache("ofs_apr:pagina", params, versao=(1, ("1",)))
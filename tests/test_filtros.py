@@ -0,0 +1,99 @@
+"""Funções puras de filtros, parâmetros e partições"""
+import datetime
+import re
+
+from light_comercial.aquecimento import _desnormalizar, _normalizar
+from light_comercial.consultas import build_params
+from light_comercial.loaders import parse_multi_filter
+from light_comercial.particoes import particoes_periodo, periodo_longo
+from light_comercial.sql import (
+    OFS_APR_CHAVES, OFS_EQUIPAMENTOS_CHAVES, SQL_OFS_APR, SQL_OFS_APR_PAGINA, SQL_OFS_EQUIPAMENTOS,
+    SQL_OFS_EQUIPAMENTOS_PAGINA,
+)
+
+D = datetime.date
+
+
+def test_parse_multi_filter():
+    assert parse_multi_filter("123, 456;789 0001") == ["123", "456", "789", "0001"]
+    assert parse_multi_filter(" ,; ") == []
+    assert parse_multi_filter("") == []
+    assert parse_multi_filter(None) == []
+
+
+def test_build_params_ordena_e_descarta_none():
+    params = build_params(data_fim=D(2024, 1, 7), notas=["2", "1"], equipe=None, bases={"b", "a"})
+    assert params == (("bases", ("a", "b")), ("data_fim", D(2024, 1, 7)), ("notas", ("2", "1")))
+    assert hash(params) == hash(build_params(bases={"a", "b"}, notas=("2", "1"), data_fim=D(2024, 1, 7)))
+
+
+def test_particoes_alinhadas_ao_calendario():
+    # 2024-01-03 é quarta: dias avulsos até a segunda 08, duas semanas e dias avulsos no fim
+    particoes = particoes_periodo(D(2024, 1, 3), D(2024, 1, 24))
+    assert particoes == [
+        (D(2024, 1, 3), D(2024, 1, 3)),
+        (D(2024, 1, 4), D(2024, 1, 4)),
+        (D(2024, 1, 5), D(2024, 1, 5)),
+        (D(2024, 1, 6), D(2024, 1, 6)),
+        (D(2024, 1, 7), D(2024, 1, 7)),
+        (D(2024, 1, 8), D(2024, 1, 14)),
+        (D(2024, 1, 15), D(2024, 1, 21)),
+        (D(2024, 1, 22), D(2024, 1, 22)),
+        (D(2024, 1, 23), D(2024, 1, 23)),
+        (D(2024, 1, 24), D(2024, 1, 24)),
+    ]
+
+
+def test_particoes_cobrem_o_periodo_sem_sobreposicao():
+    inicio, fim = D(2023, 11, 17), D(2024, 3, 2)
+    particoes = particoes_periodo(inicio, fim)
+    assert particoes[0][0] == inicio and particoes[-1][1] == fim
+    for (_, fim_anterior), (inicio_seguinte, _) in zip(particoes, particoes[1:]):
+        assert inicio_seguinte == fim_anterior + datetime.timedelta(days=1)
+    # Mesma semana em períodos diferentes gera a mesma partição (mesma chave de cache)
+    assert (D(2024, 1, 8), D(2024, 1, 14)) in particoes_periodo(D(2024, 1, 1), D(2024, 2, 29))
+
+
+def test_periodo_longo():
+    assert not periodo_longo(D(2024, 1, 1), D(2024, 1, 31))
+    assert periodo_longo(D(2024, 1, 1), D(2024, 2, 1))
+    assert not periodo_longo(None, D(2024, 2, 1))
+
+
+def test_normalizar_periodo_relativo_a_hoje():
+    dia = D(2024, 5, 10)
+    chave = _normalizar({"data_inicio": D(2024, 5, 3), "data_fim": dia, "regional": "Todas"}, dia)
+    assert chave == (("data_fim", ("dias", 0)), ("data_inicio", ("dias", -7)), ("regional", "Todas"))
+    # Reaplicado em outro dia, o período acompanha ("últimos 7 dias")
+    assert _desnormalizar(chave, D(2024, 6, 1)) == {
+        "data_fim": D(2024, 6, 1), "data_inicio": D(2024, 5, 25), "regional": "Todas",
+    }
+
+
+def test_normalizar_periodo_fixo_e_listas():
+    chave = _normalizar(
+        {"data_inicio": "2024-01-01", "data_fim": "2024-01-31T00:00:00", "notas": ["1", "2"]}, D(2024, 5, 10)
+    )
+    assert chave == (
+        ("data_fim", ("data", "2024-01-31")), ("data_inicio", ("data", "2024-01-01")), ("notas", ("1", "2")),
+    )
+    assert _desnormalizar(chave, D(2030, 1, 1))["notas"] == ["1", "2"]
+
+
+def test_normalizar_descarta_paginas_seguintes_e_valores_nao_serializaveis():
+    dia = D(2024, 5, 10)
+    assert _normalizar({"apos": ("2024-05-01", "123"), "limite": 200}, dia) is None
+    assert _normalizar({"limite": 200, "filtro": object()}, dia) is None
+    assert _normalizar({"apos": None, "limite": 200}, dia) == (("apos", None), ("limite", 200))
+
+
+def test_sql_paginado_tem_as_colunas_da_chave():
+    def aliases(sql):
+        return re.findall(r'\bAS "([^"]+)"', sql, flags=re.IGNORECASE)
+
+    for completa, paginada, chaves in (
+        (SQL_OFS_EQUIPAMENTOS, SQL_OFS_EQUIPAMENTOS_PAGINA, OFS_EQUIPAMENTOS_CHAVES),
+        (SQL_OFS_APR, SQL_OFS_APR_PAGINA, OFS_APR_CHAVES),
+    ):
+        # Mesmas colunas visíveis da consulta completa, seguidas das colunas de desempate
+        assert aliases(paginada) == aliases(completa) + [c for c in chaves if c not in aliases(completa)]
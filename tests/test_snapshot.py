@@ -0,0 +1,92 @@
+"""Carga inicial do snapshot local: só é usado depois de concluída e nunca é feita numa requisição"""
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+from light_comercial import snapshot
+
+
+class Banco:
+    """Substitui engine e pd.read_sql do snapshot: uma linha por dia, falha após `falhar_apos` janelas"""
+
+    def __init__(self, falhar_apos=None):
+        self.janelas = []
+        self.falhar_apos = falhar_apos
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def read_sql(self, sql, conn, params):
+        if self.falhar_apos is not None and len(self.janelas) >= self.falhar_apos:
+            raise RuntimeError("conexão perdida")
+        self.janelas.append((params["desde"], params["ate"]))
+        dias = pd.date_range(params["desde"], params["ate"] - datetime.timedelta(days=1)).date
+        linhas = {coluna: [None] * len(dias) for coluna in snapshot.SNAPSHOT_SCHEMA.names}
+        linhas.update(id_atividade=[str(i) for i in range(len(dias))], tipo_atividade_1="Início de turno")
+        return pd.DataFrame({"data_servico": dias, **linhas})
+
+
+@pytest.fixture
+def banco(monkeypatch, tmp_path):
+    banco = Banco()
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshot"))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_ATIVO", True)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIAS_INICIAIS", 90)
+    monkeypatch.setattr(snapshot, "get_engine", lambda: banco)
+    monkeypatch.setattr(snapshot.pd, "read_sql", banco.read_sql)
+    return banco
+
+
+def test_carga_interrompida_nao_libera_o_snapshot(banco):
+    banco.falhar_apos = 1
+    with pytest.raises(RuntimeError):
+        snapshot.atualizar_snapshot(carga_inicial=True)
+    assert snapshot._snapshot_watermark() is not None
+    assert not snapshot.snapshot_pronto()
+
+    # Requisição: não retoma a carga
+    banco.falhar_apos = None
+    janelas = len(banco.janelas)
+    snapshot.atualizar_snapshot()
+    assert len(banco.janelas) == janelas
+    assert not snapshot.snapshot_pronto()
+
+    # Aquecedor: retoma do watermark e só então libera
+    assert snapshot.atualizar_snapshot(carga_inicial=True) == datetime.date.today()
+    assert snapshot.snapshot_pronto()
+    assert banco.janelas[janelas][0] == banco.janelas[janelas - 1][1] - datetime.timedelta(days=1)
+
+
+def test_requisicao_nao_recupera_atraso_longo(banco, monkeypatch):
+    snapshot.atualizar_snapshot(carga_inicial=True)
+    janelas = len(banco.janelas)
+
+    snapshot.atualizar_snapshot()
+    assert banco.janelas[janelas:] == [(datetime.date.today(), datetime.date.today() + datetime.timedelta(days=1))]
+
+    # Watermark antigo demais: a requisição não busca nada
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIAS_REQUISICAO", -1)
+    janelas = len(banco.janelas)
+    snapshot.atualizar_snapshot()
+    assert len(banco.janelas) == janelas
+
+
+def test_leitura_ignora_temporarios(banco):
+    snapshot.atualizar_snapshot(carga_inicial=True)
+    pasta = os.path.join(snapshot.SNAPSHOT_DIR, f"data_servico={datetime.date.today().isoformat()}")
+    # Gravação em andamento (ou de um processo que morreu no meio)
+    with open(os.path.join(pasta, ".part-0.parquet.1.2.tmp"), "wb") as arquivo:
+        arquivo.write(b"PAR1 incompleto")
+    snapshot._gravar_particao(datetime.date.today(), banco.read_sql(None, None, {
+        "desde": datetime.date.today(), "ate": datetime.date.today() + datetime.timedelta(days=1),
+    }))
+    assert sorted(os.listdir(pasta)) == [".part-0.parquet.1.2.tmp", "part-0.parquet"]
+    assert len(snapshot.ler_snapshot(datetime.date.today(), datetime.date.today())) == 1
@@ -0,0 +1,89 @@
+"""turno_metrics contra o cálculo anterior da aba (to_datetime + apply linha a linha)"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import gerar_turnos
+from light_comercial import turno_metrics
+
+
+def hhmm_antigo(x):
+    """Formatação anterior de "Hora Média Início/Fim" (por linha)"""
+    return f"{int(x // 60):02d}:{int(x % 60):02d}" if not pd.isna(x) else "N/A"
+
+
+def recursos_por_data_antigo(df):
+    por_data = df.groupby("data_servico").agg(
+        {"recurso": "nunique", "minutos_inicio": "mean", "minutos_fim": "mean"}
+    ).reset_index()
+    por_data["Hora Média Início"] = por_data["minutos_inicio"].apply(hhmm_antigo)
+    por_data["Hora Média Fim"] = por_data["minutos_fim"].apply(hhmm_antigo)
+    por_data = por_data[["data_servico", "recurso", "Hora Média Início", "Hora Média Fim"]]
+    por_data.columns = ["Data", "Qtd Recursos", "Hora Média Início", "Hora Média Fim"]
+    return por_data
+
+
+def test_formatar_hhmm_igual_ao_antigo():
+    valores = pd.Series([0, 59.9, 60, 479.5, 480, 1439.99, np.nan, 7.25])
+    esperado = [hhmm_antigo(x) for x in valores]
+    assert turno_metrics.formatar_hhmm(valores).tolist() == esperado
+
+
+def test_nan_vira_na():
+    assert turno_metrics.formatar_hhmm_valor(np.nan) == "N/A"
+    assert turno_metrics.formatar_hhmm([np.nan, None]).tolist() == ["N/A", "N/A"]
+
+
+def test_kpis_sem_horarios_ficam_na():
+    df = gerar_turnos(50)
+    df["minutos_inicio"] = np.nan
+    df["minutos_fim"] = np.nan
+    kpis = turno_metrics.kpis_turno(df)
+    assert kpis["hora_media_inicio"] == "N/A"
+    assert kpis["hora_media_fim"] == "N/A"
+
+
+def test_kpis_iguais_ao_antigo():
+    df = gerar_turnos(20_000, nulos=0.05)
+    kpis = turno_metrics.kpis_turno(df)
+    assert kpis["total_recursos"] == df["recurso"].nunique()
+    assert kpis["composicoes_completas"] == (df["composicao"] == "completa").sum()
+    assert kpis["hora_media_inicio"] == hhmm_antigo(df["minutos_inicio"].mean())
+    assert kpis["hora_media_fim"] == hhmm_antigo(df["minutos_fim"].mean())
+    assert kpis["media_recursos_dia"] == pytest.approx(df.groupby("data_servico")["recurso"].nunique().mean())
+
+
+def test_recursos_por_data_igual_ao_antigo():
+    df = gerar_turnos(20_000, nulos=0.05)
+    # Um dia só com horários nulos: as médias do dia são NaN e viram "N/A"
+    df.loc[df["data_servico"] == df["data_servico"].min(), ["minutos_inicio", "minutos_fim"]] = np.nan
+    novo = turno_metrics.recursos_por_data(df)
+    pd.testing.assert_frame_equal(novo, recursos_por_data_antigo(df), check_dtype=False)
+    assert novo["Hora Média Início"].iloc[0] == "N/A"
+
+
+def test_medias_float32_iguais_ao_float64():
+    # compactar_dataframe reduz "decimais" (minutos do snapshot) a float32
+    df64 = gerar_turnos(1_000_000, nulos=0.01)
+    df32 = df64.astype({"minutos_inicio": "float32", "minutos_fim": "float32"})
+    kpis = turno_metrics.kpis_turno(df32)
+    assert kpis["hora_media_inicio"] == hhmm_antigo(df64["minutos_inicio"].mean())
+    assert kpis["hora_media_fim"] == hhmm_antigo(df64["minutos_fim"].mean())
+    pd.testing.assert_frame_equal(
+        turno_metrics.recursos_por_data(df32), recursos_por_data_antigo(df64), check_dtype=False
+    )
+
+
+def test_minutos_desde_meia_noite_igual_ao_to_datetime():
+    horarios = pd.Series(["05:07:59", "23:59:00", "00:00:30", "12:30", None, "xx:yy"])
+    validos = pd.to_datetime(horarios[:4], format="mixed")
+    esperado = (validos.dt.hour * 60 + validos.dt.minute).tolist() + [np.nan, np.nan]
+    np.testing.assert_array_equal(turno_metrics.minutos_desde_meia_noite(horarios).to_numpy(), esperado)
+
+
+def test_composicao_por_regional_categorica_com_total():
+    df = gerar_turnos(5_000).astype({"regional": "category", "composicao": "category"})
+    composicao = turno_metrics.composicao_por_regional(df)
+    esperado = df.groupby(["regional", "composicao"], observed=True).size().unstack(fill_value=0)
+    assert list(composicao.columns) == ["completa", "incompleta", "Total"]
+    assert (composicao["Total"] == esperado.sum(axis=1)).all()
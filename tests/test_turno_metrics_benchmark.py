@@ -0,0 +1,31 @@
+"""
+Benchmarks (pytest-benchmark) das métricas de Início de Turno em 1M linhas.
+
+    pytest tests/test_turno_metrics_benchmark.py --benchmark-only
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from light_comercial import turno_metrics  # noqa: E402
+
+
+def test_benchmark_kpis_turno(benchmark, turnos_1m):
+    kpis = benchmark.pedantic(turno_metrics.kpis_turno, args=(turnos_1m,), rounds=3)
+    assert kpis["total_recursos"] == 600
+
+
+def test_benchmark_recursos_por_data(benchmark, turnos_1m):
+    por_data = benchmark.pedantic(turno_metrics.recursos_por_data, args=(turnos_1m,), rounds=3)
+    assert len(por_data) == 365
+
+
+def test_benchmark_composicao_por_regional(benchmark, turnos_1m):
+    composicao = benchmark.pedantic(turno_metrics.composicao_por_regional, args=(turnos_1m,), rounds=3)
+    assert composicao["Total"].sum() == len(turnos_1m)
+
+
+def test_benchmark_minutos_desde_meia_noite(benchmark, turnos_1m):
+    horarios = turno_metrics.formatar_hhmm(turnos_1m["minutos_inicio"])
+    minutos = benchmark.pedantic(turno_metrics.minutos_desde_meia_noite, args=(horarios,), rounds=3)
+    assert minutos.notna().all()